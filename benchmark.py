@@ -0,0 +1,274 @@
+"""
+Benchmarks for the step engines, the board renderer and whole frames.
+
+Measures generations per second for every engine across board sizes and
+workloads (random soups of different densities, the R-pentomino, the
+Gosper gun, and a HighLife soup on the engines that run other rules), the
+time draw_board() takes on a dummy SDL display, and the time of a complete
+frame of the main loop. Results are written as JSON so
+runs can be compared, and --compare fails when a result got slower.
+
+Usage:
+python benchmark.py --output bench.json
+python benchmark.py --quick --compare bench.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from lifecore import ENGINES, INFINITE, TORUS, Simulation
+from patterns import pattern, place, random_soup
+
+SIZES = [80, 512, 2048, 8192]
+QUICK_SIZES = [80, 512]
+
+# Starting boards: (name, pattern or "random", density)
+WORKLOADS = [
+    ("soup-10", "random", 0.1),
+    ("soup-50", "random", 0.5),
+    ("r-pentomino", "r-pentomino", None),
+    ("gosper-gun", "gosper-gun", None),
+]
+
+# A soup under another rule, run on the engines that support rules
+RULE_WORKLOAD = ("highlife-50", "random", 0.5)
+RULE = "B36/S23"
+
+# Building a HashLife tree from a large random soup takes far longer than
+# stepping it, so soups are only run on small boards with that engine
+HASHLIFE_SOUP_LIMIT = 512
+
+# Each render measurement runs for at least this long
+MIN_SECONDS = 0.5
+
+# Every engine steps the same number of generations on a board: about this
+# many cell updates, one generation per call, but at least MIN_GENERATIONS.
+# (Doubling the count until time runs out would let HashLife jump 2^60
+# generations at once, which says nothing about its speed per generation.)
+STEP_CELLS = 1 << 24
+MIN_GENERATIONS = 4
+
+# A result this much worse than the baseline counts as a regression
+DEFAULT_THRESHOLD = 0.2
+
+
+def build_board(size, workload):
+    _, name, density = workload
+    if name == "random":
+        return random_soup((size, size), density, seed=0)
+    return place(np.zeros((size, size), dtype=bool), pattern(name))
+
+
+def measure(run, min_seconds=MIN_SECONDS):
+    """
+    Call run(count) with growing counts until min_seconds have been spent
+    and return (total count, seconds)
+    """
+    total = 0
+    seconds = 0.0
+    count = 1
+    while seconds < min_seconds:
+        start = time.perf_counter()
+        run(count)
+        seconds += time.perf_counter() - start
+        total += count
+        count *= 2
+    return total, seconds
+
+
+def step_generations(size, quick=False):
+    """ The number of generations every engine is timed for on a size x size board """
+    cells = STEP_CELLS // 8 if quick else STEP_CELLS
+    return max(MIN_GENERATIONS, cells // (size * size))
+
+
+def bench_step(engine, size, workload, generations):
+    """ Return the result record for one engine, board size and workload """
+    boundary = INFINITE if engine == "hashlife" else TORUS
+    rule = RULE if workload == RULE_WORKLOAD else None
+    start = time.perf_counter()
+    simulation = Simulation(build_board(size, workload), engine, boundary, rule)
+    setup = time.perf_counter() - start
+    # The first step warms up caches and worker processes
+    simulation.step()
+    start = time.perf_counter()
+    for _ in range(generations):
+        simulation.step()
+    seconds = time.perf_counter() - start
+    if hasattr(simulation.engine, "close"):
+        simulation.engine.close()
+    return {
+        "kind": "step",
+        "engine": engine,
+        "size": size,
+        "workload": workload[0],
+        "setup_seconds": setup,
+        "generations": generations,
+        "seconds": seconds,
+        "generations_per_second": generations / seconds,
+    }
+
+
+def supports_rules(engine):
+    module_name, class_name = ENGINES[engine]
+    return getattr(getattr(importlib.import_module(module_name), class_name), "supports_rules", False)
+
+
+def step_cases(engines, sizes):
+    for engine in engines:
+        workloads = WORKLOADS + [RULE_WORKLOAD] if supports_rules(engine) else WORKLOADS
+        for size in sizes:
+            for workload in workloads:
+                if engine == "hashlife" and workload[1] == "random" and size > HASHLIFE_SOUP_LIMIT:
+                    continue
+                yield engine, size, workload
+
+
+def bench_render(min_seconds=MIN_SECONDS):
+    """
+    Time draw_board() and a whole frame of the main loop on a dummy display.
+    Returns a list of result records.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import life
+    from lifecore import create_engine
+
+    pygame.init()
+    screen = pygame.display.set_mode((life.WIDTH, life.HEIGHT))
+    shape = (80, 80)
+    boards = {
+        "unchanged": [np.zeros(shape, dtype=bool)] * 2,
+        "one-cell": [np.zeros(shape, dtype=bool), np.zeros(shape, dtype=bool)],
+        "full": [random_soup(shape, 0.5, seed=1), random_soup(shape, 0.5, seed=2)],
+    }
+    boards["one-cell"][1][40, 40] = True
+
+    results = []
+    for case, (first, second) in boards.items():
+        previous = np.zeros(shape, dtype=bool)
+        frames = [first, second]
+
+        def render(count):
+            for index in range(count):
+                life.draw_board(screen, frames[index % 2], previous)
+
+        count, seconds = measure(render, min_seconds)
+        results.append({"kind": "render", "case": case, "frames": count,
+                        "ms_per_frame": 1000 * seconds / count})
+
+    # A frame of the running main loop without event handling
+    board = np.zeros(shape, dtype=bool)
+    engine = create_engine(life.ENGINE, random_soup(shape, 0.5, seed=3), life.BOUNDARY)
+    previous = board.copy()
+    panel = life.ButtonPanel()
+
+    def frame(count):
+        for _ in range(count):
+            engine.step()
+            engine.window(0, 0, shape[0], shape[1], out=board)
+            dirty = life.draw_board(screen, board, previous)
+            panel.update(True, True, "1x")
+            pygame.display.update(dirty + panel.draw(screen))
+
+    count, seconds = measure(frame, min_seconds)
+    results.append({"kind": "frame", "case": f"{life.ENGINE}-running", "frames": count,
+                    "ms_per_frame": 1000 * seconds / count})
+    pygame.quit()
+    return results
+
+
+def result_key(result):
+    if result["kind"] == "step":
+        return ("step", result["engine"], result["size"], result["workload"])
+    return (result["kind"], result["case"])
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Print how each result moved against the baseline run and return the
+    keys of the results that got worse by more than threshold
+    """
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = result_key(result)
+        old = previous.get(key)
+        if old is None:
+            continue
+        if result["kind"] == "step":
+            change = result["generations_per_second"] / old["generations_per_second"] - 1
+        else:
+            change = old["ms_per_frame"] / result["ms_per_frame"] - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{' '.join(str(part) for part in key):45s} {change:+7.1%}{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engines", nargs="+", default=sorted(ENGINES), choices=sorted(ENGINES),
+                        help="engines to benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=None,
+                        help="board sizes (default: %s)" % " ".join(map(str, SIZES)))
+    parser.add_argument("--quick", action="store_true",
+                        help="only small boards and short measurements")
+    parser.add_argument("--no-render", action="store_true",
+                        help="skip the renderer and frame benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown (as a fraction) that counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    min_seconds = MIN_SECONDS / 5 if args.quick else MIN_SECONDS
+
+    results = []
+    for engine, size, workload in step_cases(args.engines, sizes):
+        result = bench_step(engine, size, workload, step_generations(size, args.quick))
+        results.append(result)
+        print(f"step   {engine:9s} {size:5d} {workload[0]:12s} "
+              f"{result['generations_per_second']:12,.1f} generations/s")
+    if not args.no_render:
+        for result in bench_render(min_seconds):
+            results.append(result)
+            print(f"{result['kind']:6s} {result['case']:28s} {result['ms_per_frame']:9.3f} ms")
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Bit-packed Game of Life board.
+
+Each row of the board is stored as uint64 words holding 64 cells each, so a
+board takes one bit per cell instead of one byte. The next generation is
+computed for 64 cells at a time with bitwise adder logic (SWAR), without
+ever unpacking the cells. This module does not depend on pygame.
+"""
+import numpy as np
+
+from lifecore import BOUNDARIES, FIXED, INFINITE, TORUS
+
+WORD_BITS = 64
+_ONE = np.uint64(1)
+_HIGH_SHIFT = np.uint64(WORD_BITS - 1)
+
+# Number of set bits in every byte value, for NumPy versions without bitwise_count
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def pack(board):
+    """
+    Pack a 2D bool array into uint64 words along its second axis.
+
+    Bit j of word k in row i holds cell (i, 64 * k + j). Bits past the last
+    column are zero.
+    """
+    board = np.asarray(board, dtype=bool)
+    rows, cols = board.shape
+    n_words = -(-cols // WORD_BITS)
+    padded = np.zeros((rows, n_words * WORD_BITS), dtype=bool)
+    padded[:, :cols] = board
+    packed = np.packbits(padded, axis=1, bitorder="little")
+    return packed.view("<u8").astype(np.uint64, copy=False)
+
+
+def unpack(words, cols):
+    """ Unpack uint64 words produced by pack() back into a bool array with cols columns """
+    words = np.ascontiguousarray(words, dtype="<u8")
+    cells = np.unpackbits(words.view(np.uint8), axis=1, count=cols, bitorder="little")
+    return cells.view(bool)
+
+
+class BitBoard:
+    """
+    Board backend that stores 64 cells per uint64 word.
+
+    It has the same get/set/step interface as lifecore.LifeEngine, so the
+    display code can use either one. The fixed and torus boundaries are
+    supported; the infinite boundary needs a resizable grid and is only
+    available on LifeEngine.
+    """
+
+    def __init__(self, board, boundary=FIXED):
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary mode: {boundary!r}")
+        if boundary == INFINITE:
+            raise ValueError("BitBoard does not support the infinite boundary")
+        board = np.asarray(board, dtype=bool)
+        rows, cols = board.shape
+        if rows < 3 or cols < 3:
+            raise ValueError("The board needs at least 3 rows and 3 columns")
+        self.boundary = boundary
+        self.origin = (0, 0)
+        self.generation = 0
+        self._shape = (rows, cols)
+        self._n_words = -(-cols // WORD_BITS)
+
+        # Rows 0 and -1 are halo rows holding whatever lies past the top and
+        # bottom edge, so the vertical neighbors are plain slices.
+        self._cells = np.zeros((rows + 2, self._n_words), dtype=np.uint64)
+        self._cells[1:-1] = pack(board)
+
+        # Mask of the bits that hold real cells in the last word of a row
+        last_bits = cols - (self._n_words - 1) * WORD_BITS
+        self._last_shift = np.uint64(last_bits - 1)
+        self._last_mask = np.uint64((1 << last_bits) - 1)
+
+        # Mask of the frozen first and last column for the fixed boundary
+        self._edge_mask = np.zeros(self._n_words, dtype=np.uint64)
+        self._edge_mask[0] |= _ONE
+        self._edge_mask[-1] |= _ONE << self._last_shift
+
+        shape = self._cells.shape
+        self._west = np.empty(shape, dtype=np.uint64)
+        self._east = np.empty(shape, dtype=np.uint64)
+
+        # The unpacked board, until the cells change
+        self._unpacked = None
+
+    @classmethod
+    def from_array(cls, board, boundary=FIXED):
+        return cls(board, boundary)
+
+    @property
+    def board(self):
+        """
+        The current generation as a read-only bool array. It is unpacked
+        once per generation (or edit), however often it is read.
+        """
+        if self._unpacked is None:
+            self._unpacked = unpack(self.words, self._shape[1])
+            self._unpacked.flags.writeable = False
+        return self._unpacked
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def words(self):
+        """ The packed cells, one row of uint64 words per board row; read only, like board """
+        return self._cells[1:-1]
+
+    def _locate(self, x, y):
+        rows, cols = self._shape
+        if not (0 <= x < rows and 0 <= y < cols):
+            raise IndexError(f"Cell ({x}, {y}) is outside the {rows}x{cols} board")
+        return x + 1, y // WORD_BITS, np.uint64(y % WORD_BITS)
+
+    def get(self, x, y):
+        row, word, bit = self._locate(x, y)
+        return bool((self._cells[row, word] >> bit) & _ONE)
+
+    def set(self, x, y, alive):
+        row, word, bit = self._locate(x, y)
+        self._unpacked = None
+        if alive:
+            self._cells[row, word] |= _ONE << bit
+        else:
+            self._cells[row, word] &= ~(_ONE << bit)
+
+    def clear(self):
+        self._cells[...] = 0
+        self._unpacked = None
+
+    def population(self):
+        words = self.words
+        if hasattr(np, "bitwise_count"):
+            return int(np.bitwise_count(words).sum())
+        return int(_BYTE_POPCOUNT[words.view(np.uint8)].sum(dtype=np.int64))
+
+    def to_array(self):
+        return unpack(self.words, self._shape[1])
+
+    def window(self, x, y, width, height, out=None):
+        """
+        Return the cells in the given rectangle as a bool array.
+        Cells outside the board are dead.
+        """
+        if out is None:
+            out = np.zeros((width, height), dtype=bool)
+        else:
+            out[...] = False
+        rows, cols = self._shape
+        x0, x1 = max(x, 0), min(x + width, rows)
+        y0, y1 = max(y, 0), min(y + height, cols)
+        if x0 < x1 and y0 < y1:
+            w0, w1 = y0 // WORD_BITS, -(-y1 // WORD_BITS)
+            cells = unpack(self._cells[1 + x0:1 + x1, w0:w1], (w1 - w0) * WORD_BITS)
+            start = y0 - w0 * WORD_BITS
+            out[x0 - x:x1 - x, y0 - y:y1 - y] = cells[:, start:start + y1 - y0]
+        return out
+
+    def _shift_rows(self):
+        """
+        Fill the west and east buffers with every row shifted by one cell, so
+        bit j of west holds the cell to the west of bit j, and so on.
+        """
+        cells, west, east = self._cells, self._west, self._east
+        np.left_shift(cells, _ONE, out=west)
+        np.right_shift(cells, _ONE, out=east)
+        # Carry the cells that cross a word boundary
+        west[:, 1:] |= cells[:, :-1] >> _HIGH_SHIFT
+        east[:, :-1] |= cells[:, 1:] << _HIGH_SHIFT
+        if self.boundary == TORUS:
+            west[:, 0] |= (cells[:, -1] >> self._last_shift) & _ONE
+            east[:, -1] |= (cells[:, 0] & _ONE) << self._last_shift
+
+    def step(self, generations=1):
+        """ Advance the board by the given number of generations """
+        cells = self._cells
+        if generations > 0:
+            self._unpacked = None
+        for _ in range(generations):
+            if self.boundary == TORUS:
+                cells[0] = cells[-2]
+                cells[-1] = cells[1]
+            else:
+                cells[0] = 0
+                cells[-1] = 0
+            self._shift_rows()
+            west, east = self._west, self._east
+
+            # Per row: the west/center/east sum as a 2-bit number (for the
+            # rows above and below) and the west/east sum (for the row itself).
+            ones3 = west ^ cells ^ east
+            twos3 = (west & cells) | (east & (west ^ cells))
+            ones2 = west ^ east
+            twos2 = west & east
+
+            # Add the three rows. The neighbor count is ones + 2 * (number
+            # of set twos bits), and we need ones in {0, 1} with one twos bit.
+            up_ones, down_ones, mid_ones = ones3[:-2], ones3[2:], ones2[1:-1]
+            ones = up_ones ^ down_ones ^ mid_ones
+            carry = (up_ones & down_ones) | (mid_ones & (up_ones ^ down_ones))
+            up_twos, down_twos, mid_twos = twos3[:-2], twos3[2:], twos2[1:-1]
+            pair_a = up_twos ^ down_twos
+            both_a = up_twos & down_twos
+            pair_b = mid_twos ^ carry
+            both_b = mid_twos & carry
+            exactly_one_two = (pair_a ^ pair_b) & ~(both_a | both_b)
+
+            alive = cells[1:-1]
+            new = exactly_one_two & (ones | alive)
+            new[:, -1] &= self._last_mask
+            if self.boundary == FIXED:
+                # The edge cells are frozen
+                new[0] = alive[0]
+                new[-1] = alive[-1]
+                new[1:-1] = (new[1:-1] & ~self._edge_mask) | (alive[1:-1] & self._edge_mask)
+            cells[1:-1] = new
+        self.generation += generations
+        return self.words
@@ -0,0 +1,256 @@
+"""
+Game of Life stepped 2x2 cells at a time through a lookup table.
+
+The next generation of a 2x2 block only depends on the 4x4 square of cells
+around it, so the 16 cells of that square are packed into a 16-bit index
+and the block is looked up in a table of all 65,536 cases. The table is
+worked out once per rule, saved in CACHE_DIR and loaded from there later.
+A step builds the indices of all blocks with a handful of whole-board
+operations on NumPy arrays, so the neighbor counting is shared by four
+cells per lookup. Any two-state range 1 rule is supported. This module does
+not depend on pygame.
+"""
+import os
+
+import numpy as np
+
+from lifecore import BOUNDARIES, FIXED, INFINITE, LIFE_RULE, TORUS, _compile_rule, _freeze_edges
+
+# Where the tables are kept between runs
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gameoflife")
+
+# Tables already loaded, by rule string
+_tables = {}
+
+
+def _rule_of(rule):
+    """ The rules.Rule for a rule string or Rule, B3/S23 included """
+    compiled = _compile_rule(rule)
+    if compiled is None:
+        from rules import parse_rule
+        compiled = parse_rule(LIFE_RULE)
+    if compiled.states != 2 or compiled.radius != 1:
+        raise ValueError(f"A lookup table engine only runs two-state range 1 rules, not {compiled}")
+    return compiled
+
+
+def build_table(rule=None):
+    """
+    Work out the next 2x2 block for every 4x4 square of cells.
+
+    Bit 4 * i + j of an index is cell [i, j] of the square. Entry index of
+    the table is the block of cells [1:3, 1:3] one generation later, as a
+    (65536, 2, 2) bool array.
+    """
+    compiled = _rule_of(rule)
+    indices = np.arange(1 << 16, dtype=np.uint32)
+    squares = ((indices[:, None] >> np.arange(16, dtype=np.uint32)) & 1).astype(np.uint8).reshape(-1, 4, 4)
+    table = np.empty((1 << 16, 2, 2), dtype=bool)
+    for i in range(2):
+        for j in range(2):
+            # Live cells in the 3x3 neighborhood, the cell itself included
+            total = squares[:, i:i + 3, j:j + 3].sum(axis=(1, 2), dtype=np.intp)
+            state = squares[:, i + 1, j + 1]
+            table[:, i, j] = compiled.table[state.astype(np.intp) * (compiled.neighbors + 2) + total]
+    return table
+
+
+def _cache_path(rule, cache_dir):
+    return os.path.join(cache_dir, "lut-" + str(rule).replace("/", "") + ".npy")
+
+
+def load_table(rule=None, cache_dir=CACHE_DIR):
+    """
+    Return the table of a rule, from memory, else from cache_dir, else
+    built and saved there, with the 2x2 cells of each entry packed into
+    one 32-bit number. A cache that cannot be read or written is ignored.
+    """
+    compiled = _rule_of(rule)
+    key = str(compiled)
+    table = _tables.get(key)
+    if table is not None:
+        return table
+    path = _cache_path(compiled, cache_dir) if cache_dir else None
+    if path is not None and os.path.exists(path):
+        try:
+            table = np.load(path)
+        except (OSError, ValueError):
+            table = None
+        if table is not None and (table.shape != (1 << 16, 2, 2) or table.dtype != bool):
+            table = None
+    if table is None:
+        table = build_table(compiled)
+        if path is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.save(path + ".part.npy", table)
+                os.replace(path + ".part.npy", path)
+            except OSError:
+                pass
+    # The four cells of each block as the bytes of one 32-bit number
+    table = np.ascontiguousarray(table).reshape(-1, 4).view(np.uint32).ravel()
+    _tables[key] = table
+    return table
+
+
+class _Stepper:
+    """ The scratch arrays of a step for one board shape """
+
+    def __init__(self, shape):
+        rows, cols = shape
+        # Blocks along each axis, rounding odd sizes up
+        self.blocks = (-(-rows // 2), -(-cols // 2))
+        block_rows, block_cols = self.blocks
+        # The board with a one cell halo, and one more cell past an odd edge
+        self.cells = np.zeros((2 * block_rows + 2, 2 * block_cols + 2), dtype=bool)
+        # Every 4 cells of a row starting at an even column, read as one
+        # little-endian 32-bit word of 0 and 1 bytes
+        self.words = np.ndarray((2 * block_rows + 2, block_cols), dtype="<u4", buffer=self.cells,
+                                strides=(self.cells.strides[0], 2))
+        self.nibbles = np.empty(self.words.shape, dtype=np.uint32)
+        self.row_pairs = np.empty((block_rows + 1, block_cols), dtype=np.uint32)
+        self.shifted = np.empty_like(self.row_pairs)
+        self.index = np.empty(self.blocks, dtype=np.uint32)
+        # The four cells of every block as one 32-bit number, whose low and
+        # high half are the top and bottom two cells
+        self.result = np.empty(self.blocks, dtype=np.uint32)
+        self.out = np.empty((2 * block_rows, 2 * block_cols), dtype=bool)
+
+    def step(self, board, out, boundary, table):
+        rows, cols = board.shape
+        cells = self.cells
+        cells[1:rows + 1, 1:cols + 1] = board
+        if boundary == TORUS:
+            # The halo (and the cells past an odd edge) wrap around
+            extra_rows = cells.shape[0] - rows - 1
+            extra_cols = cells.shape[1] - cols - 1
+            cells[0, 1:cols + 1] = board[-1]
+            cells[rows + 1:, 1:cols + 1] = board[:extra_rows]
+            cells[:, 0] = cells[:, cols]
+            cells[:, cols + 1:] = cells[:, 1:1 + extra_cols]
+        else:
+            cells[0] = False
+            cells[rows + 1:] = False
+            cells[:, 0] = False
+            cells[:, cols + 1:] = False
+
+        # Each row of every block's 4x4 square as a 4-bit number: the
+        # multiplication moves the low bit of each byte of a word next to
+        # each other in bits 21 to 24, without carries
+        block_rows, block_cols = self.blocks
+        nibbles = self.nibbles
+        np.multiply(self.words, np.uint32(0x204081), out=nibbles)
+        np.right_shift(nibbles, 21, out=nibbles)
+        np.bitwise_and(nibbles, 15, out=nibbles)
+        # Two of those rows starting at an even row make 8 bits, and two
+        # of those the 16-bit index
+        row_pairs, shifted, index = self.row_pairs, self.shifted, self.index
+        np.left_shift(nibbles[1::2], 4, out=shifted)
+        np.bitwise_or(nibbles[0::2], shifted, out=row_pairs)
+        np.left_shift(row_pairs[1:], 8, out=shifted[1:])
+        np.bitwise_or(row_pairs[:-1], shifted[1:], out=index)
+
+        np.take(table, index, out=self.result)
+        halves = self.result.view(np.uint16).reshape(block_rows, block_cols, 2)
+        pairs = self.out.view(np.uint16)
+        pairs[0::2] = halves[:, :, 0]
+        pairs[1::2] = halves[:, :, 1]
+        if boundary == FIXED:
+            _freeze_edges(board, self.out[:rows, :cols])
+        out[...] = self.out[:rows, :cols]
+        return out
+
+
+def step_blocks(board, out=None, boundary=FIXED, rule=None):
+    """
+    Return the next generation of board, like lifecore.game_of_life() and
+    with the same arguments, computed through the lookup table. out may be
+    board itself. The infinite boundary treats the cells past the edge as
+    dead.
+    """
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unknown boundary mode: {boundary!r}")
+    table = load_table(rule)
+    if out is None:
+        out = np.empty(board.shape, dtype=bool)
+    return _Stepper(board.shape).step(board, out, boundary, table)
+
+
+class BlockLUT:
+    """
+    Board backend that steps 2x2 blocks through a lookup table.
+
+    It has the same get/set/step/window interface as lifecore.LifeEngine.
+    The fixed and torus boundaries are supported, and any two-state range 1
+    rule.
+    """
+
+    # create_engine() may pass rules other than B3/S23
+    supports_rules = True
+
+    def __init__(self, board, boundary=FIXED, rule=None, cache_dir=CACHE_DIR):
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary mode: {boundary!r}")
+        if boundary == INFINITE:
+            raise ValueError("BlockLUT does not support the infinite boundary")
+        board = np.array(board, dtype=bool)
+        if board.shape[0] < 3 or board.shape[1] < 3:
+            raise ValueError("The board needs at least 3 rows and 3 columns")
+        self.boundary = boundary
+        self.rule = str(_rule_of(rule))
+        self.origin = (0, 0)
+        self.generation = 0
+        self._table = load_table(self.rule, cache_dir)
+        self._board = board
+        self._stepper = _Stepper(board.shape)
+
+    @classmethod
+    def from_array(cls, board, boundary=FIXED):
+        return cls(board, boundary)
+
+    @property
+    def board(self):
+        """ The current generation. The array is reused, so copy it to keep it """
+        return self._board
+
+    @property
+    def shape(self):
+        return self._board.shape
+
+    def get(self, x, y):
+        return bool(self._board[x, y])
+
+    def set(self, x, y, alive):
+        self._board[x, y] = alive
+
+    def clear(self):
+        self._board[...] = False
+
+    def population(self):
+        return int(np.count_nonzero(self._board))
+
+    def to_array(self):
+        return self._board.copy()
+
+    def window(self, x, y, width, height, out=None):
+        """
+        Return the cells in the given rectangle as a bool array.
+        Cells outside the board are dead.
+        """
+        if out is None:
+            out = np.zeros((width, height), dtype=bool)
+        else:
+            out[...] = False
+        rows, cols = self._board.shape
+        x0, x1 = max(x, 0), min(x + width, rows)
+        y0, y1 = max(y, 0), min(y + height, cols)
+        if x0 < x1 and y0 < y1:
+            out[x0 - x:x1 - x, y0 - y:y1 - y] = self._board[x0:x1, y0:y1]
+        return out
+
+    def step(self, generations=1):
+        """ Advance the board by the given number of generations """
+        for _ in range(generations):
+            self._stepper.step(self._board, self._board, self.boundary, self._table)
+        self.generation += generations
+        return self._board
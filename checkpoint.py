@@ -0,0 +1,266 @@
+"""
+Checkpoint files for long runs and large boards.
+
+A checkpoint is a fixed-size header (rule, generation, board size, origin
+and boundary mode) followed by the cells, bit-packed eight to a byte for
+two-state rules or one byte per cell for Generations rules. Files are
+written and read through np.memmap in bands of rows, so neither side needs
+the whole packed board in memory and a board larger than RAM can be paged
+in a window at a time. A Checkpointer writes periodic checkpoints from a
+background thread so the step loop is not held up by the disk.
+This module does not depend on pygame.
+"""
+import os
+import re
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from lifecore import FIXED, LIFE_RULE, Simulation
+
+MAGIC = b"GOLCKPT1"
+
+HEADER = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("bits_per_cell", "<u4"),
+    ("width", "<i8"),
+    ("height", "<i8"),
+    ("generation", "<i8"),
+    ("origin_x", "<i8"),
+    ("origin_y", "<i8"),
+    ("boundary", "S16"),
+    ("rule", "S128"),
+])
+
+# The cells start at this offset; the rest of the header is zero
+HEADER_SIZE = 256
+
+# Rows of the board packed or unpacked at a time
+BAND_ROWS = 1024
+
+# Names of the files written by a Checkpointer
+FILE_PATTERN = re.compile(r"checkpoint-(\d+)\.ckpt$")
+
+# The contents of a checkpoint file
+Checkpoint = namedtuple("Checkpoint", ["generation", "origin", "boundary", "rule", "cells"])
+
+
+def _body_shape(width, height, bits_per_cell):
+    if bits_per_cell == 1:
+        return (width, (height + 7) // 8)
+    return (width, height)
+
+
+def write_checkpoint(path, cells, generation=0, origin=(0, 0), boundary=FIXED, rule=LIFE_RULE):
+    """
+    Write cells (a bool board, or a uint8 board of Generations states) to a
+    checkpoint file. The file is written under a temporary name and moved
+    into place, so a crash never leaves a half-written checkpoint at path.
+    """
+    rule_bytes = str(rule).encode()
+    if len(rule_bytes) > HEADER["rule"].itemsize:
+        raise ValueError(f"The rule {str(rule)!r} is longer than the {HEADER['rule'].itemsize} bytes "
+                         f"a checkpoint header holds")
+    width, height = cells.shape
+    bits_per_cell = 1 if cells.dtype == bool else 8
+    body_shape = _body_shape(width, height, bits_per_cell)
+    temporary = f"{path}.tmp"
+    data = np.memmap(temporary, dtype=np.uint8, mode="w+",
+                     shape=(HEADER_SIZE + body_shape[0] * body_shape[1],))
+    header = data[:HEADER.itemsize].view(HEADER)
+    header["magic"] = MAGIC
+    header["version"] = 1
+    header["bits_per_cell"] = bits_per_cell
+    header["width"] = width
+    header["height"] = height
+    header["generation"] = generation
+    header["origin_x"], header["origin_y"] = origin
+    header["boundary"] = boundary.encode()
+    header["rule"] = rule_bytes
+
+    body = data[HEADER_SIZE:].reshape(body_shape)
+    for start in range(0, width, BAND_ROWS):
+        band = cells[start:start + BAND_ROWS]
+        if bits_per_cell == 1:
+            body[start:start + BAND_ROWS] = np.packbits(band, axis=1, bitorder="little")
+        else:
+            body[start:start + BAND_ROWS] = band
+    data.flush()
+    del data, header, body
+    os.replace(temporary, path)
+
+
+class CheckpointFile:
+    """
+    A checkpoint file opened through np.memmap.
+
+    The header fields are attributes; the cells are only read from disk
+    when window() or load() asks for them.
+    """
+
+    def __init__(self, path):
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._data) < HEADER_SIZE:
+            raise ValueError(f"{path} is not a checkpoint file")
+        header = self._data[:HEADER.itemsize].view(HEADER)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint file")
+        self.bits_per_cell = int(header["bits_per_cell"])
+        self.shape = (int(header["width"]), int(header["height"]))
+        self.generation = int(header["generation"])
+        self.origin = (int(header["origin_x"]), int(header["origin_y"]))
+        self.boundary = header["boundary"].decode()
+        self.rule = header["rule"].decode()
+        body_shape = _body_shape(*self.shape, self.bits_per_cell)
+        if len(self._data) != HEADER_SIZE + body_shape[0] * body_shape[1]:
+            raise ValueError(f"{path} is truncated")
+        self._body = self._data[HEADER_SIZE:].reshape(body_shape)
+
+    @property
+    def dtype(self):
+        return np.dtype(bool) if self.bits_per_cell == 1 else np.dtype(np.uint8)
+
+    def window(self, x, y, width, height):
+        """
+        Return the cells in the given rectangle of the board (board indices,
+        not universe coordinates). Only the pages holding them are read.
+        """
+        x0, x1 = max(x, 0), min(x + width, self.shape[0])
+        y0, y1 = max(y, 0), min(y + height, self.shape[1])
+        out = np.zeros((width, height), dtype=self.dtype)
+        if x0 >= x1 or y0 >= y1:
+            return out
+        if self.bits_per_cell == 1:
+            packed = self._body[x0:x1, y0 // 8:(y1 + 7) // 8]
+            cells = np.unpackbits(packed, axis=1, bitorder="little")
+            cells = cells[:, y0 % 8:y0 % 8 + y1 - y0].view(bool)
+        else:
+            cells = self._body[x0:x1, y0:y1]
+        out[x0 - x:x1 - x, y0 - y:y1 - y] = cells
+        return out
+
+    def load(self, out=None):
+        """ Read the whole board, into out if given (which may itself be a memmap) """
+        width, height = self.shape
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        for start in range(0, width, BAND_ROWS):
+            band = self._body[start:start + BAND_ROWS]
+            if self.bits_per_cell == 1:
+                out[start:start + BAND_ROWS] = np.unpackbits(
+                    band, axis=1, count=height, bitorder="little").view(bool)
+            else:
+                out[start:start + BAND_ROWS] = band
+        return out
+
+    def close(self):
+        self._body = None
+        self._data = None
+
+
+def read_checkpoint(path):
+    """ Read a whole checkpoint file and return a Checkpoint """
+    checkpoint = CheckpointFile(path)
+    try:
+        return Checkpoint(checkpoint.generation, checkpoint.origin, checkpoint.boundary,
+                          checkpoint.rule, checkpoint.load())
+    finally:
+        checkpoint.close()
+
+
+def latest_checkpoint(directory):
+    """ Return the path of the newest checkpoint a Checkpointer wrote to directory, or None """
+    if not os.path.isdir(directory):
+        return None
+    found = [(int(match[1]), name) for name in os.listdir(directory)
+             for match in [FILE_PATTERN.match(name)] if match]
+    if not found:
+        return None
+    return os.path.join(directory, max(found)[1])
+
+
+def resume(path, engine="life"):
+    """ Create a Simulation on the given engine that continues from a checkpoint file """
+    checkpoint = read_checkpoint(path)
+    simulation = Simulation(checkpoint.cells, engine, checkpoint.boundary, checkpoint.rule)
+    if checkpoint.origin != (0, 0):
+        if hasattr(simulation.engine, "load"):
+            simulation.engine.load(checkpoint.cells, *checkpoint.origin)
+        else:
+            simulation.engine.origin = checkpoint.origin
+    simulation.engine.generation = checkpoint.generation
+    return simulation
+
+
+class Checkpointer:
+    """
+    Writes checkpoints of a Simulation to a directory in a background thread.
+
+    save() copies the board on the calling thread (a snapshot) and leaves
+    the packing and writing to a worker thread. If the previous checkpoint
+    is still being written the new one is skipped rather than waited for,
+    and counted in skipped. Only the newest keep checkpoints are kept. The
+    last error of the worker thread, if any, is kept in error.
+    """
+
+    def __init__(self, directory, keep=2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.keep = keep
+        self.skipped = 0
+        self.error = None
+        self._thread = None
+
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def save(self, simulation, wait=False):
+        """
+        Start writing a checkpoint of the simulation. Returns False if it
+        was skipped because the previous one is still being written, unless
+        wait is set, in which case the previous one is waited for, or if the
+        board is too large to copy, which is kept in error.
+        """
+        if self.busy():
+            if not wait:
+                self.skipped += 1
+                return False
+            self.wait()
+        engine = simulation.engine
+        try:
+            snapshot = simulation.snapshot()
+        except MemoryError as error:
+            # A sparse universe (HashLife) can span more cells than fit in memory
+            self.error = error
+            return False
+        rule = getattr(engine, "rule", LIFE_RULE)
+        path = os.path.join(self.directory, f"checkpoint-{snapshot.generation:015d}.ckpt")
+        self._thread = threading.Thread(
+            target=self._write, daemon=True,
+            args=(path, snapshot.cells, snapshot.generation, snapshot.origin, engine.boundary, rule))
+        self._thread.start()
+        if wait:
+            self.wait()
+        return True
+
+    def _write(self, path, cells, generation, origin, boundary, rule):
+        try:
+            write_checkpoint(path, cells, generation, origin, boundary, rule)
+            self._prune()
+        except Exception as error:
+            # Kept for the caller; an exception would only end the thread
+            self.error = error
+
+    def _prune(self):
+        found = sorted((int(match[1]), name) for name in os.listdir(self.directory)
+                       for match in [FILE_PATTERN.match(name)] if match)
+        for _, name in found[:-self.keep]:
+            os.remove(os.path.join(self.directory, name))
+
+    def wait(self):
+        """ Wait for the checkpoint being written, if any """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,212 @@
+"""
+Detecting when a board settles into a still life or an oscillator.
+
+Every generation gets a Zobrist hash: each cell has a random 64-bit key and
+the hash of a board is the XOR of the keys of its live cells. Going from
+one generation to the next only the keys of the cells that changed are
+XORed in, so the hash is cheap to keep up to date. A board whose hash was
+seen p generations earlier has entered a cycle of period p (p = 1 for a
+still life). This module does not depend on pygame.
+"""
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from lifecore import RunStats
+
+# Longest period looked for by default
+DEFAULT_MAX_PERIOD = 64
+
+# A cycle found by a CycleDetector: the generation it began at and its period
+Cycle = namedtuple("Cycle", ["start", "period"])
+
+# Diffing a region of the board costs about as much as diffing this many
+# more cells, so many small regions are diffed as one whole board instead
+REGION_COST = 4096
+
+
+def zobrist_keys(shape, seed=0):
+    """ Return a random 64-bit key for every cell of a board of the given shape """
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 2 ** 64, size=shape, dtype=np.uint64, endpoint=False)
+
+
+def _xor(values):
+    return np.bitwise_xor.reduce(values) if len(values) else np.uint64(0)
+
+
+class CycleDetector:
+    """
+    Looks for cycles of up to max_period generations.
+
+    Call update() with the board after every generation. Engines that know
+    where their cells changed (TiledEngine.changed_regions()) save diffing
+    the whole board. The hashes of the last max_period generations are
+    kept; the first time the board repeats
+    one of them, update() returns the Cycle and keeps returning it until
+    reset(). Hashes are 64 bits, so two different boards are mistaken for
+    each other with negligible probability. Boards of Generations rules
+    (uint8 states) are hashed with the key of a cell multiplied by its state.
+    """
+
+    def __init__(self, max_period=DEFAULT_MAX_PERIOD, seed=0):
+        self.max_period = max_period
+        self.seed = seed
+        self.cycle = None
+        self.hash = None
+        self._keys = None
+        self._previous = None
+        self._origin = None
+        self._generation = None
+        self._seen = {}
+        self._order = deque()
+
+    def reset(self):
+        """ Forget the history, e.g. after the board was edited """
+        self.cycle = None
+        self.hash = None
+        self._previous = None
+        self._seen.clear()
+        self._order.clear()
+
+    def _full_hash(self, board):
+        if board.dtype == bool:
+            return _xor(self._keys[board])
+        live = np.flatnonzero(board)
+        return _xor(self._keys.flat[live] * board.flat[live])
+
+    def _changed_hash(self, board, x=0, y=0):
+        """
+        The hash of board, worked out from the cells that changed since the
+        last update. board may be the part of the board at (x, y); the
+        previous board is brought up to date there.
+        """
+        width, height = board.shape
+        previous = self._previous[x:x + width, y:y + height]
+        keys = self._keys[x:x + width, y:y + height]
+        changed = np.nonzero(board != previous)
+        keys = keys[changed]
+        if board.dtype == bool:
+            self.hash ^= _xor(keys)
+        else:
+            self.hash ^= _xor(keys * previous[changed]) ^ _xor(keys * board[changed])
+        np.copyto(previous, board)
+        return self.hash
+
+    def update(self, board, generation, origin=(0, 0), regions=None):
+        """
+        Record the board at the given generation and return the Cycle it is
+        in, or None if no cycle has been found yet.
+
+        origin is where board[0, 0] is in the universe; when the board is
+        moved or resized (an infinite grid following its pattern) the history
+        starts over. regions optionally lists the (x, y, width, height)
+        rectangles of the board that changed since the generation before;
+        the cells outside them are not looked at. Otherwise, or when a
+        generation was skipped, the whole board is compared.
+        """
+        if self._keys is None or self._keys.shape != board.shape or origin != self._origin:
+            self._keys = zobrist_keys(board.shape, self.seed)
+            self._origin = origin
+            self.reset()
+        if self._previous is None:
+            self.hash = self._full_hash(board)
+            self._previous = board.copy()
+        elif (regions is not None and generation == self._generation + 1
+                and len(regions) * REGION_COST + sum(w * h for _, _, w, h in regions) < board.size):
+            for x, y, width, height in regions:
+                self._changed_hash(board[x:x + width, y:y + height], x, y)
+        else:
+            self._changed_hash(board)
+        self._generation = generation
+
+        if self.cycle is None:
+            seen = self._seen.get(self.hash)
+            if seen is not None and generation - seen <= self.max_period:
+                self.cycle = Cycle(seen, generation - seen)
+        self._seen[self.hash] = generation
+        self._order.append((generation, self.hash))
+        while self._order and self._order[0][0] < generation - self.max_period:
+            old_generation, old_hash = self._order.popleft()
+            if self._seen.get(old_hash) == old_generation:
+                del self._seen[old_hash]
+        return self.cycle
+
+
+class CycleReplay:
+    """
+    Plays a cycle back from recorded frames instead of stepping the engine.
+
+    The engine is stepped through one period once and the given window of it
+    is recorded; after that, advancing the replay costs nothing. sync()
+    brings the engine to the generation on display, generation counter
+    included, before it is used again.
+    """
+
+    def __init__(self, engine, period, window):
+        self.engine = engine
+        self.period = period
+        self.window = tuple(window)
+        self.frames = []
+        for _ in range(period):
+            self.frames.append(engine.window(*window))
+            engine.step()
+        # The engine is back at the state of frames[0], and its generation
+        # too: the steps taken to record the frames are counted by sync()
+        engine.generation -= period
+        self.position = 0
+        self.skipped = 0
+
+    @property
+    def board(self):
+        return self.frames[self.position]
+
+    def advance(self, generations=1):
+        self.skipped += generations
+        self.position = (self.position + generations) % self.period
+
+    def sync(self):
+        """ Step the engine to the frame on display """
+        self.engine.step(self.position)
+        # Whole periods leave the board as it was; only count them
+        self.engine.generation += self.skipped - self.position
+        self.position = 0
+        self.skipped = 0
+
+
+def engine_state(engine):
+    """
+    Return the board of an engine and the universe coordinates of its
+    [0, 0] cell, for hashing. Engines without a board of their own (HashLife)
+    give the bounding box of their live cells.
+    """
+    if hasattr(engine, "board"):
+        return engine.board, engine.origin
+    box = engine.bounding_box()
+    if box is None:
+        return np.zeros((0, 0), dtype=bool), (0, 0)
+    return engine.window(*box), box[:2]
+
+
+def run_until_cycle(simulation, generations, max_period=DEFAULT_MAX_PERIOD):
+    """
+    Advance a Simulation one generation at a time until its board enters a
+    cycle of at most max_period generations, or until the given number of
+    generations have run. Returns (RunStats, Cycle or None).
+    """
+    detector = CycleDetector(max_period)
+    engine = simulation.engine
+    seconds = 0.0
+    ran = 0
+    regions = getattr(engine, "changed_regions", None)
+    while True:
+        board, origin = engine_state(engine)
+        cycle = detector.update(board, engine.generation, origin, regions() if regions else None)
+        if cycle is not None or ran >= generations:
+            break
+        start = time.perf_counter()
+        engine.step()
+        seconds += time.perf_counter() - start
+        ran += 1
+    return RunStats(ran, seconds, simulation.population()), cycle
@@ -1,28 +1,137 @@
 """
-Helper script to prepare the Game of Life for web deployment using Pygbag.
-This allows the game to run on any device with a web browser, including iPhones.
-"""
+Build the self-contained web version of the Game of Life.
+
+The bundle in web_build/ runs on any device with a web browser, including
+iPhones, and needs nothing from the network once it is served:
+
+- a pinned Pyodide runtime and the numpy and pygame-ce wheels, downloaded
+  once into a local cache and served next to the page
+- the game (life.py as main plus GAME_MODULES) in one zip, as bytecode when
+  this Python matches the Python of the runtime; modules are imported from
+  the zip on first use instead of being fetched one by one
+- a service worker that keeps every file of the bundle in the browser's
+  cache, so later visits start offline and without downloads
 
+--check serves the bundle locally, opens it in headless Chromium (needs
+playwright) and fails when the first frame takes longer than the budget.
+
+Usage:
+python deployment_helper.py
+python deployment_helper.py --check --budget 8
+python deployment_helper.py --serve 8000
+"""
+import argparse
+import functools
+import hashlib
+import http.server
+import json
 import os
+import py_compile
 import shutil
-import subprocess
+import sys
+import tempfile
+import threading
+import urllib.request
+import zipfile
+
+# Modules imported by the game that have to be shipped next to main.py
+GAME_MODULES = ["lifecore.py", "bitboard.py", "hashlife.py", "tiled.py", "rules.py", "patternio.py", "scheduler.py", "cycles.py", "viewport.py", "profiler.py", "history.py", "blocklut.py"]
+
+# The runtime, pinned. Bytecode is only shipped when it is built by the same
+# Python version as the runtime's.
+PYODIDE_VERSION = "0.26.4"
+PYODIDE_PYTHON = (3, 12)
+PYODIDE_URL = f"https://cdn.jsdelivr.net/pyodide/v{PYODIDE_VERSION}/full/"
+RUNTIME_FILES = ["pyodide.mjs", "pyodide.asm.js", "pyodide.asm.wasm", "python_stdlib.zip", "pyodide-lock.json"]
+
+# Packages of the runtime the game needs; their dependencies are added from
+# pyodide-lock.json
+PACKAGES = ["numpy", "pygame-ce"]
+
+# Where downloads are kept between builds
+CACHE_DIR = ".pyodide-cache"
+
+# Seconds from navigation to the first frame allowed by --check
+STARTUP_BUDGET = 8.0
+
+TITLE = "Game of Life - iPhone 15 Pro"
 
-# Create the web build directory
-os.makedirs("web_build", exist_ok=True)
 
-# Copy the main game file to the web build directory
-shutil.copy("life.py", "web_build/main.py")
+def fetch(name, cache_dir=CACHE_DIR, sha256=None):
+    """ Return the path of a runtime file in the cache, downloading it first if needed """
+    path = os.path.join(cache_dir, PYODIDE_VERSION, name)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        print(f"Downloading {name}")
+        with urllib.request.urlopen(PYODIDE_URL + name) as response:
+            data = response.read()
+        if sha256 is not None and hashlib.sha256(data).hexdigest() != sha256:
+            raise RuntimeError(f"{name} does not match its checksum in pyodide-lock.json")
+        with open(path + ".part", "wb") as f:
+            f.write(data)
+        os.replace(path + ".part", path)
+    return path
 
-# Create a simple HTML template file
-with open("web_build/index.html", "w") as f:
-    f.write("""
-<!DOCTYPE html>
+
+def package_files(lock, packages=PACKAGES):
+    """ Return the lock entries of the given packages and of everything they depend on """
+    entries = {}
+    pending = list(packages)
+    while pending:
+        name = pending.pop()
+        if name in entries:
+            continue
+        entries[name] = lock["packages"][name]
+        pending.extend(entries[name]["depends"])
+    return list(entries.values())
+
+
+def copy_runtime(out, cache_dir=CACHE_DIR):
+    """ Copy the runtime and the wheels of PACKAGES into out/pyodide; returns the files, relative to out """
+    runtime = os.path.join(out, "pyodide")
+    os.makedirs(runtime, exist_ok=True)
+    files = []
+    for name in RUNTIME_FILES:
+        shutil.copy(fetch(name, cache_dir), os.path.join(runtime, name))
+        files.append("pyodide/" + name)
+    with open(os.path.join(runtime, "pyodide-lock.json")) as f:
+        lock = json.load(f)
+    for entry in package_files(lock):
+        shutil.copy(fetch(entry["file_name"], cache_dir, entry["sha256"]), os.path.join(runtime, entry["file_name"]))
+        files.append("pyodide/" + entry["file_name"])
+    return files
+
+
+def build_game_archive(path):
+    """
+    Write the game to a zip: life.py as main and GAME_MODULES, compiled to
+    bytecode when this Python matches PYODIDE_PYTHON. Returns whether the
+    modules were compiled.
+    """
+    compiled = sys.version_info[:2] == PYODIDE_PYTHON
+    sources = [("life.py", "main")] + [(module, module[:-3]) for module in GAME_MODULES]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive, tempfile.TemporaryDirectory() as scratch:
+        for source, name in sources:
+            if compiled:
+                cfile = os.path.join(scratch, name + ".pyc")
+                # The timestamp is not checked, so the zip is the same on every build
+                py_compile.compile(source, cfile, dfile=name + ".py", doraise=True,
+                                   invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+                archive.write(cfile, name + ".pyc")
+            else:
+                archive.write(source, name + ".py")
+    return compiled
+
+
+PAGE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
-    <meta http-equiv="X-UA-Compatible" content="IE=edge">
     <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
-    <title>Game of Life - iPhone 15 Pro</title>
+    <meta name="apple-mobile-web-app-capable" content="yes">
+    <title>TITLE</title>
+    <link rel="modulepreload" href="pyodide/pyodide.mjs">
+    <link rel="preload" href="game.zip" as="fetch" crossorigin>
     <style>
         body {
             margin: 0;
@@ -34,35 +143,174 @@ with open("web_build/index.html", "w") as f:
         #canvas {
             display: block;
             margin: 0 auto;
+            max-width: 100vw;
+            max-height: 100vh;
             touch-action: manipulation;
         }
     </style>
 </head>
 <body>
-    <!-- Game canvas will be inserted here by Pygbag -->
+    <canvas id="canvas"></canvas>
     <script type="module">
-        import { loadPyodide } from 'https://cdn.jsdelivr.net/pyodide/v0.24.1/full/pyodide.mjs';
-        
+        import { loadPyodide } from "./pyodide/pyodide.mjs";
+
+        if ("serviceWorker" in navigator) {
+            navigator.serviceWorker.register("sw.js");
+        }
+
         async function main() {
-            const pyodide = await loadPyodide();
-            await pyodide.loadPackagesFromImports('main.py');
+            // The game downloads while the runtime starts
+            const game = fetch("game.zip").then((response) => response.arrayBuffer());
+            const pyodide = await loadPyodide({ indexURL: "./pyodide/" });
+            await pyodide.loadPackage(PACKAGES);
+            pyodide.FS.writeFile("/home/pyodide/game.zip", new Uint8Array(await game));
+            pyodide.canvas.setCanvas2D(document.getElementById("canvas"));
             await pyodide.runPythonAsync(`
                 import asyncio
-                from pyodide.http import pyfetch
-                response = await pyfetch("main.py")
-                with open("main.py", "wb") as f:
-                    f.write(await response.bytes())
-                
-                # Load and run the Python code
+                import sys
+                sys.path.insert(0, "/home/pyodide/game.zip")
                 import main
                 asyncio.ensure_future(main.main())
             `);
         }
-        main();
+        main().catch((error) => {
+            window.gameError = String(error);
+            throw error;
+        });
     </script>
 </body>
 </html>
-    """)
+"""
+
+SERVICE_WORKER = """// Keeps the whole bundle in the browser's cache; a new build has a new cache name
+const CACHE = "gameoflife-VERSION";
+const FILES = FILE_LIST;
+
+self.addEventListener("install", (event) => {
+    event.waitUntil(caches.open(CACHE).then((cache) => cache.addAll(FILES)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener("activate", (event) => {
+    event.waitUntil(caches.keys()
+        .then((names) => Promise.all(names.filter((name) => name !== CACHE).map((name) => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+self.addEventListener("fetch", (event) => {
+    event.respondWith(caches.match(event.request, { ignoreSearch: true })
+        .then((cached) => cached || fetch(event.request)));
+});
+"""
+
+
+def write_page(out, files):
+    """ Write index.html and the service worker that caches files and the page itself """
+    with open(os.path.join(out, "index.html"), "w") as f:
+        f.write(PAGE.replace("TITLE", TITLE).replace("PACKAGES", json.dumps(PACKAGES)))
+    files = ["./", "index.html"] + files
+    digest = hashlib.sha256()
+    for name in files[1:]:
+        with open(os.path.join(out, name), "rb") as f:
+            digest.update(f.read())
+    with open(os.path.join(out, "sw.js"), "w") as f:
+        f.write(SERVICE_WORKER.replace("VERSION", digest.hexdigest()[:16])
+                .replace("FILE_LIST", json.dumps(files)))
+
+
+def build(out="web_build", cache_dir=CACHE_DIR):
+    """ Build the bundle in out, replacing what was there """
+    if os.path.isdir(out):
+        shutil.rmtree(out)
+    os.makedirs(out)
+    files = copy_runtime(out, cache_dir)
+    compiled = build_game_archive(os.path.join(out, "game.zip"))
+    files.append("game.zip")
+    write_page(out, files)
+    if not compiled:
+        print(f"Python {sys.version_info[0]}.{sys.version_info[1]} cannot compile for the runtime's "
+              f"Python {PYODIDE_PYTHON[0]}.{PYODIDE_PYTHON[1]}; the game is shipped as source")
+    size = sum(os.path.getsize(os.path.join(out, name)) for name in files)
+    print(f"Web bundle written to {out}/ ({size / 2 ** 20:.1f} MB)")
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+    """ Serves the bundle with the types browsers insist on for modules and WebAssembly """
+
+    extensions_map = {**http.server.SimpleHTTPRequestHandler.extensions_map,
+                      ".mjs": "text/javascript", ".js": "text/javascript",
+                      ".wasm": "application/wasm", ".json": "application/json", ".zip": "application/zip"}
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, port=0):
+    """ Serve directory on localhost in a background thread and return the server; port 0 picks a free one """
+    handler = functools.partial(_Handler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure_startup(url, timeout=60.0):
+    """
+    Open url in headless Chromium twice, the second time with the service
+    worker's cache, and return the seconds from navigation to the first
+    frame of each visit. The game marks its first frame in window.gameFirstFrame.
+    """
+    from playwright.sync_api import sync_playwright
+
+    times = []
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        page = browser.new_page()
+        errors = []
+        page.on("pageerror", lambda error: errors.append(str(error)))
+        for visit in range(2):
+            if visit:
+                page.evaluate("navigator.serviceWorker.ready.then(() => true)")
+                page.reload()
+            else:
+                page.goto(url)
+            page.wait_for_function("() => window.gameFirstFrame !== undefined || window.gameError",
+                                   timeout=timeout * 1000)
+            error = page.evaluate("window.gameError") or (errors[0] if errors else None)
+            if error:
+                raise RuntimeError("The page failed to start: " + error)
+            times.append(page.evaluate("window.gameFirstFrame") / 1000)
+        browser.close()
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the web version of the Game of Life")
+    parser.add_argument("--out", default="web_build", help="directory to write the bundle to")
+    parser.add_argument("--cache", default=CACHE_DIR, help="directory to keep downloads in")
+    parser.add_argument("--check", action="store_true",
+                        help="fail when the first frame takes longer than --budget seconds")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="startup-time budget in seconds")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="serve the bundle on PORT after building")
+    args = parser.parse_args(argv)
+
+    build(args.out, args.cache)
+    if args.check:
+        server = serve(args.out)
+        try:
+            cold, warm = measure_startup(f"http://localhost:{server.server_address[1]}/",
+                                         timeout=max(args.budget * 4, 30))
+        finally:
+            server.shutdown()
+        print(f"First frame after {cold:.2f} s, {warm:.2f} s from the cache (budget {args.budget:.2f} s)")
+        if cold > args.budget:
+            sys.exit(f"Startup took {cold:.2f} s, over the budget of {args.budget:.2f} s")
+    if args.serve is not None:
+        server = serve(args.out, args.serve)
+        print(f"Serving at http://localhost:{args.serve}/ (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+
 
-print("Web deployment files created in the 'web_build' directory")
-print("To build and run the web version: pygbag --port 8000 web_build")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
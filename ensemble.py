@@ -0,0 +1,307 @@
+"""
+Evolving many small, independent boards at once.
+
+An Ensemble keeps N boards in one (N, width, height) array, indexed like a
+board as [i, x, y], and steps all of them with a handful of whole-array
+operations, so the Python overhead of a step is paid once for the whole
+batch instead of once per board. Each board is hashed every generation and
+the hashes of the last max_period generations are kept; a board whose hash
+repeats has settled into a still life or an oscillator. Settled boards are
+recorded and compacted out of the batch, so the remaining work shrinks as
+the soups die down. This module does not depend on pygame.
+
+Usage (soup search and throughput against stepping boards one at a time):
+python ensemble.py --boards 10000 --size 32 --generations 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from lifecore import BOUNDARIES, FIXED, LIFE_RULE, TORUS, _compile_rule, game_of_life
+
+# Longest period looked for by default
+DEFAULT_MAX_PERIOD = 64
+
+# Finished boards are compacted out once they are this fraction of the batch
+COMPACT_FRACTION = 0.125
+
+# Per-board results returned by Ensemble.summary(). lifespan is the
+# generation at which the board entered its cycle and period the length of
+# the cycle (1 for still lifes and dead boards); boards that had not settled
+# when the run stopped have period 0 and the number of generations run as
+# lifespan.
+SUMMARY = np.dtype([
+    ("index", np.int64),
+    ("initial_population", np.int64),
+    ("population", np.int64),
+    ("peak_population", np.int64),
+    ("lifespan", np.int64),
+    ("period", np.int64),
+])
+
+
+def random_boards(count, shape, density=0.5, seed=None):
+    """ Return count random bool boards of the given shape as one (count, width, height) array """
+    return np.random.default_rng(seed).random((count, *shape)) < density
+
+
+def _mix(words, keys):
+    """ Hash each board from its cells read as 64-bit words """
+    mixed = words * keys
+    mixed ^= mixed >> np.uint64(29)
+    mixed *= np.uint64(0xBF58476D1CE4E5B9)
+    mixed ^= mixed >> np.uint64(32)
+    return mixed.sum(axis=(1, 2), dtype=np.uint64)
+
+
+class Ensemble:
+    """
+    A batch of boards of the same shape, stepped together.
+
+    boards is a (N, width, height) array: bool boards, or uint8 states for
+    Generations rules. boundary is FIXED or TORUS (INFINITE treats the cells
+    past the edge as dead, as game_of_life() does), and rule any range 1
+    rule understood by the rules module.
+    """
+
+    def __init__(self, boards, boundary=TORUS, rule=None, max_period=DEFAULT_MAX_PERIOD):
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary mode: {boundary!r}")
+        count, width, height = boards.shape
+        if width < 3 or height < 3:
+            raise ValueError("The boards need at least 3 rows and 3 columns")
+        self._rule = _compile_rule(rule)
+        if self._rule is not None and self._rule.radius != 1:
+            raise ValueError("An ensemble only runs range 1 rules")
+        self.rule = str(self._rule) if self._rule is not None else LIFE_RULE
+        self.boundary = boundary
+        self.max_period = max_period
+        self.generation = 0
+        # Board-generations computed so far, finished boards not yet
+        # compacted out included
+        self.stepped = 0
+        dtype = self._rule.dtype if self._rule is not None else np.dtype(bool)
+        # The boards are stored with their height padded to whole 64-bit
+        # words so that they can be hashed without copying; the padding is
+        # always dead.
+        padded_height = -(-height // 8) * 8
+        self._height = height
+        self._front = np.zeros((count, width, padded_height), dtype=dtype)
+        self._front[:, :, :height] = boards
+        self._back = np.zeros_like(self._front)
+        self._keys = np.random.default_rng(0).integers(
+            1, 2 ** 64, size=(width, padded_height // 8), dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._indices = np.arange(count)
+        self._history = np.zeros((count, max_period), dtype=np.uint64)
+        self._finished = np.zeros(count, dtype=bool)
+        self._allocate(count)
+
+        self._results = np.zeros(count, dtype=SUMMARY)
+        self._results["index"] = self._indices
+        self._results["initial_population"] = self.population()
+        self._peak = self._results["initial_population"].copy()
+        self._check()
+
+    def _allocate(self, count):
+        """ Allocate the scratch arrays for a batch of count boards """
+        width, height = self._front.shape[1], self._height
+        self._padded = np.zeros((count, width + 2, height + 2), dtype=np.uint8)
+        self._vertical = np.empty((count, width, height + 2), dtype=np.uint8)
+        self._totals = np.empty((count, width, height), dtype=np.uint8)
+        self._mask = np.empty((count, width, height), dtype=bool)
+        self._index = np.empty((count, width, height), dtype=np.intp) if self._rule else None
+
+    @property
+    def boards(self):
+        """ The boards in the batch as a (count, width, height) view; settled boards leave at the next compaction """
+        return self._front[:, :, :self._height]
+
+    @property
+    def running(self):
+        """ The number of boards that have not settled yet """
+        return len(self._indices) - np.count_nonzero(self._finished)
+
+    def population(self):
+        """ The number of occupied cells of each board still in the batch """
+        return np.count_nonzero(self._front, axis=(1, 2))
+
+    def step(self, generations=1):
+        """ Advance every board by the given number of generations """
+        for _ in range(generations):
+            if not len(self._indices):
+                break
+            self._step()
+            self.stepped += len(self._indices)
+            self.generation += 1
+            self._check()
+
+    def _step(self):
+        board = self.boards
+        out = self._back[:, :, :self._height]
+        padded = self._padded
+        cells = padded[:, 1:-1, 1:-1]
+        if self._rule is not None and self._rule.states > 2:
+            np.equal(board, 1, out=cells.view(bool))
+        else:
+            cells[...] = board
+        if self.boundary == TORUS:
+            padded[:, 0, 1:-1] = cells[:, -1]
+            padded[:, -1, 1:-1] = cells[:, 0]
+            padded[:, :, 0] = padded[:, :, -2]
+            padded[:, :, -1] = padded[:, :, 1]
+
+        # 3x3 totals, the center cell included, in two passes
+        vertical = self._vertical
+        np.add(padded[:, :-2], padded[:, 1:-1], out=vertical)
+        np.add(vertical, padded[:, 2:], out=vertical)
+        totals = self._totals
+        np.add(vertical[:, :, :-2], vertical[:, :, 1:-1], out=totals)
+        np.add(totals, vertical[:, :, 2:], out=totals)
+
+        if self._rule is None:
+            # Alive next generation: a total of 3, or alive with a total of 4
+            np.equal(totals, 4, out=self._mask)
+            np.logical_and(self._mask, board, out=self._mask)
+            np.equal(totals, 3, out=out)
+            np.logical_or(out, self._mask, out=out)
+        else:
+            index = self._index
+            np.multiply(board.view(np.uint8), np.intp(self._rule.neighbors + 2), out=index)
+            np.add(index, totals, out=index)
+            np.take(self._rule.table, index, out=out, mode="clip")
+        if self.boundary == FIXED:
+            out[:, 0] = board[:, 0]
+            out[:, -1] = board[:, -1]
+            out[:, :, 0] = board[:, :, 0]
+            out[:, :, -1] = board[:, :, -1]
+        self._front, self._back = self._back, self._front
+
+    def _hash(self):
+        words = self._front.view(np.uint64)
+        return _mix(words, self._keys)
+
+    def _check(self):
+        """ Record the boards that have entered a cycle and compact the batch """
+        population = self.population()
+        np.maximum(self._peak, population, out=self._peak)
+        hashes = self._hash()
+        # The slot of generation g is g % max_period; the period a slot
+        # stands for is how many generations ago it was written
+        seen = min(self.generation, self.max_period)
+        slots = (self.generation - np.arange(1, seen + 1)) % self.max_period
+        matches = self._history[:, slots] == hashes[:, None]
+        settled = matches.any(axis=1) & ~self._finished
+        if settled.any():
+            rows = np.flatnonzero(settled)
+            period = np.argmax(matches[rows], axis=1) + 1
+            results = self._results[self._indices[rows]]
+            results["population"] = population[rows]
+            results["peak_population"] = self._peak[rows]
+            results["lifespan"] = self.generation - period
+            results["period"] = period
+            self._results[self._indices[rows]] = results
+            self._finished[rows] = True
+        self._history[:, self.generation % self.max_period] = hashes
+
+        finished = np.count_nonzero(self._finished)
+        if finished and finished >= COMPACT_FRACTION * len(self._indices):
+            self._compact()
+
+    def _compact(self):
+        """ Drop the finished boards from the batch """
+        keep = np.flatnonzero(~self._finished)
+        self._front = self._front[keep]
+        self._back = np.zeros_like(self._front)
+        self._indices = self._indices[keep]
+        self._history = self._history[keep]
+        self._peak = self._peak[keep]
+        self._finished = self._finished[keep]
+        self._allocate(len(keep))
+
+    def summary(self):
+        """
+        Return the SUMMARY of every board, in the order they were given.
+        Boards still running are reported as they are now.
+        """
+        results = self._results.copy()
+        running = np.flatnonzero(~self._finished)
+        rows = self._indices[running]
+        results["population"][rows] = self.population()[running]
+        results["peak_population"][rows] = self._peak[running]
+        results["lifespan"][rows] = self.generation
+        results["period"][rows] = 0
+        return results
+
+    def run(self, generations):
+        """
+        Step until every board has settled or the given number of
+        generations have run, and return the summary()
+        """
+        self.step(generations - self.generation)
+        return self.summary()
+
+
+def throughput_benchmark(count=1000, size=32, generations=200, density=0.5, boundary=TORUS):
+    """
+    Time stepping count random size x size boards as an Ensemble, cycle
+    detection included, and one at a time with game_of_life(). Returns
+    (ensemble, one at a time) in board-generations per second.
+    """
+    boards = random_boards(count, (size, size), density, seed=0)
+    start = time.perf_counter()
+    ensemble = Ensemble(boards, boundary)
+    ensemble.step(generations)
+    batched = ensemble.stepped / (time.perf_counter() - start)
+
+    single = max(1, count // 20)
+    boards = list(boards[:single])
+    start = time.perf_counter()
+    for board in boards:
+        out = np.empty_like(board)
+        for _ in range(generations):
+            game_of_life(board, out, boundary)
+            board, out = out, board
+    one_at_a_time = single * generations / (time.perf_counter() - start)
+    return batched, one_at_a_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an ensemble of random soups until they settle")
+    parser.add_argument("--boards", type=int, default=10000, help="number of boards")
+    parser.add_argument("--size", type=int, default=32, help="width and height of each board")
+    parser.add_argument("--generations", type=int, default=2000, help="most generations to run")
+    parser.add_argument("--density", type=float, default=0.5, help="fraction of live cells in the soups")
+    parser.add_argument("--boundary", default=TORUS, choices=BOUNDARIES,
+                        help="what happens at the edge of the boards")
+    parser.add_argument("--rule", default=None, help="rule string or name (range 1 rules only)")
+    parser.add_argument("--max-period", type=int, default=DEFAULT_MAX_PERIOD,
+                        help="longest oscillator period looked for")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the soups")
+    args = parser.parse_args(argv)
+
+    boards = random_boards(args.boards, (args.size, args.size), args.density, args.seed)
+    start = time.perf_counter()
+    ensemble = Ensemble(boards, args.boundary, args.rule, args.max_period)
+    summary = ensemble.run(args.generations)
+    seconds = time.perf_counter() - start
+    print(f"{args.boards} {args.size}x{args.size} boards, rule {ensemble.rule}, {args.boundary} boundary: "
+          f"{seconds:.2f} s, {ensemble.stepped / seconds:,.0f} board-generations/s")
+
+    settled = summary[summary["period"] > 0]
+    print(f"{len(settled)} settled, {args.boards - len(settled)} still running after "
+          f"{ensemble.generation} generations")
+    if len(settled):
+        print(f"lifespan: median {np.median(settled['lifespan']):.0f}, "
+              f"longest {settled['lifespan'].max()} (board {settled['index'][settled['lifespan'].argmax()]})")
+        periods, counts = np.unique(settled["period"], return_counts=True)
+        print("periods: " + ", ".join(f"{period}: {count}" for period, count in zip(periods, counts)))
+
+    batched, one_at_a_time = throughput_benchmark(min(args.boards, 1000), args.size,
+                                                  boundary=args.boundary)
+    print(f"throughput: {batched:,.0f} board-generations/s batched, "
+          f"{one_at_a_time:,.0f} one at a time ({batched / one_at_a_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+Hashlife engine for huge patterns and very long runs.
+
+The universe is a quadtree of canonical nodes: every distinct block of cells
+exists once, and the future of a block is memoized on first use. Repeating
+structure (guns, breeders, still lifes) is therefore only computed once, and
+a single call can advance the universe by 2^k generations.
+This module does not depend on pygame.
+"""
+import numpy as np
+
+from lifecore import INFINITE
+
+# Number of canonical nodes kept before the cache is garbage collected
+DEFAULT_MAX_NODES = 500_000
+
+# Nodes of this level and up check the size of the node table between the
+# sub-steps of a jump, so a single large jump stays within max_nodes
+_COLLECT_LEVEL = 8
+
+
+class Node:
+    """
+    A 2^level x 2^level block of cells.
+
+    Level 0 nodes are single cells. Larger nodes are split into four
+    quadrants: nw holds the low x, low y corner, ne the low x, high y corner,
+    sw the high x, low y corner and se the high x, high y corner.
+    Nodes are canonical, so they are compared by identity.
+    """
+    __slots__ = ("level", "nw", "ne", "sw", "se", "population")
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+
+DEAD = Node(0, None, None, None, None, 0)
+ALIVE = Node(0, None, None, None, None, 1)
+
+
+class HashLife:
+    """
+    Quadtree Game of Life universe with memoized, canonical nodes.
+
+    It has the same get/set/step/window interface as lifecore.LifeEngine.
+    The universe is unbounded, so only the infinite boundary is supported.
+    Memory is bounded by max_nodes: once the node table grows past it, every
+    node that is not part of the current universe is dropped together with
+    the memoized results.
+    """
+
+    def __init__(self, board=None, boundary=INFINITE, max_nodes=DEFAULT_MAX_NODES):
+        if boundary != INFINITE:
+            raise ValueError("HashLife only supports the infinite boundary")
+        self.boundary = boundary
+        self.max_nodes = max_nodes
+        self.generation = 0
+        self._nodes = {}
+        self._results = {}
+        self._empty = [DEAD]
+        self._level2 = {}
+        # Operands of the jumps in progress, kept by collect()
+        self._pinned = []
+        self._collect_at = max_nodes
+        self.clear()
+        if board is not None:
+            self.load(board)
+
+    # Node construction
+
+    def _join(self, nw, ne, sw, se):
+        """ Return the canonical node with the given quadrants """
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(nw.level + 1, nw, ne, sw, se,
+                        nw.population + ne.population + sw.population + se.population)
+            self._nodes[key] = node
+        return node
+
+    def _empty_node(self, level):
+        while len(self._empty) <= level:
+            smaller = self._empty[-1]
+            self._empty.append(self._join(smaller, smaller, smaller, smaller))
+        return self._empty[level]
+
+    def _from_index(self, index):
+        """
+        Return the level 2 node for a 4x4 block. Bit 4 * x + y of index holds
+        cell (x, y) of the block.
+        """
+        node = self._level2.get(index)
+        if node is None:
+            cells = [ALIVE if index >> bit & 1 else DEAD for bit in range(16)]
+            quads = []
+            for x, y in ((0, 0), (0, 2), (2, 0), (2, 2)):
+                corner = 4 * x + y
+                quads.append(self._join(cells[corner], cells[corner + 1],
+                                        cells[corner + 4], cells[corner + 5]))
+            node = self._join(*quads)
+            self._level2[index] = node
+        return node
+
+    def _expand(self):
+        """ Wrap the root in a border of empty cells, doubling its size """
+        root = self.root
+        border = self._empty_node(root.level - 1)
+        self.root = self._join(self._join(border, border, border, root.nw),
+                               self._join(border, border, root.ne, border),
+                               self._join(border, root.sw, border, border),
+                               self._join(root.se, border, border, border))
+        offset = 1 << (root.level - 1)
+        self.origin = (self.origin[0] - offset, self.origin[1] - offset)
+
+    def _centered(self):
+        """ True if every live cell of the root is in its central half """
+        root = self.root
+        inner = (root.nw.se.population + root.ne.sw.population +
+                 root.sw.ne.population + root.se.nw.population)
+        return inner == root.population
+
+    def _crop(self):
+        """ Drop empty borders from the root while keeping it at least 8x8 """
+        while self.root.level > 3 and self._centered():
+            root = self.root
+            self.root = self._join(root.nw.se, root.ne.sw, root.sw.ne, root.se.nw)
+            offset = 1 << (root.level - 2)
+            self.origin = (self.origin[0] + offset, self.origin[1] + offset)
+
+    # Evolution
+
+    def _life_4x4(self, node):
+        """ Return the center 2x2 of a level 2 node one generation later """
+        cells = [[0] * 4 for _ in range(4)]
+        for qx, qy, quad in ((0, 0, node.nw), (0, 2, node.ne), (2, 0, node.sw), (2, 2, node.se)):
+            cells[qx][qy] = quad.nw.population
+            cells[qx][qy + 1] = quad.ne.population
+            cells[qx + 1][qy] = quad.sw.population
+            cells[qx + 1][qy + 1] = quad.se.population
+        result = []
+        for x, y in ((1, 1), (1, 2), (2, 1), (2, 2)):
+            total = sum(cells[i][j] for i in range(x - 1, x + 2) for j in range(y - 1, y + 2))
+            alive = total == 3 or (total == 4 and cells[x][y])
+            result.append(ALIVE if alive else DEAD)
+        return self._join(*result)
+
+    def _successor(self, node, j):
+        """
+        Return the center half of node (one level smaller) advanced by 2^j
+        generations, where j is at most node.level - 2.
+        """
+        if node.population == 0:
+            return node.nw
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+        if node.level == 2:
+            result = self._life_4x4(node)
+        else:
+            join = self._join
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # Nine overlapping sub-blocks, each advanced by 2^j (or, for a
+            # full-speed step, by half of that, twice)
+            blocks = (nw, join(nw.ne, ne.nw, nw.se, ne.sw), ne,
+                      join(nw.sw, nw.se, sw.nw, sw.ne), join(nw.se, ne.sw, sw.ne, se.nw),
+                      join(ne.sw, ne.se, se.nw, se.ne), sw, join(sw.ne, se.nw, sw.se, se.sw), se)
+            child_j = j if j < node.level - 2 else j - 1
+            # Above _COLLECT_LEVEL the table may be collected between the
+            # sub-steps; their operands and results stay pinned until the
+            # result is built
+            pin = node.level >= _COLLECT_LEVEL
+            pinned = len(self._pinned)
+            c1, c2, c3, c4, c5, c6, c7, c8, c9 = self._successors(blocks, child_j, pin)
+            if j < node.level - 2:
+                result = join(join(c1.se, c2.sw, c4.ne, c5.nw),
+                              join(c2.se, c3.sw, c5.ne, c6.nw),
+                              join(c4.se, c5.sw, c7.ne, c8.nw),
+                              join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                result = join(*self._successors((join(c1, c2, c4, c5), join(c2, c3, c5, c6),
+                                                 join(c4, c5, c7, c8), join(c5, c6, c8, c9)), child_j, pin))
+            del self._pinned[pinned:]
+        self._results[key] = result
+        return result
+
+    def _successors(self, blocks, j, pin):
+        """
+        Return the successors of blocks advanced by 2^j generations. With
+        pin, the table is collected between them when full, and blocks and
+        the successors are added to the pinned operands; the caller unpins
+        them.
+        """
+        if not pin:
+            return [self._successor(block, j) for block in blocks]
+        done = []
+        self._pinned.append((blocks, done))
+        for block in blocks:
+            done.append(self._successor(block, j))
+            self._collect_if_full()
+        return done
+
+    def _advance(self, j):
+        """ Advance the universe by 2^j generations """
+        while self.root.level < j + 2 or not self._centered():
+            self._expand()
+        self._expand()
+        root = self.root
+        self.root = self._successor(root, j)
+        offset = 1 << (root.level - 2)
+        self.origin = (self.origin[0] + offset, self.origin[1] + offset)
+        self._crop()
+
+    def step(self, generations=1):
+        """
+        Advance the universe by the given number of generations.
+
+        The count is split into powers of two, so step(2 ** k) is a single
+        jump however large k is. The node table is collected between jumps
+        and, during large jumps, between their sub-steps.
+        """
+        remaining = generations
+        j = 0
+        while remaining:
+            if remaining & 1:
+                self.collect()
+                self._advance(j)
+            remaining >>= 1
+            j += 1
+        self.generation += generations
+        return self.root
+
+    def _collect_if_full(self):
+        if len(self._nodes) > self._collect_at:
+            self.collect()
+
+    def collect(self, force=False):
+        """
+        Drop the memoized results and every node that is not part of the
+        current universe (or an operand of a jump in progress), if the node
+        table has outgrown max_nodes.
+        """
+        if not force and len(self._nodes) <= self._collect_at:
+            return
+        self._results.clear()
+        self._level2.clear()
+        nodes = {}
+        pending = [self.root] + self._empty[1:]
+        for blocks, done in self._pinned:
+            pending.extend(blocks)
+            pending.extend(done)
+        while pending:
+            node = pending.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key not in nodes:
+                nodes[key] = node
+                pending.extend(key)
+        self._nodes = nodes
+        # A universe that needs more than max_nodes by itself would
+        # otherwise be collected over and over
+        self._collect_at = max(self.max_nodes, 2 * len(nodes))
+
+    # Cell access
+
+    @property
+    def shape(self):
+        size = 1 << self.root.level
+        return (size, size)
+
+    def clear(self):
+        self.root = self._empty_node(3)
+        self.origin = (0, 0)
+
+    def population(self):
+        return self.root.population
+
+    def _contains(self, x, y):
+        size = 1 << self.root.level
+        ox, oy = self.origin
+        return ox <= x < ox + size and oy <= y < oy + size
+
+    def get(self, x, y):
+        if not self._contains(x, y):
+            return False
+        node = self.root
+        x -= self.origin[0]
+        y -= self.origin[1]
+        while node.level > 0:
+            half = 1 << (node.level - 1)
+            if x < half:
+                node = node.nw if y < half else node.ne
+            else:
+                node = node.sw if y < half else node.se
+            x %= half
+            y %= half
+        return node is ALIVE
+
+    def _set(self, node, x, y, cell):
+        if node.level == 0:
+            return cell
+        half = 1 << (node.level - 1)
+        nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+        if x < half:
+            if y < half:
+                nw = self._set(nw, x, y, cell)
+            else:
+                ne = self._set(ne, x, y - half, cell)
+        elif y < half:
+            sw = self._set(sw, x - half, y, cell)
+        else:
+            se = self._set(se, x - half, y - half, cell)
+        return self._join(nw, ne, sw, se)
+
+    def set(self, x, y, alive):
+        if not self._contains(x, y):
+            if not alive:
+                return
+            while not self._contains(x, y):
+                self._expand()
+        self.root = self._set(self.root, x - self.origin[0], y - self.origin[1],
+                              ALIVE if alive else DEAD)
+
+    # Conversion to and from arrays
+
+    def load(self, board, x=0, y=0):
+        """
+        Replace the universe with the cells of a 2D bool array whose
+        [0, 0] cell is placed at (x, y).
+        """
+        board = np.asarray(board, dtype=bool)
+        rows, cols = board.shape
+        level = max(3, int(max(rows, cols) - 1).bit_length())
+        size = 1 << level
+        padded = np.zeros((size, size), dtype=bool)
+        padded[:rows, :cols] = board
+
+        # Turn every 4x4 block into a 16-bit index, then into a level 2 node
+        blocks = padded.reshape(size // 4, 4, size // 4, 4).transpose(0, 2, 1, 3)
+        weights = (1 << np.arange(16, dtype=np.uint32)).reshape(4, 4)
+        indices = (blocks * weights).sum(axis=(2, 3))
+        unique, inverse = np.unique(indices, return_inverse=True)
+        table = np.empty(len(unique), dtype=object)
+        table[:] = [self._from_index(int(index)) for index in unique]
+        grid = table[inverse.reshape(-1)].reshape(indices.shape)
+
+        # Join groups of four nodes until a single root is left
+        while grid.shape[0] > 1:
+            half = grid.shape[0] // 2
+            joined = np.empty((half, half), dtype=object)
+            for i in range(half):
+                for j in range(half):
+                    joined[i, j] = self._join(grid[2 * i, 2 * j], grid[2 * i, 2 * j + 1],
+                                              grid[2 * i + 1, 2 * j], grid[2 * i + 1, 2 * j + 1])
+            grid = joined
+        self.root = grid[0, 0]
+        self.origin = (x, y)
+
+    @classmethod
+    def from_array(cls, board, boundary=INFINITE):
+        return cls(board, boundary)
+
+    def _edge(self, node, axis, last, memo):
+        """
+        Return the offset from node's corner of its first (or, with last, its
+        last) live cell along axis 0 (x) or 1 (y). node must have live cells.
+        Only the quadrants on that side are searched, and each node once.
+        """
+        if node.level == 0:
+            return 0
+        offset = memo.get(node)
+        if offset is None:
+            half = 1 << (node.level - 1)
+            if axis == 0:
+                low, high = (node.nw, node.ne), (node.sw, node.se)
+            else:
+                low, high = (node.nw, node.sw), (node.ne, node.se)
+            sides = ((half, high), (0, low)) if last else ((0, low), (half, high))
+            pick = max if last else min
+            for base, quads in sides:
+                live = [quad for quad in quads if quad.population]
+                if live:
+                    offset = base + pick(self._edge(quad, axis, last, memo) for quad in live)
+                    break
+            memo[node] = offset
+        return offset
+
+    def bounding_box(self):
+        """ Return (x, y, width, height) of the live cells, or None if there are none """
+        root = self.root
+        if root.population == 0:
+            return None
+        x0, x1, y0, y1 = (self._edge(root, axis, last, {}) for axis in (0, 1) for last in (False, True))
+        return (self.origin[0] + x0, self.origin[1] + y0, x1 - x0 + 1, y1 - y0 + 1)
+
+    def to_array(self):
+        """ Return the live cells' bounding box as a bool array """
+        box = self.bounding_box()
+        if box is None:
+            return np.zeros((0, 0), dtype=bool)
+        return self.window(*box)
+
+    def _paint(self, node, nx, ny, out, x, y):
+        """ Copy the live cells of node, whose corner is at (nx, ny), into out """
+        if node.population == 0:
+            return
+        size = 1 << node.level
+        width, height = out.shape
+        if nx >= x + width or ny >= y + height or nx + size <= x or ny + size <= y:
+            return
+        if node.level == 0:
+            out[nx - x, ny - y] = True
+            return
+        half = size >> 1
+        self._paint(node.nw, nx, ny, out, x, y)
+        self._paint(node.ne, nx, ny + half, out, x, y)
+        self._paint(node.sw, nx + half, ny, out, x, y)
+        self._paint(node.se, nx + half, ny + half, out, x, y)
+
+    def window(self, x, y, width, height, out=None):
+        """
+        Return the cells of the universe in the given rectangle as a bool array
+        """
+        if out is None:
+            out = np.zeros((width, height), dtype=bool)
+        else:
+            out[...] = False
+        self._paint(self.root, self.origin[0], self.origin[1], out, x, y)
+        return out
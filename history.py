@@ -0,0 +1,239 @@
+"""
+Undo, redo and scrubbing back through generations.
+
+A History keeps the board as it is now and, for every generation stepped
+and every edit, only what changed: the cells that flipped, as a list of
+indices when few did or as a bit-packed XOR mask when many did. Applying a
+change is an XOR, so the same record takes the board both backwards and
+forwards. Every keyframe_interval records the whole board is kept as well,
+so long jumps start from the nearest keyframe instead of replaying every
+change in between. The oldest records are dropped to stay within a memory
+budget. This module does not depend on pygame.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Kinds of records
+STEP = "step"  # one or more generations stepped
+EDIT = "edit"  # cells drawn, erased, cleared or loaded
+
+# Bytes of records and keyframes kept by default
+DEFAULT_BUDGET = 32 * 2 ** 20
+
+# Records between keyframes
+KEYFRAME_INTERVAL = 256
+
+# What changed between two boards. before and after are the generations on
+# either side. Sparse records hold the flat indices of the changed cells in
+# data (and, on uint8 boards, the XOR of their values in values); dense
+# records hold the whole XOR mask, bit-packed for bool boards.
+_Change = namedtuple("_Change", ["kind", "before", "after", "sparse", "data", "values", "nbytes"])
+
+# Rough cost of a record besides its arrays
+_OVERHEAD = 200
+
+
+class History:
+    """
+    The history of one board.
+
+    reset() starts it from a board; record() is called with the board after
+    every generation or edit. undo() and redo() move back and forth by a
+    whole edit or a whole run of generations, rewind() and forward() by
+    single records. After a move, board, generation and origin describe
+    the state to continue from; record() then drops the records that could
+    have been redone.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET, keyframe_interval=KEYFRAME_INTERVAL):
+        self.budget = budget
+        self.keyframe_interval = keyframe_interval
+        self.board = None
+        self.generation = 0
+        self.origin = (0, 0)
+        self.nbytes = 0
+        self._records = []
+        # Record positions count every record ever made: position p is the
+        # board after p records; _records[0] leads from position _first
+        self._first = 0
+        self._position = 0
+        self._keyframes = {}
+
+    def reset(self, board, generation=0, origin=(0, 0)):
+        """ Forget everything and start from the given board """
+        self.board = board.copy()
+        self.generation = generation
+        self.origin = tuple(origin)
+        self.nbytes = 0
+        self._records = []
+        self._first = self._position = 0
+        self._keyframes = {}
+        self._keyframe()
+
+    @property
+    def can_undo(self):
+        return self._position > self._first
+
+    @property
+    def can_redo(self):
+        return self._position < self._first + len(self._records)
+
+    def record(self, board, generation, kind=STEP, origin=(0, 0)):
+        """
+        Record the change from the current board to board. A board of a
+        different shape or origin (an infinite grid that moved) cannot be
+        diffed and starts the history over.
+        """
+        if (self.board is None or board.shape != self.board.shape or board.dtype != self.board.dtype
+                or tuple(origin) != self.origin):
+            self.reset(board, generation, origin)
+            return
+        change = self._diff(board, kind, generation)
+        if change is None:
+            return
+        if self.can_redo:
+            self._truncate()
+        np.copyto(self.board, board)
+        self.generation = generation
+        last = self._records[-1] if self._records else None
+        if (kind == STEP and change.sparse and not len(change.data) and last is not None
+                and last.kind == STEP and last.sparse and not len(last.data)):
+            # A still board only moves the generation on
+            self._records[-1] = last._replace(after=generation)
+            if self._position in self._keyframes:
+                # The keyframe after that record has the same cells but
+                # must move on to the new generation too
+                frame, _ = self._keyframes[self._position]
+                self._keyframes[self._position] = (frame, generation)
+        else:
+            self._records.append(change)
+            self.nbytes += change.nbytes
+            self._position += 1
+            if self._position % self.keyframe_interval == 0:
+                self._keyframe()
+        self._evict()
+
+    def _diff(self, board, kind, generation):
+        if board.dtype == bool:
+            flipped = np.not_equal(board, self.board)
+            indices = np.flatnonzero(flipped)
+            values = None
+            dense_size = (board.size + 7) // 8
+        else:
+            flipped = np.bitwise_xor(board, self.board)
+            indices = np.flatnonzero(flipped)
+            values = flipped.ravel()[indices]
+            dense_size = board.size
+        if not len(indices) and kind == EDIT:
+            return None
+        sparse_size = indices.size * 4 + (0 if values is None else values.size)
+        if sparse_size <= dense_size:
+            data = indices.astype(np.int32 if board.size < 2 ** 31 else np.int64)
+            return _Change(kind, self.generation, generation, True, data, values,
+                           data.nbytes + (0 if values is None else values.nbytes) + _OVERHEAD)
+        data = np.packbits(flipped) if board.dtype == bool else flipped.ravel()
+        return _Change(kind, self.generation, generation, False, data, None, data.nbytes + _OVERHEAD)
+
+    def _apply(self, change):
+        """ XOR a change into the board, which undoes it or does it again """
+        cells = self.board.reshape(-1)
+        if change.sparse:
+            if change.values is None:
+                cells[change.data] ^= True
+            else:
+                cells[change.data] ^= change.values
+        elif self.board.dtype == bool:
+            cells ^= np.unpackbits(change.data, count=cells.size).view(bool)
+        else:
+            cells ^= change.data
+
+    def _keyframe(self):
+        frame = np.packbits(self.board) if self.board.dtype == bool else self.board.copy()
+        self._keyframes[self._position] = (frame, self.generation)
+        self.nbytes += frame.nbytes
+
+    def _load_keyframe(self, position):
+        frame, generation = self._keyframes[position]
+        if self.board.dtype == bool:
+            cells = np.unpackbits(frame, count=self.board.size).view(bool)
+            self.board[...] = cells.reshape(self.board.shape)
+        else:
+            np.copyto(self.board, frame)
+        self.generation = generation
+        self._position = position
+
+    def _truncate(self):
+        """ Drop the records after the current position """
+        for change in self._records[self._position - self._first:]:
+            self.nbytes -= change.nbytes
+        del self._records[self._position - self._first:]
+        for position in [p for p in self._keyframes if p > self._position]:
+            self.nbytes -= self._keyframes.pop(position)[0].nbytes
+
+    def _evict(self):
+        """ Drop the oldest records and keyframes until the history fits in the budget """
+        drop = 0
+        freed = 0
+        while self.nbytes - freed > self.budget and self._first + drop < self._position:
+            freed += self._records[drop].nbytes
+            drop += 1
+        if not drop:
+            return
+        del self._records[:drop]
+        self._first += drop
+        self.nbytes -= freed
+        for position in [p for p in self._keyframes if p < self._first]:
+            self.nbytes -= self._keyframes.pop(position)[0].nbytes
+
+    def _seek(self, target):
+        """ Move to the given record position, starting from a keyframe when that is closer """
+        target = min(max(target, self._first), self._first + len(self._records))
+        keyframe = min(self._keyframes, key=lambda position: abs(position - target), default=None)
+        if keyframe is not None and abs(keyframe - target) + 1 < abs(self._position - target):
+            self._load_keyframe(keyframe)
+        while self._position > target:
+            self._position -= 1
+            change = self._records[self._position - self._first]
+            self._apply(change)
+            self.generation = change.before
+        while self._position < target:
+            change = self._records[self._position - self._first]
+            self._apply(change)
+            self.generation = change.after
+            self._position += 1
+
+    def rewind(self, count=1):
+        """ Go back count records; returns how many were undone """
+        start = self._position
+        self._seek(self._position - count)
+        return start - self._position
+
+    def forward(self, count=1):
+        """ Go forward count records; returns how many were redone """
+        start = self._position
+        self._seek(self._position + count)
+        return self._position - start
+
+    def undo(self):
+        """ Undo the last edit, or the last run of generations; returns False if there is nothing to undo """
+        if not self.can_undo:
+            return False
+        target = self._position - 1
+        if self._records[target - self._first].kind == STEP:
+            while target > self._first and self._records[target - 1 - self._first].kind == STEP:
+                target -= 1
+        self._seek(target)
+        return True
+
+    def redo(self):
+        """ Redo what undo() undid; returns False if there is nothing to redo """
+        if not self.can_redo:
+            return False
+        end = self._first + len(self._records)
+        target = self._position + 1
+        if self._records[self._position - self._first].kind == STEP:
+            while target < end and self._records[target - self._first].kind == STEP:
+                target += 1
+        self._seek(target)
+        return True
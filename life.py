@@ -2,10 +2,15 @@
 A simple implementation of Game of Life with fluid implementation of
 board setup, optimized for iPhone 15 Pro in portrait mode.
 """
-import sys
+import asyncio
+import time
 import pygame
 import numpy as np
 
+from scheduler import SPEEDS, StepScheduler
+from profiler import FrameProfiler, NullProfiler
+from viewport import Camera
+
 # Detect if running in browser (via Pygbag/Pyodide)
 try:
     import platform
@@ -22,117 +27,494 @@ BUTTON_HEIGHT = 50  # Height of the button in pixels
 ALIVE_COLOR = (255, 255, 255)
 DEAD_COLOR = (0, 0, 0)
 TRANSPARENT_COLOR = (0, 0, 0)
+HUD_COLOR = (0, 255, 0)
 
-# Cell size in pixels
+# Cell size in pixels at the starting zoom level
 CELL_SIZE = 7
 
+# Width and height of the universe in cells. The view shows part of it and
+# can be zoomed (mouse wheel or pinch) and dragged (right mouse button, or
+# any drag while running).
+UNIVERSE_SIZE = 80
+
+# Size of the view of the board on screen, in pixels
+VIEW_WIDTH = 80 * CELL_SIZE
+VIEW_HEIGHT = 80 * CELL_SIZE
+
 # Board position offset for centering
-BOARD_X_OFFSET = (WIDTH - 80 * CELL_SIZE) // 2
+BOARD_X_OFFSET = (WIDTH - VIEW_WIDTH) // 2
 BOARD_Y_OFFSET = 50  # Provide some space at the top
 
+# What happens at the edge of the board: "fixed", "torus" or "infinite" (see lifecore)
+BOUNDARY = "torus"
 
-def game_of_life(board):
-    """
-    Apply the rules of the Game of Life to the board
-    """
-    # Copy the board to a new array to avoid modifying the original
-    new_board = np.copy(board)
-    for i in range(1, board.shape[0]-1):
-        for j in range(1, board.shape[1]-1):
-            # Count the number of live neighbors
-            neighbors = np.sum(board[i-1:i+2, j-1:j+2]) - board[i, j]
-            # Apply the rules of the Game of Life
-            if board[i, j]:
-                if neighbors < 2 or neighbors > 3:
-                    new_board[i, j] = False
-            else:
-                if neighbors == 3:
-                    new_board[i, j] = True
-    return new_board
+# Board backend from lifecore.ENGINES: "life" (one byte per cell), "bitboard"
+# (64 cells per word), "tiled" (skips stable and empty tiles) or "lut" (2x2
+# blocks from a lookup table, faster than "life" for rules other than B3/S23)
+ENGINE = "life"
+
+# Rule string or name from rules.NAMED_RULES, e.g. "B36/S23" (HighLife) or
+# "brians-brain". Rules other than B3/S23 need the "life" engine, or "lut"
+# for two-state rules.
+RULE = "B3/S23"
+
+# Pattern file written by the Save button and read by the Load button,
+# in RLE (.rle) or plaintext (.cells) format
+PATTERN_FILE = "pattern.rle"
 
-def draw_board(screen, board, previous_board):
+# Warp mode runs a HashLife universe and advances 2**WARP_EXPONENT generations
+# per frame while the simulation is started. The universe is unbounded.
+# WARP is how the game starts; the Warp button turns it on and off. HashLife
+# only runs B3/S23, so warp mode is refused for other rules.
+WARP = False
+WARP_EXPONENT = 8
+
+# What to do once the board settles into a still life or an oscillator of
+# at most MAX_PERIOD generations: "replay" plays the cycle back from frames
+# recorded once instead of stepping, "pause" stops the simulation and None
+# keeps stepping as usual
+ON_CYCLE = "replay"
+MAX_PERIOD = 64
+
+# Memory kept for undo and for going back through generations, in bytes
+# (0 turns the history off). While paused, Undo/Redo (or Ctrl+Z/Ctrl+Y) undo
+# whole edits and runs, the Left/Right keys go back and forth one
+# generation or edit at a time and Page Up/Page Down SCRUB_STEP at a time.
+# The oldest history is forgotten first.
+HISTORY_BUDGET = 32 * 2 ** 20
+SCRUB_STEP = 100
+
+# Longest stretch of stepping before control goes back to the event loop.
+# In the browser the page freezes until we yield, so the slices are shorter.
+STEP_SLICE = 0.004 if IN_BROWSER else 0.012
+
+
+# PROFILE shows frame timings above the board (F3 toggles them). When
+# TRACE_FILE is set the timings of every frame are written to it, as CSV or
+# JSON depending on the extension. The numbers on screen are refreshed
+# every HUD_INTERVAL seconds.
+PROFILE = False
+TRACE_FILE = None
+HUD_INTERVAL = 0.5
+
+# Rows of cells checked together when looking for changed areas of the board
+DIRTY_BAND = 16
+
+# Surfaces and pixel buffers reused by draw_board(), keyed by board shape
+_board_surfaces = {}
+
+
+def _merge_rects(rects):
     """
-    Render the board to the screen
+    Merge rectangles that touch or overlap, so the display is updated with
+    a few larger areas instead of many small ones
     """
-    for board_x in range(board.shape[0]):
-        for board_y in range(board.shape[1]):
-            if board[board_x, board_y] != previous_board[board_x, board_y]:
-                if board[board_x, board_y]:
-                    color = ALIVE_COLOR
-                else:
-                    color = DEAD_COLOR
-                rect = (BOARD_X_OFFSET + board_x * CELL_SIZE, BOARD_Y_OFFSET + board_y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, color, rect)
-                pygame.display.update(rect)
-    previous_board[:] = board
-
-def draw_buttons(screen, running, draw) :
-    """ Render the Draw/Erase, Reset and Start/Pause buttons on the screen
+    merged = []
+    for rect in sorted(rects, key=lambda r: (r.y, r.x)):
+        for index, other in enumerate(merged):
+            if other.inflate(2, 2).colliderect(rect):
+                merged[index] = other.union(rect)
+                break
+        else:
+            merged.append(rect)
+    return merged
+
+
+def draw_board(screen, board, previous_board, regions=None, cell_size=CELL_SIZE, position=None):
     """
-    # Set up font for button text
-    font = pygame.font.Font(None, 30)
-    
-    # Position buttons in the bottom area of the screen
-    buttons_y_start = BOARD_Y_OFFSET + 80 * CELL_SIZE + 40  # Start button positioning below the board with some padding
-    
-    # Create the draw button -- this is only visible when the game is not running
-    draw_button = pygame.Rect((WIDTH - BUTTON_WIDTH)//2, buttons_y_start,
-                               BUTTON_WIDTH, BUTTON_HEIGHT)
-
-    # Create the reset button -- this is only visible when the game is not running
-    reset_button = pygame.Rect((WIDTH - BUTTON_WIDTH)//2, buttons_y_start + BUTTON_HEIGHT + 10,
-                                BUTTON_WIDTH, BUTTON_HEIGHT)
-
-    blank_text = font.render("********", True, DEAD_COLOR, (0,0,0,0))
-
-    if running:
-        game_button_name = "Pause"
-        draw_text = blank_text
-        reset_text = blank_text
-        color = (0, 0, 0)
-    else:
-        if draw:
-            draw_title = "Draw"
+    Render the board to the screen and return the screen rectangles that changed
+
+    The whole board is turned into an image with one array operation, scaled
+    up to cell_size and only the changed areas are blitted, with board[0, 0]
+    at position (the top left corner of the view by default). board holds
+    bool cells, or uint8 densities from 0 to 255 (see viewport.density_map)
+    that are drawn as shades between DEAD_COLOR and ALIVE_COLOR. regions
+    optionally limits the cells that are compared to a list of (x, y, width,
+    height) rectangles, such as the dirty tiles of a TiledEngine.
+    """
+    if position is None:
+        position = (BOARD_X_OFFSET, BOARD_Y_OFFSET)
+    left, top = position
+    width, height = board.shape
+    if regions is None:
+        regions = [(0, y, width, DIRTY_BAND) for y in range(0, height, DIRTY_BAND)]
+    changed = board != previous_board
+    rects = []
+    for x, y, region_width, region_height in regions:
+        block = changed[x:x + region_width, y:y + region_height]
+        if not block.any():
+            continue
+        xs = np.flatnonzero(block.any(axis=1))
+        ys = np.flatnonzero(block.any(axis=0))
+        rects.append(pygame.Rect(left + (x + xs[0]) * cell_size,
+                                 top + (y + ys[0]) * cell_size,
+                                 (xs[-1] - xs[0] + 1) * cell_size,
+                                 (ys[-1] - ys[0] + 1) * cell_size))
+    previous_board[:] = board
+    if not rects:
+        return []
+
+    key = (board.shape, cell_size, board.dtype)
+    surfaces = _board_surfaces.get(key)
+    if surfaces is None:
+        cells = pygame.Surface((width, height))
+        scaled = pygame.Surface((width * cell_size, height * cell_size))
+        if board.dtype == bool:
+            shades = [DEAD_COLOR, ALIVE_COLOR]
         else:
-            draw_title = "Erase"
-        game_button_name = " Start "
-        # Draw the text on the reset button
-        reset_text = font.render("Reset", True, (255,255,255), (0,0,0,0))
-        draw_text = font.render(draw_title, True, (255,255,255), (0,0,0,0))
-        color = (255, 0, 0)
-
-    screen.blit(reset_text, (reset_button.x + (reset_button.width - reset_text.get_width()) \
-                 // 2, reset_button.y + (reset_button.height - reset_text.get_height()) // 2))
-    pygame.draw.rect(screen, color, reset_button, 2)
-
-    screen.blit(draw_text, (draw_button.x + (draw_button.width - draw_text.get_width()) \
-                 // 2, draw_button.y + (draw_button.height - draw_text.get_height()) // 2))
-    pygame.draw.rect(screen, color, draw_button, 2)
-
-    # Create the start/pause game button -- this is button is always visible
-    start_game_button = pygame.Rect((WIDTH - BUTTON_WIDTH)//2, buttons_y_start + 2 * (BUTTON_HEIGHT + 10), \
-                            BUTTON_WIDTH, BUTTON_HEIGHT)
-
-    start_game_text = font.render(game_button_name, True, (255,255,255), (0,0,0,0))
-    # draw the blank surface over the previous text
-    screen.blit(start_game_text, (start_game_button.x + \
-                (start_game_button.width - start_game_text.get_width()) // 2, \
-                start_game_button.y + (start_game_button.height - \
-                start_game_text.get_height()) // 2))
-    pygame.draw.rect(screen, (255, 0, 0), start_game_button, 2)
-
-    return start_game_button, reset_button, draw_button
+            levels = np.linspace(0, 1, 256)[:, None]
+            shades = np.rint(np.add(DEAD_COLOR, levels * np.subtract(ALIVE_COLOR, DEAD_COLOR)))
+        colors = np.array([cells.map_rgb(tuple(int(c) for c in shade)) for shade in shades], dtype=np.uint32)
+        pixels = np.empty((width, height), dtype=np.uint32)
+        surfaces = _board_surfaces[key] = (cells, scaled, colors, pixels)
+    cells, scaled, colors, pixels = surfaces
+
+    # One pixel per cell, then scale the whole image up in one call
+    np.take(colors, board.view(np.uint8), out=pixels)
+    pygame.surfarray.blit_array(cells, pixels)
+    pygame.transform.scale(cells, scaled.get_size(), scaled)
+
+    rects = _merge_rects(rects)
+    for rect in rects:
+        screen.blit(scaled, rect, rect.move(-left, -top))
+    return rects
+
+# Fonts by size, created on first use and shared by everything drawn
+_fonts = {}
+
+# Rendered button labels, keyed by (text, color)
+_labels = {}
+
+
+def get_font(size):
+    """ Return the default font at the given size, creating it only once """
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+
+def render_label(text, color=ALIVE_COLOR):
+    """ Return the rendered text of a button label, rendering each label only once """
+    surface = _labels.get((text, color))
+    if surface is None:
+        surface = _labels[(text, color)] = get_font(30).render(text, True, color, DEAD_COLOR)
+    return surface
+
+
+class Button:
+    """
+    A button that remembers how it was last drawn.
+
+    set() changes its label, whether the label is shown and its border
+    color; draw() only draws the button again when one of them changed.
+    """
+
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        self.label = ""
+        self.show_label = True
+        self.border = (255, 0, 0)
+        self._drawn = None
+
+    def set(self, label, show_label=True, border=(255, 0, 0)):
+        self.label = label
+        self.show_label = show_label
+        self.border = border
+
+    def collidepoint(self, pos):
+        return self.rect.collidepoint(pos)
+
+    def draw(self, screen):
+        """ Draw the button if it changed since it was last drawn; returns the rect drawn, or None """
+        look = (self.label, self.show_label, self.border)
+        if look == self._drawn:
+            return None
+        screen.fill(DEAD_COLOR, self.rect)
+        if self.show_label:
+            text = render_label(self.label)
+            screen.blit(text, (self.rect.x + (self.rect.width - text.get_width()) // 2,
+                               self.rect.y + (self.rect.height - text.get_height()) // 2))
+        pygame.draw.rect(screen, self.border, self.rect, 2)
+        self._drawn = look
+        return self.rect
+
+
+class ButtonPanel:
+    """
+    The Draw/Erase, Reset, Start/Pause, Speed, Save, Load, Undo, Redo and
+    Warp buttons below the board. Start/Pause and Speed are always visible; the
+    others only while the simulation is not running.
+    """
+
+    def __init__(self):
+        # Stacked below the board with some padding
+        top = BOARD_Y_OFFSET + VIEW_HEIGHT + 40
+        self.buttons = [Button(((WIDTH - BUTTON_WIDTH) // 2, top + slot * (BUTTON_HEIGHT + 10),
+                                BUTTON_WIDTH, BUTTON_HEIGHT)) for slot in range(9)]
+        (self.draw_button, self.reset, self.start, self.speed,
+         self.save, self.load, self.undo, self.redo, self.warp) = self.buttons
+
+    def update(self, running, draw, speed, warp=False):
+        """ Bring the buttons up to date with the state of the game """
+        # The buttons that are hidden while running keep a black border
+        idle = DEAD_COLOR if running else (255, 0, 0)
+        self.draw_button.set("Draw" if draw else "Erase", not running, idle)
+        self.reset.set("Reset", not running, idle)
+        self.start.set("Pause" if running else "Start")
+        self.speed.set("Speed: " + speed)
+        self.save.set("Save", not running, idle)
+        self.load.set("Load", not running, idle)
+        self.undo.set("Undo", not running, idle)
+        self.redo.set("Redo", not running, idle)
+        self.warp.set("Warp: On" if warp else "Warp: Off", not running, idle)
+
+    def draw(self, screen):
+        """ Draw the buttons that changed and return their rects """
+        drawn = (button.draw(screen) for button in self.buttons)
+        return [rect for rect in drawn if rect is not None]
+
+
+def draw_hud(screen, font, profiler, population):
+    """ Draw the frame rate, speed, live cells and phase timings above the board and return the area drawn """
+    area = pygame.Rect(0, 0, WIDTH, BOARD_Y_OFFSET)
+    screen.fill(DEAD_COLOR, area)
+    step = profiler.percentiles("step")
+    render = profiler.percentiles("render")
+    lines = (f"{profiler.fps():.0f} fps  {profiler.generations_per_second():,.0f} gen/s  {population:,} live",
+             f"step {step[0]:.1f}/{step[1]:.1f} ms  render {render[0]:.1f}/{render[1]:.1f} ms (p50/p95)")
+    for row, line in enumerate(lines):
+        screen.blit(font.render(line, True, HUD_COLOR), (8, 4 + row * 22))
+    return area
+
+
+def mark_first_frame():
+    """ Tell the page that the first frame is on screen; the web build's startup check waits for it """
+    try:
+        import js
+    except ImportError:
+        return
+    js.window.gameFirstFrame = js.performance.now()
+
+
+def next_speed(speed):
+    """ Return the speed after the given one in SPEEDS, wrapping around """
+    names = list(SPEEDS)
+    return names[(names.index(speed) + 1) % len(names)]
 
-def main():
-    """ Main function"""
+def warp_supported():
+    """ True if warp mode can run RULE; HashLife only runs B3/S23 """
+    from lifecore import _compile_rule
+    return _compile_rule(RULE) is None
+
+
+def new_engine(board, warp=False):
+    """ Create the engine for a board as configured by ENGINE, BOUNDARY and RULE, or HashLife in warp mode """
+    from lifecore import INFINITE, create_engine
+    if warp:
+        return create_engine("hashlife", board, INFINITE)
+    return create_engine(ENGINE, board, BOUNDARY, RULE)
+
+
+def switch_warp(engine, warp):
+    """ Move the cells and generation of an engine into a new one with warp mode on or off """
+    from cycles import engine_state
+    if warp or BOUNDARY == "infinite":
+        board, origin = engine_state(engine)
+    else:
+        # Cells that warp mode took past the edge of the universe are dropped
+        board, origin = engine.window(0, 0, UNIVERSE_SIZE, UNIVERSE_SIZE), (0, 0)
+    if not board.size:
+        board, origin = np.zeros((UNIVERSE_SIZE, UNIVERSE_SIZE), dtype=bool), (0, 0)
+    switched = new_engine(board.copy(), warp)
+    switched.origin = origin
+    switched.generation = engine.generation
+    return switched
+
+
+def restore(history):
+    """ Create the engine for the board a History has moved to """
+    engine = new_engine(history.board.copy())
+    engine.origin = history.origin
+    engine.generation = history.generation
+    return engine
+
+
+def _distance(first, second):
+    return ((first[0] - second[0]) ** 2 + (first[1] - second[1]) ** 2) ** 0.5
+
+
+def paint(engine, camera, pos, alive, unbounded=False):
+    """ Set or clear the cell under a screen position, if it is in the view and the universe """
+    px, py = pos[0] - BOARD_X_OFFSET, pos[1] - BOARD_Y_OFFSET
+    if not (0 <= px < VIEW_WIDTH and 0 <= py < VIEW_HEIGHT):
+        return
+    x, y = camera.screen_to_cell(px, py)
+    if unbounded or (0 <= x < UNIVERSE_SIZE and 0 <= y < UNIVERSE_SIZE):
+        engine.set(x, y, alive)
+
+
+def view_regions(regions, window):
+    """
+    Move (x, y, width, height) cell rectangles of the universe into a window
+    of it, given in the same form, clipping them and dropping those outside
+    """
+    window_x, window_y, width, height = window
+    moved = []
+    for x, y, region_width, region_height in regions:
+        x0, y0 = max(x - window_x, 0), max(y - window_y, 0)
+        x1 = min(x + region_width - window_x, width)
+        y1 = min(y + region_height - window_y, height)
+        if x0 < x1 and y0 < y1:
+            moved.append((x0, y0, x1 - x0, y1 - y0))
+    return moved
+
+
+def save_board(board):
+    """ Write the board to PATTERN_FILE """
+    from patternio import write_pattern
+    try:
+        write_pattern(PATTERN_FILE, board, RULE)
+    except (OSError, ValueError) as error:
+        print(f"Could not save {PATTERN_FILE}: {error}")
+
+
+def load_board(shape):
+    """
+    Read PATTERN_FILE into a new board of the given shape, centered and
+    cropped to fit. Returns None if the file cannot be read.
+    """
+    from patternio import read_pattern
+    try:
+        return read_pattern(PATTERN_FILE, np.zeros(shape, dtype=bool)).cells
+    except (OSError, ValueError) as error:
+        print(f"Could not load {PATTERN_FILE}: {error}")
+        return None
 
+
+async def step_in_slices(engine, generations, after_step=None):
+    """
+    Advance the engine by the given number of generations, yielding to the
+    event loop whenever a slice of STEP_SLICE seconds has been used up.
+    Stops early when after_step() returns True. Returns the number of
+    generations run.
+    """
+    slice_start = time.perf_counter()
+    for ran in range(1, generations + 1):
+        engine.step()
+        if after_step is not None and after_step():
+            return ran
+        if time.perf_counter() - slice_start > STEP_SLICE:
+            await asyncio.sleep(0)
+            slice_start = time.perf_counter()
+    return generations
+
+
+def __getattr__(name):
+    # The simulation core is only imported when it is needed, but
+    # life.game_of_life keeps working for existing callers
+    if name == "game_of_life":
+        from lifecore import game_of_life
+        return game_of_life
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def main():
+    """ Main function"""
     # Initialize pygame
     pygame.init()
 
-    # Create a blank board
-    game_board = np.zeros((80, 80), dtype=bool)
+    warp = WARP and warp_supported()
+    if WARP and not warp:
+        print(f"Warp mode only runs B3/S23, not {RULE}; starting without it")
+
+    # Create a blank universe. The simulation core is imported by new_engine()
+    # so that importing this module stays cheap.
+    engine = new_engine(np.zeros((UNIVERSE_SIZE, UNIVERSE_SIZE), dtype=bool), warp)
+    from cycles import CycleDetector, CycleReplay, engine_state
+    # Watches for the board settling down, see ON_CYCLE
+    detector = CycleDetector(MAX_PERIOD) if ON_CYCLE and not warp else None
+    replay = None
+
+    from history import EDIT, STEP, History
+    # Undo, redo and going back through generations, see HISTORY_BUDGET
+    history = History(HISTORY_BUDGET) if HISTORY_BUDGET and not warp else None
+
+    def remember():
+        """ Record the board in the history: a step if the generation moved on, otherwise an edit """
+        if history is None:
+            return
+        board, origin = engine_state(engine)
+        kind = STEP if engine.generation != history.generation else EDIT
+        history.record(board, engine.generation, kind, origin)
+
+    def after_step():
+        """ Called after every generation; returns True once the board has settled """
+        remember()
+        if detector is None:
+            return False
+        board, origin = engine_state(engine)
+        # The tiled engine knows which tiles changed; the board is edited
+        # only while paused, and the detector is reset when starting again
+        regions = engine.changed_regions() if hasattr(engine, "changed_regions") else None
+        return detector.update(board, engine.generation, origin, regions) is not None
+
+    def travel(move, *args):
+        """ Call the History method of the given name and carry on from where it lands """
+        nonlocal engine
+        if history is None:
+            return
+        remember()
+        if getattr(history, move)(*args):
+            engine = restore(history)
+            if detector is not None:
+                detector.reset()
+
+    def min_zoom():
+        """ A bounded universe can be zoomed out until it fills half of the view """
+        if warp or BOUNDARY == "infinite":
+            return None
+        return min(VIEW_WIDTH, VIEW_HEIGHT) / UNIVERSE_SIZE / 2
+
+    def toggle_warp():
+        """ Turn warp mode on or off, carrying the cells over; refused for rules other than B3/S23 """
+        nonlocal engine, warp, detector, history, camera
+        if not warp and not warp_supported():
+            print(f"Warp mode only runs B3/S23, not {RULE}")
+            return
+        warp = not warp
+        engine = switch_warp(engine, warp)
+        detector = CycleDetector(MAX_PERIOD) if ON_CYCLE and not warp else None
+        history = History(HISTORY_BUDGET) if HISTORY_BUDGET and not warp else None
+        remember()
+        camera = Camera(VIEW_WIDTH, VIEW_HEIGHT, camera.zoom, camera.x, camera.y, min_zoom())
+
+    remember()
+
+    camera = Camera(VIEW_WIDTH, VIEW_HEIGHT, CELL_SIZE, min_zoom=min_zoom())
+    camera.center_on(UNIVERSE_SIZE / 2, UNIVERSE_SIZE / 2)
+    view_rect = pygame.Rect(BOARD_X_OFFSET, BOARD_Y_OFFSET, VIEW_WIDTH, VIEW_HEIGHT)
+    # The cells in view, what is drawn of them and what is on screen. They
+    # are allocated again when the camera moves; draw_board() keeps
+    # previous_board up to date, so it is never copied.
+    view_state = None
+    game_board = previous_board = density = None
+    # Screen positions of the fingers on a touchscreen, and the zoom and
+    # finger distance when a pinch started
+    fingers = {}
+    pinch = None
+    panning = False
+
+    # Frame timings; a NullProfiler costs nothing while they are not wanted
+    profiler = FrameProfiler(trace=TRACE_FILE) if PROFILE or TRACE_FILE else NullProfiler()
+    show_hud = PROFILE
+    hud_font = get_font(24)
+    hud_refresh = 0.0
     clock = pygame.time.Clock()
     f_p_s = 60
+    # The simulation speed is independent of f_p_s
+    speed = "1x"
+    scheduler = StepScheduler(SPEEDS[speed])
     mouse_down = False
     draw = True
     running = False
@@ -145,74 +527,256 @@ def main():
     # Handle touch events for mobile devices
     has_touchscreen = pygame.display.get_active() and hasattr(pygame, 'FINGERDOWN')
 
+    panel = ButtonPanel()
+    start_game_button, reset_button, draw_button = panel.start, panel.reset, panel.draw_button
+    speed_button, save_button, load_button = panel.speed, panel.save, panel.load
+    undo_button, redo_button, warp_button = panel.undo, panel.redo, panel.warp
+    first_frame = IN_BROWSER
+
     while True:
-        previous_board = np.copy(game_board)
-        start_game_button, reset_button, draw_button = draw_buttons(game_screen, running, draw)
+        profiler.begin_frame()
+        updates = []
 
         # Check for mouse/touch events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                profiler.close()
                 pygame.quit()
-                sys.exit()
+                return
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                show_hud = not show_hud
+                hud_refresh = 0.0
+                if show_hud and not profiler.enabled:
+                    profiler = FrameProfiler(trace=TRACE_FILE)
+                    profiler.begin_frame()
+                elif not show_hud:
+                    game_screen.fill(DEAD_COLOR, (0, 0, WIDTH, BOARD_Y_OFFSET))
+                    updates.append(pygame.Rect(0, 0, WIDTH, BOARD_Y_OFFSET))
+            elif event.type == pygame.KEYDOWN and history is not None and not running:
+                shift = event.mod & pygame.KMOD_SHIFT
+                if event.mod & (pygame.KMOD_CTRL | pygame.KMOD_META):
+                    if event.key == pygame.K_z:
+                        travel("redo" if shift else "undo")
+                    elif event.key == pygame.K_y:
+                        travel("redo")
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                    count = SCRUB_STEP if event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN) else 1
+                    travel("rewind" if event.key in (pygame.K_LEFT, pygame.K_PAGEUP) else "forward", count)
             # Handle touch events for mobile
             elif has_touchscreen and event.type == pygame.FINGERDOWN:
                 # Convert touch coordinates to screen coordinates
                 x = event.x * WIDTH
                 y = event.y * HEIGHT
                 pos = (x, y)
-                
-                if running:
+                fingers[event.finger_id] = pos
+                if len(fingers) == 2:
+                    # A second finger starts a pinch instead of a tap
+                    pinch = (camera.zoom, _distance(*fingers.values()))
+                elif speed_button.collidepoint(pos):
+                    speed = next_speed(speed)
+                    scheduler.generations_per_second = SPEEDS[speed]
+                elif running:
                     if start_game_button.collidepoint(pos):
                         running = not running
+                        if replay is not None:
+                            replay.sync()
+                            replay = None
                 else:
                     if start_game_button.collidepoint(pos):
                         running = not running
+                        scheduler.reset()
+                        remember()
+                        if detector is not None:
+                            detector.reset()
                     elif reset_button.collidepoint(pos):
                         # reset the board to blank
-                        game_board = np.zeros((80, 80), dtype=bool)
+                        engine.clear()
+                        remember()
                     elif draw_button.collidepoint(pos):
                         draw = not draw
+                    elif save_button.collidepoint(pos):
+                        save_board(engine.to_array())
+                    elif load_button.collidepoint(pos):
+                        loaded = load_board((UNIVERSE_SIZE, UNIVERSE_SIZE))
+                        if loaded is not None:
+                            engine = new_engine(loaded, warp)
+                            remember()
+                    elif undo_button.collidepoint(pos):
+                        travel("undo")
+                    elif redo_button.collidepoint(pos):
+                        travel("redo")
+                    elif warp_button.collidepoint(pos):
+                        toggle_warp()
                     else:
                         # Place a cell at touch position
-                        board_x = int((x - BOARD_X_OFFSET) // CELL_SIZE)
-                        board_y = int((y - BOARD_Y_OFFSET) // CELL_SIZE)
-                        if 0 <= board_x < game_board.shape[0] and 0 <= board_y < game_board.shape[1]:
-                            game_board[board_x, board_y] = draw
-            
+                        paint(engine, camera, pos, draw, warp or BOUNDARY == "infinite")
+                        remember()
+            elif has_touchscreen and event.type == pygame.FINGERMOTION:
+                if event.finger_id in fingers:
+                    x = event.x * WIDTH
+                    y = event.y * HEIGHT
+                    before = fingers[event.finger_id]
+                    fingers[event.finger_id] = (x, y)
+                    if pinch is not None and len(fingers) == 2:
+                        # Two fingers pan by their midpoint and zoom by their spread
+                        first, second = fingers.values()
+                        middle = ((first[0] + second[0]) / 2, (first[1] + second[1]) / 2)
+                        camera.pan((x - before[0]) / 2, (y - before[1]) / 2)
+                        zoom, spread = pinch
+                        camera.set_zoom(zoom * _distance(first, second) / max(spread, 1),
+                                        middle[0] - view_rect.x, middle[1] - view_rect.y)
+                    elif running and view_rect.collidepoint(before):
+                        # While running one finger drags the view
+                        camera.pan(x - before[0], y - before[1])
+            elif has_touchscreen and event.type == pygame.FINGERUP:
+                fingers.pop(event.finger_id, None)
+                if len(fingers) < 2:
+                    pinch = None
+
             # Regular mouse events
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if running:
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+                # The middle and right buttons drag the view
+                panning = True
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                if speed_button.collidepoint(event.pos):
+                    speed = next_speed(speed)
+                    scheduler.generations_per_second = SPEEDS[speed]
+                elif running:
                     if start_game_button.collidepoint(event.pos):
                         running = not running
+                        if replay is not None:
+                            replay.sync()
+                            replay = None
+                    elif view_rect.collidepoint(event.pos):
+                        # While running the left button drags the view too
+                        panning = True
                 else:
                     if start_game_button.collidepoint(event.pos):
                         running = not running
+                        scheduler.reset()
+                        remember()
+                        if detector is not None:
+                            detector.reset()
                     elif reset_button.collidepoint(event.pos):
                         # reset the board to blank
-                        game_board = np.zeros((80, 80), dtype=bool)
+                        engine.clear()
+                        remember()
                     elif draw_button.collidepoint(event.pos):
                         draw = not draw
+                    elif save_button.collidepoint(event.pos):
+                        save_board(engine.to_array())
+                    elif load_button.collidepoint(event.pos):
+                        loaded = load_board((UNIVERSE_SIZE, UNIVERSE_SIZE))
+                        if loaded is not None:
+                            engine = new_engine(loaded, warp)
+                            remember()
+                    elif undo_button.collidepoint(event.pos):
+                        travel("undo")
+                    elif redo_button.collidepoint(event.pos):
+                        travel("redo")
+                    elif warp_button.collidepoint(event.pos):
+                        toggle_warp()
                     else:
                         mouse_down = True
             elif event.type == pygame.MOUSEBUTTONUP:
+                if mouse_down:
+                    # The end of a stroke
+                    remember()
                 mouse_down = False
+                panning = False
+            elif event.type == pygame.MOUSEMOTION and panning:
+                camera.pan(*event.rel)
+            elif event.type == pygame.MOUSEWHEEL:
+                mouse_x, mouse_y = pygame.mouse.get_pos()
+                if view_rect.collidepoint(mouse_x, mouse_y):
+                    camera.zoom_at(event.y, mouse_x - view_rect.x, mouse_y - view_rect.y)
+        profiler.lap("events")
+        generations = 0
         if running:
-            # Update the board
-            game_board = game_of_life(game_board)
+            # Update the board by as many generations as the speed asks for
+            if warp:
+                generations = 2 ** WARP_EXPONENT
+            else:
+                generations = scheduler.due()
+            step_start = time.perf_counter()
+            if warp:
+                # A HashLife jump cannot be split into slices
+                engine.step(generations)
+            elif replay is not None and replay.window == view_state[0]:
+                replay.advance(generations)
+            else:
+                if replay is not None:
+                    # The camera moved away from the recorded frames
+                    replay.sync()
+                    replay = None
+                ran = await step_in_slices(engine, generations, after_step if detector or history else None)
+                if detector is not None and detector.cycle is not None:
+                    if ON_CYCLE == "pause":
+                        running = False
+                    else:
+                        replay = CycleReplay(engine, detector.cycle.period, camera.window())
+                        replay.advance(generations - ran)
+            scheduler.record(generations, time.perf_counter() - step_start)
         if mouse_down:
             # draw/erase a cell
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            board_x = (mouse_x - BOARD_X_OFFSET) // CELL_SIZE
-            board_y = (mouse_y - BOARD_Y_OFFSET) // CELL_SIZE
-            if 0 <= board_x < game_board.shape[0] and 0 <= board_y < game_board.shape[1]:
-                game_board[board_x, board_y] = draw
+            paint(engine, camera, pygame.mouse.get_pos(), draw, warp or BOUNDARY == "infinite")
+        profiler.lap("step")
+
+        # Draw the part of the universe that is in view
+        if camera.state() != view_state:
+            view_state = camera.state()
+            width, height = view_state[0][2:]
+            game_board = np.zeros((width, height), dtype=bool)
+            if camera.block > 1:
+                density = np.zeros((width // camera.block, height // camera.block), dtype=np.uint8)
+                previous_board = np.zeros_like(density)
+            else:
+                previous_board = np.zeros_like(game_board)
+            # Start from a blank view, which matches the empty previous_board
+            game_screen.fill(DEAD_COLOR, view_rect)
+            updates.append(view_rect)
+        if replay is not None and replay.window == view_state[0]:
+            np.copyto(game_board, replay.board)
+            regions = None
+        else:
+            engine.window(*view_state[0], out=game_board)
+            regions = None
+            if hasattr(engine, "dirty_regions"):
+                changed = engine.dirty_regions()
+                # Only of use when the view shows cells one to one and did not move
+                if not updates and camera.block == 1:
+                    regions = view_regions(changed, view_state[0])
+        view_board = camera.render(game_board, density)
+        offset_x, offset_y = camera.offset()
+        game_screen.set_clip(view_rect)
+        dirty_rects = draw_board(game_screen, view_board, previous_board, regions, camera.pixel,
+                                 (view_rect.x + offset_x, view_rect.y + offset_y))
+        game_screen.set_clip(None)
+        updates.extend(rect.clip(view_rect) for rect in dirty_rects)
+        profiler.lap("render")
+
+        # The buttons are only drawn again when their state changed
+        panel.update(running, draw, speed, warp)
+        updates.extend(panel.draw(game_screen))
+        profiler.lap("buttons")
 
-        # Draw the board
-        draw_board(game_screen, game_board, previous_board)
+        if show_hud and time.perf_counter() >= hud_refresh:
+            hud_refresh = time.perf_counter() + HUD_INTERVAL
+            updates.append(draw_hud(game_screen, hud_font, profiler, engine.population()))
+        profiler.lap("hud")
 
-        pygame.display.flip()
-        clock.tick(f_p_s)
+        # Only push the changed parts of the board and the buttons to the display
+        pygame.display.update(updates)
+        if first_frame:
+            mark_first_frame()
+            first_frame = False
+        profiler.lap("display")
+        clock.tick(f_p_s)
+        # Hand control back to the event loop (and the browser) once per frame
+        await asyncio.sleep(0)
+        profiler.lap("idle")
+        profiler.end_frame(generations, engine.generation)
 
 
-if __name__ == "__main__":
-    main()
+if __name__ == "__main__":
+    asyncio.run(main())
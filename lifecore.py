@@ -0,0 +1,410 @@
+"""
+Whole-board Game of Life stepping with NumPy.
+
+Neighbor counts are built from shifted views of the board instead of a
+per-cell Python loop, and the rules are applied as boolean masks. Other
+rules (HighLife, Generations, Larger than Life, ...) are handled by the
+rules module. This module does not depend on pygame.
+"""
+import importlib
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# Boundary modes
+FIXED = "fixed"        # the outer ring of cells is frozen and acts as a wall
+TORUS = "torus"        # opposite edges wrap around
+INFINITE = "infinite"  # the grid grows and re-centers to follow the live cells
+BOUNDARIES = (FIXED, TORUS, INFINITE)
+
+# The rule of Conway's Game of Life, which has its own fast path
+LIFE_RULE = "B3/S23"
+
+# Empty cells kept around the live cells when an infinite grid is refitted
+INFINITE_MARGIN = 16
+
+# Board backends by name, as (module, class). They are imported on first use.
+ENGINES = {
+    "life": ("lifecore", "LifeEngine"),
+    "bitboard": ("bitboard", "BitBoard"),
+    "tiled": ("tiled", "TiledEngine"),
+    "lut": ("blocklut", "BlockLUT"),
+    "hashlife": ("hashlife", "HashLife"),
+    "parallel": ("parallel", "ParallelEngine"),
+}
+
+# The state of a simulation at one generation. cells is a copy of the grid
+# and origin the universe coordinates of cells[0, 0].
+Snapshot = namedtuple("Snapshot", ["generation", "origin", "cells"])
+
+# Result of Simulation.run()
+RunStats = namedtuple("RunStats", ["generations", "seconds", "population"])
+
+
+def _work_buffers(shape):
+    """
+    Allocate the scratch arrays used by a step on a board of the given shape
+    """
+    rows, cols = shape
+    vertical = np.empty((rows, cols), dtype=np.uint8)
+    counts = np.empty((rows, cols), dtype=np.uint8)
+    mask = np.empty((rows, cols), dtype=bool)
+    return vertical, counts, mask
+
+
+def _sum_edges(total, first, second, last, second_last, wrap):
+    """
+    Add the neighbors of the first and last line along one axis.
+
+    The interior lines are summed with shifted slices; only the two edge
+    lines need to know what lies past the edge.
+    """
+    np.add(first, second, out=total[0])
+    np.add(last, second_last, out=total[-1])
+    if wrap:
+        np.add(total[0], last, out=total[0])
+        np.add(total[-1], first, out=total[-1])
+
+
+def _neighbor_totals(cells, work, boundary=FIXED):
+    """
+    Return the 3x3 totals of the uint8 array cells, center cell included.
+
+    The totals are written into the scratch arrays in work. With the fixed
+    boundary only the interior cells get a total, so the result is two rows
+    and two columns smaller than cells.
+    """
+    rows, cols = cells.shape
+    vertical, counts = work[0], work[1]
+    fixed = boundary == FIXED
+    wrap = boundary == TORUS
+    if fixed:
+        vertical = vertical[:rows - 2, :]
+        counts = counts[:rows - 2, :cols - 2]
+        inner_vertical = vertical
+        inner_counts = counts
+    else:
+        inner_vertical = vertical[1:-1, :]
+        inner_counts = counts[:, 1:-1]
+
+    # Sum each 3x3 block in two passes: rows first, then columns.
+    # The total includes the center cell itself.
+    np.add(cells[:-2], cells[1:-1], out=inner_vertical)
+    np.add(inner_vertical, cells[2:], out=inner_vertical)
+    if not fixed:
+        _sum_edges(vertical, cells[0], cells[1], cells[-1], cells[-2], wrap)
+    np.add(vertical[:, :-2], vertical[:, 1:-1], out=inner_counts)
+    np.add(inner_counts, vertical[:, 2:], out=inner_counts)
+    if not fixed:
+        _sum_edges(counts.T, vertical[:, 0], vertical[:, 1],
+                   vertical[:, -1], vertical[:, -2], wrap)
+    return counts
+
+
+def _freeze_edges(board, out):
+    """ Copy the outer ring of cells of board into out """
+    out[0, :] = board[0, :]
+    out[-1, :] = board[-1, :]
+    out[1:-1, 0] = board[1:-1, 0]
+    out[1:-1, -1] = board[1:-1, -1]
+
+
+def _step(board, out, work, boundary=FIXED):
+    """
+    Write the next generation of board into out using the scratch arrays in work.
+
+    out may be board itself, in which case the board is updated in place.
+    With the fixed boundary the outer ring of cells is never updated, exactly
+    like the original loop. Otherwise every cell is updated and the cells past
+    the edge are either the opposite edge (torus) or dead (infinite).
+    """
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unknown boundary mode: {boundary!r}")
+    rows, cols = board.shape
+    if rows < 3 or cols < 3:
+        if boundary != FIXED:
+            raise ValueError("The board needs at least 3 rows and 3 columns")
+        if out is not board:
+            out[...] = board
+        return out
+
+    counts = _neighbor_totals(board.view(np.uint8), work, boundary)
+    mask = work[2][:counts.shape[0], :counts.shape[1]]
+    fixed = boundary == FIXED
+
+    # A cell is alive next generation if its 3x3 total is 3, or if it is
+    # alive and the total is 4 (i.e. exactly three live neighbors).
+    if fixed:
+        center = board[1:-1, 1:-1]
+        target = out[1:-1, 1:-1]
+    else:
+        center = board
+        target = out
+    np.equal(counts, 4, out=mask)
+    np.logical_and(mask, center, out=mask)
+    np.equal(counts, 3, out=target)
+    np.logical_or(target, mask, out=target)
+
+    if fixed and out is not board:
+        # The edge cells are frozen
+        _freeze_edges(board, out)
+    return out
+
+
+def _compile_rule(rule):
+    """
+    Return the rules.Rule for a rule string, or None for Conway's Life,
+    which needs no lookup table
+    """
+    if rule is None or rule == LIFE_RULE:
+        return None
+    from rules import parse_rule
+    compiled = parse_rule(rule)
+    return None if compiled.is_life else compiled
+
+
+def game_of_life(board, out=None, boundary=FIXED, rule=None):
+    """
+    Apply the rules of the Game of Life to the board
+
+    Returns the next generation. If out is given the result is written there
+    instead of a new array; out may be the board itself to step in place.
+    boundary is one of BOUNDARIES. A single array cannot grow, so here the
+    infinite mode only treats the cells past the edge as dead; use a
+    LifeEngine to get a grid that follows the pattern. rule is a rule string
+    (see the rules module) and defaults to B3/S23.
+    """
+    compiled = _compile_rule(rule)
+    if compiled is not None:
+        return compiled.step(board, out, boundary)
+    if out is None:
+        out = np.empty(board.shape, dtype=bool)
+    return _step(board, out, _work_buffers(board.shape), boundary)
+
+
+class LifeEngine:
+    """
+    Double-buffered stepper that allocates all of its arrays up front,
+    so stepping the board never allocates.
+
+    Cells are addressed in universe coordinates. For the fixed and torus
+    boundaries these are plain board indices; with the infinite boundary the
+    grid is moved and resized as the pattern spreads, and origin holds the
+    universe coordinates of board[0, 0].
+
+    Any rule string understood by the rules module can be given as rule.
+    Generations rules keep their board as uint8 states; dying cells count
+    as occupied in get(), population() and window().
+    """
+
+    # create_engine() may pass rules other than B3/S23
+    supports_rules = True
+
+    def __init__(self, board, boundary=FIXED, rule=None):
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary mode: {boundary!r}")
+        self.boundary = boundary
+        self.origin = (0, 0)
+        self.generation = 0
+        self._rule = _compile_rule(rule)
+        self.rule = LIFE_RULE if self._rule is None else str(self._rule)
+        self._radius = 1 if self._rule is None else self._rule.radius
+        self._min_shape = np.shape(board)
+        dtype = bool if self._rule is None else self._rule.dtype
+        self._allocate(np.array(board, dtype=dtype))
+
+    def _allocate(self, front):
+        self._front = front
+        self._back = np.empty_like(front)
+        if self._rule is None:
+            self._work = _work_buffers(front.shape)
+        else:
+            self._work = self._rule.work_buffers(front.shape)
+
+    @property
+    def board(self):
+        """ The current generation. The array is reused, so copy it to keep it """
+        return self._front
+
+    @property
+    def shape(self):
+        return self._front.shape
+
+    def _inside(self, x, y):
+        rows, cols = self._front.shape
+        ox, oy = self.origin
+        return ox <= x < ox + rows and oy <= y < oy + cols
+
+    def get(self, x, y):
+        if self.boundary == INFINITE and not self._inside(x, y):
+            return False
+        ox, oy = self.origin
+        return bool(self._front[x - ox, y - oy])
+
+    def set(self, x, y, alive):
+        if self.boundary == INFINITE and not self._inside(x, y):
+            if not alive:
+                return
+            self._refit((x, y))
+        ox, oy = self.origin
+        self._front[x - ox, y - oy] = alive
+
+    def clear(self):
+        self._front[...] = False
+
+    def population(self):
+        return int(np.count_nonzero(self._front))
+
+    def to_array(self):
+        return self._front.copy()
+
+    def window(self, x, y, width, height, out=None):
+        """
+        Return the cells of the universe in the given rectangle as a bool array.
+        Cells outside the grid are dead.
+        """
+        if out is None:
+            out = np.zeros((width, height), dtype=bool)
+        else:
+            out[...] = False
+        rows, cols = self._front.shape
+        ox, oy = self.origin
+        x0, x1 = max(x, ox), min(x + width, ox + rows)
+        y0, y1 = max(y, oy), min(y + height, oy + cols)
+        if x0 < x1 and y0 < y1:
+            out[x0 - x:x1 - x, y0 - y:y1 - y] = \
+                self._front[x0 - ox:x1 - ox, y0 - oy:y1 - oy]
+        return out
+
+    def _touches_edge(self):
+        """ True if live cells are close enough to the edge to spread past it """
+        front = self._front
+        r = self._radius
+        return front[:r].any() or front[-r:].any() or front[:, :r].any() or front[:, -r:].any()
+
+    def _refit(self, point=None):
+        """
+        Move and resize an infinite grid so that the live cells (and point, if
+        given) sit in the middle with INFINITE_MARGIN empty cells around them.
+        The grid never shrinks below the shape it was created with.
+        """
+        ox, oy = self.origin
+        live_rows = np.flatnonzero(self._front.any(axis=1))
+        live_cols = np.flatnonzero(self._front.any(axis=0))
+        if len(live_rows):
+            lo = [live_rows[0] + ox, live_cols[0] + oy]
+            hi = [live_rows[-1] + ox, live_cols[-1] + oy]
+        else:
+            lo = hi = None
+        if point is not None:
+            if lo is None:
+                lo, hi = list(point), list(point)
+            else:
+                lo = [min(lo[0], point[0]), min(lo[1], point[1])]
+                hi = [max(hi[0], point[0]), max(hi[1], point[1])]
+        if lo is None:
+            return
+
+        margin = max(INFINITE_MARGIN, 2 * self._radius)
+        shape = []
+        origin = []
+        for axis in range(2):
+            extent = hi[axis] - lo[axis] + 1
+            size = max(self._min_shape[axis], extent + 2 * margin)
+            shape.append(size)
+            origin.append(int(lo[axis] - (size - extent) // 2))
+        front = np.zeros(shape, dtype=self._front.dtype)
+        if len(live_rows):
+            r0, r1 = live_rows[0], live_rows[-1] + 1
+            c0, c1 = live_cols[0], live_cols[-1] + 1
+            dx = r0 + ox - origin[0]
+            dy = c0 + oy - origin[1]
+            front[dx:dx + r1 - r0, dy:dy + c1 - c0] = self._front[r0:r1, c0:c1]
+        self.origin = tuple(origin)
+        self._allocate(front)
+
+    def step(self, generations=1):
+        """ Advance the board by the given number of generations """
+        for _ in range(generations):
+            if self.boundary == INFINITE and self._touches_edge():
+                self._refit()
+            if self._rule is None:
+                _step(self._front, self._back, self._work, self.boundary)
+            else:
+                self._rule.step(self._front, self._back, self.boundary, self._work)
+            self._front, self._back = self._back, self._front
+        self.generation += generations
+        return self._front
+
+
+def create_engine(name, board, boundary=FIXED, rule=None):
+    """
+    Create the board backend registered in ENGINES under name.
+    Only engines with supports_rules accept rules other than B3/S23.
+    """
+    try:
+        module_name, class_name = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown engine: {name!r}") from None
+    engine_class = getattr(importlib.import_module(module_name), class_name)
+    compiled = _compile_rule(rule)
+    if compiled is None:
+        return engine_class(board, boundary)
+    if not getattr(engine_class, "supports_rules", False):
+        raise ValueError(f"The {name} engine only runs {LIFE_RULE}, not {compiled}")
+    return engine_class(board, boundary, rule=compiled)
+
+
+class Simulation:
+    """
+    Headless Game of Life run on any of the ENGINES.
+
+    The engine itself is available as the engine attribute for callers that
+    need its full interface (cell editing, windows, dirty regions). rule is
+    a rule string for the engines that support other rules than B3/S23.
+    """
+
+    def __init__(self, board, engine="life", boundary=FIXED, rule=None):
+        self.engine = create_engine(engine, board, boundary, rule)
+
+    @property
+    def generation(self):
+        return self.engine.generation
+
+    def population(self):
+        return self.engine.population()
+
+    def step(self, generations=1):
+        """ Advance the simulation by the given number of generations """
+        self.engine.step(generations)
+
+    def run(self, generations, callback=None, every=1):
+        """
+        Advance the simulation by the given number of generations and return
+        a RunStats with the time it took.
+
+        If callback is given it is called with the simulation every `every`
+        generations; the time spent in it is not counted.
+        """
+        seconds = 0.0
+        remaining = generations
+        while remaining > 0:
+            batch = min(every, remaining) if callback else remaining
+            start = time.perf_counter()
+            self.engine.step(batch)
+            seconds += time.perf_counter() - start
+            remaining -= batch
+            if callback:
+                callback(self)
+        return RunStats(generations, seconds, self.population())
+
+    def snapshot(self):
+        """ Return a Snapshot of the current generation """
+        engine = self.engine
+        if hasattr(engine, "bounding_box"):
+            box = engine.bounding_box()
+            if box is None:
+                return Snapshot(engine.generation, engine.origin, np.zeros((0, 0), dtype=bool))
+            return Snapshot(engine.generation, box[:2], engine.window(*box))
+        return Snapshot(engine.generation, engine.origin, engine.to_array())
@@ -0,0 +1,278 @@
+"""
+Multi-core Game of Life stepping on a board in shared memory.
+
+The board is split into horizontal bands, one per worker process. Both
+buffers of the double-buffered board live in multiprocessing.shared_memory,
+so the workers read their halo rows straight from the current generation
+and nothing is ever pickled. The workers stay alive between steps and
+meet at a barrier once per generation. This module does not depend on pygame.
+
+Usage (scaling benchmark):
+python parallel.py --size 4096 --generations 20
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from lifecore import BOUNDARIES, FIXED, INFINITE, TORUS, _sum_edges
+
+# Command values shared with the workers
+_STOP = -1
+
+
+def _step_band(front, back, start, stop, boundary, work):
+    """
+    Write the next generation of rows start:stop of front into back.
+
+    The rows above and below the band are read directly from front.
+    """
+    rows = front.shape[0]
+    cells = front.view(np.uint8)
+    vertical, counts, mask = (buffer[:stop - start] for buffer in work)
+    wrap = boundary == TORUS
+
+    # Vertical sums: the row itself plus the rows above and below it
+    np.copyto(vertical, cells[start:stop])
+    first = max(start, 1)
+    np.add(vertical[first - start:], cells[first - 1:stop - 1], out=vertical[first - start:])
+    last = min(stop, rows - 1)
+    np.add(vertical[:last - start], cells[start + 1:last + 1], out=vertical[:last - start])
+    if wrap:
+        if start == 0:
+            np.add(vertical[0], cells[-1], out=vertical[0])
+        if stop == rows:
+            np.add(vertical[-1], cells[0], out=vertical[-1])
+
+    # Horizontal sums, including the center cell
+    np.add(vertical[:, :-2], vertical[:, 1:-1], out=counts[:, 1:-1])
+    np.add(counts[:, 1:-1], vertical[:, 2:], out=counts[:, 1:-1])
+    _sum_edges(counts.T, vertical[:, 0], vertical[:, 1], vertical[:, -1], vertical[:, -2], wrap)
+
+    center = front[start:stop]
+    target = back[start:stop]
+    np.equal(counts, 4, out=mask)
+    np.logical_and(mask, center, out=mask)
+    np.equal(counts, 3, out=target)
+    np.logical_or(target, mask, out=target)
+
+    if boundary == FIXED:
+        # The edge cells are frozen
+        target[:, 0] = center[:, 0]
+        target[:, -1] = center[:, -1]
+        if start == 0:
+            target[0] = center[0]
+        if stop == rows:
+            target[-1] = center[-1]
+
+
+def _worker(names, shape, boundary, start, stop, barrier, command):
+    """ Worker process: step one band per generation until told to stop """
+    memories = [shared_memory.SharedMemory(name=name) for name in names]
+    buffers = [np.ndarray(shape, dtype=bool, buffer=memory.buf) for memory in memories]
+    band = (stop - start, shape[1])
+    work = (np.empty(band, dtype=np.uint8), np.empty(band, dtype=np.uint8), np.empty(band, dtype=bool))
+    try:
+        while True:
+            # command holds the number of generations to run and which
+            # buffer holds the current generation
+            barrier.wait()
+            generations, parity = command[0], command[1]
+            if generations == _STOP:
+                break
+            for _ in range(generations):
+                _step_band(buffers[parity], buffers[1 - parity], start, stop, boundary, work)
+                parity = 1 - parity
+                barrier.wait()
+    except threading.BrokenBarrierError:
+        # The engine is shutting down after another process failed
+        pass
+    finally:
+        del buffers
+        for memory in memories:
+            memory.close()
+
+
+class ParallelEngine:
+    """
+    Board backend that steps horizontal bands of the board in a pool of
+    worker processes.
+
+    It has the same get/set/step/window interface as lifecore.LifeEngine.
+    The fixed and torus boundaries are supported. Call close() (or use the
+    engine as a context manager) to stop the workers and free the shared
+    memory; this also happens when the engine is garbage collected.
+    """
+
+    def __init__(self, board, boundary=FIXED, workers=None):
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary mode: {boundary!r}")
+        if boundary == INFINITE:
+            raise ValueError("ParallelEngine does not support the infinite boundary")
+        board = np.asarray(board, dtype=bool)
+        rows, cols = board.shape
+        if rows < 3 or cols < 3:
+            raise ValueError("The board needs at least 3 rows and 3 columns")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, rows))
+        self.boundary = boundary
+        self.workers = workers
+        self.origin = (0, 0)
+        self.generation = 0
+        self._shape = (rows, cols)
+        self._parity = 0
+
+        self._memories = [shared_memory.SharedMemory(create=True, size=rows * cols) for _ in range(2)]
+        self._buffers = [np.ndarray((rows, cols), dtype=bool, buffer=memory.buf)
+                         for memory in self._memories]
+        self._buffers[0][...] = board
+
+        context = multiprocessing.get_context()
+        self._barrier = context.Barrier(workers + 1)
+        self._command = context.RawArray("q", 2)
+        names = [memory.name for memory in self._memories]
+        bounds = np.linspace(0, rows, workers + 1).astype(int)
+        self._processes = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            process = context.Process(target=_worker, daemon=True,
+                                      args=(names, self._shape, boundary, int(start), int(stop),
+                                            self._barrier, self._command))
+            process.start()
+            self._processes.append(process)
+        self._finalizer = weakref.finalize(self, _shutdown, self._processes, self._barrier,
+                                           self._command, self._memories)
+
+    @classmethod
+    def from_array(cls, board, boundary=FIXED):
+        return cls(board, boundary)
+
+    def close(self):
+        """ Stop the workers and release the shared memory """
+        self._buffers = None
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def board(self):
+        """ The current generation as a view into shared memory """
+        return self._buffers[self._parity]
+
+    @property
+    def shape(self):
+        return self._shape
+
+    def get(self, x, y):
+        return bool(self.board[x, y])
+
+    def set(self, x, y, alive):
+        self.board[x, y] = alive
+
+    def clear(self):
+        self.board[...] = False
+
+    def population(self):
+        return int(np.count_nonzero(self.board))
+
+    def to_array(self):
+        return self.board.copy()
+
+    def window(self, x, y, width, height, out=None):
+        """
+        Return the cells in the given rectangle as a bool array.
+        Cells outside the board are dead.
+        """
+        if out is None:
+            out = np.zeros((width, height), dtype=bool)
+        else:
+            out[...] = False
+        rows, cols = self._shape
+        x0, x1 = max(x, 0), min(x + width, rows)
+        y0, y1 = max(y, 0), min(y + height, cols)
+        if x0 < x1 and y0 < y1:
+            out[x0 - x:x1 - x, y0 - y:y1 - y] = self.board[x0:x1, y0:y1]
+        return out
+
+    def step(self, generations=1):
+        """ Advance the board by the given number of generations """
+        if generations <= 0:
+            return self.board
+        self._command[0] = generations
+        self._command[1] = self._parity
+        self._barrier.wait()
+        for _ in range(generations):
+            self._barrier.wait()
+        self._parity = (self._parity + generations) % 2
+        self.generation += generations
+        return self.board
+
+
+def _shutdown(processes, barrier, command, memories):
+    """ Tell the workers to exit, wait for them and free the shared memory """
+    command[0] = _STOP
+    if all(process.is_alive() for process in processes):
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            # A worker died or hung; the ones still waiting are released
+            # and the rest are terminated below
+            barrier.abort()
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for memory in memories:
+        memory.close()
+        memory.unlink()
+
+
+def scaling_benchmark(size=4096, generations=20, density=0.3, boundary=TORUS, max_workers=None):
+    """
+    Time the parallel engine on a size x size random board with 1, 2, 4, ...
+    workers and return a list of (workers, generations per second, speedup)
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    board = np.random.default_rng(0).random((size, size)) < density
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+
+    results = []
+    for workers in counts:
+        with ParallelEngine(board, boundary, workers) as engine:
+            engine.step()
+            start = time.perf_counter()
+            engine.step(generations)
+            rate = generations / (time.perf_counter() - start)
+        results.append((workers, rate, rate / results[0][1] if results else 1.0))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the parallel engine")
+    parser.add_argument("--size", type=int, default=4096, help="width and height of the board")
+    parser.add_argument("--generations", type=int, default=20, help="generations per measurement")
+    parser.add_argument("--workers", type=int, default=None, help="largest number of workers to try")
+    args = parser.parse_args(argv)
+    print(f"{args.size}x{args.size} torus, {args.generations} generations, {os.cpu_count()} CPUs")
+    for workers, rate, speedup in scaling_benchmark(args.size, args.generations,
+                                                    max_workers=args.workers):
+        print(f"{workers:3d} workers: {rate:8.2f} generations/s  speedup {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+Reading and writing patterns in the RLE and plaintext (.cells) formats.
+
+The readers work on whole chunks of the file with NumPy: the run counts,
+tags and cell positions of a chunk are decoded with array operations and
+the live runs are painted straight into the board, so no Python list of
+cells is ever built and multi-megabyte files load in milliseconds.
+
+Cell arrays use the board indexing cells[x, y], where x is the column of
+the file and y the line. This module does not depend on pygame.
+"""
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+
+# A pattern read from a file. cells is the board the pattern was read into,
+# rule the rule string of the file (None if it has none) and comments the
+# text of its comment lines.
+PatternFile = namedtuple("PatternFile", ["cells", "rule", "comments"])
+
+# Bytes of RLE data decoded at a time
+CHUNK_SIZE = 1 << 18
+
+# Lines of a plaintext file decoded at a time
+CELLS_LINES = 1024
+
+# Longest line written to RLE files, as recommended by the format
+RLE_LINE_LENGTH = 70
+
+_RLE_HEADER = re.compile(rb"x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?", re.I)
+
+# RLE tags: "b" and "." are dead, "o" is alive, "A" to "X" are the states
+# of multi-state rules and "$" ends a line
+_NEWLINE = -1
+_INVALID = -2
+_TAGS = np.full(256, _INVALID, dtype=np.int16)
+_TAGS[[ord("b"), ord(".")]] = 0
+_TAGS[ord("o")] = 1
+_TAGS[ord("A"):ord("X") + 1] = np.arange(1, 25)
+_TAGS[ord("$")] = _NEWLINE
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[[9, 10, 13, 32]] = True
+_STATE_CHARS = ".ABCDEFGHIJKLMNOPQRSTUVWX"
+
+
+def _open(source, mode):
+    """ Open a path, or return a file object unchanged (and not owned by us) """
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, mode), True
+    return source, False
+
+
+def _board_dtype(rule):
+    """ bool for two-state rules, uint8 for Generations rules """
+    if rule is None or rule == "B3/S23":
+        return np.dtype(bool)
+    from rules import parse_rule
+    return parse_rule(rule).dtype
+
+
+def _origin(out, width, height, x, y):
+    """ Where a width x height pattern goes on out; centered by default """
+    if x is None:
+        x = (out.shape[0] - width) // 2
+    if y is None:
+        y = (out.shape[1] - height) // 2
+    return x, y
+
+
+def _paste(out, cells, x, y):
+    """ Add the live cells of cells to out with cells[0, 0] at (x, y), clipped to out """
+    width, height = cells.shape
+    x0, x1 = max(x, 0), min(x + width, out.shape[0])
+    y0, y1 = max(y, 0), min(y + height, out.shape[1])
+    if x0 < x1 and y0 < y1:
+        region = out[x0:x1, y0:y1]
+        np.maximum(region, cells[x0 - x:x1 - x, y0 - y:y1 - y], out=region, casting="unsafe")
+
+
+def _paint_runs(out, ys, xs, lengths, values):
+    """
+    Set the horizontal runs of cells (xs[i] .. xs[i] + lengths[i] - 1, ys[i])
+    of out to values[i], clipping them to out. The runs must not overlap.
+    """
+    width, height = out.shape
+    lo = np.clip(xs, 0, width)
+    hi = np.clip(xs + lengths, 0, width)
+    keep = (ys >= 0) & (ys < height) & (lo < hi)
+    if not keep.any():
+        return
+    ys, lo, hi, values = ys[keep], lo[keep], hi[keep], values[keep]
+    first, last = ys.min(), ys.max()
+    # Mark where each run starts and stops in a (rows, width + 1) grid of
+    # bytes and fill the runs in with a cumulative sum. The runs do not
+    # overlap, so no two runs start (or stop) at the same place, and the
+    # sum wrapping around in uint8 still comes back to each run's value.
+    stride = width + 1
+    row_starts = (ys - first) * stride
+    values = values.astype(np.uint8)
+    marks = np.zeros((last - first + 1) * stride, dtype=np.uint8)
+    marks[row_starts + lo] += values
+    marks[row_starts + hi] -= values
+    np.cumsum(marks, dtype=np.uint8, out=marks)
+    filled = marks.reshape(-1, stride)[:, :width].T
+    region = out[:, first:last + 1]
+    np.maximum(region, filled, out=region, casting="unsafe")
+
+
+class _RunDecoder:
+    """ Decodes the body of an RLE file chunk by chunk, keeping the position between chunks """
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self._carry = b""
+
+    def decode(self, chunk):
+        """ Return the live runs in chunk as arrays (ys, xs, lengths, values) """
+        data = np.frombuffer(self._carry + chunk, dtype=np.uint8)
+        data = data[~_WHITESPACE[data]]
+        is_digit = (data >= ord("0")) & (data <= ord("9"))
+        tags = np.flatnonzero(~is_digit)
+        # Digits after the last tag belong to a run of the next chunk
+        end = tags[-1] + 1 if len(tags) else 0
+        self._carry = data[end:].tobytes()
+        if not len(tags):
+            return None
+
+        values = _TAGS[data[tags]]
+        if (values == _INVALID).any():
+            bad = chr(data[tags[np.argmax(values == _INVALID)]])
+            raise ValueError(f"Unexpected {bad!r} in RLE data")
+
+        # Each tag is preceded by the digits of its run count, if any.
+        # Add up the digits one decimal place at a time, only looking at the
+        # tags that still have digits left.
+        num_digits = np.diff(tags, prepend=-1) - 1
+        counts = np.ones(len(tags), dtype=np.int64)
+        with_digits = np.flatnonzero(num_digits)
+        counts[with_digits] = 0
+        place = 0
+        while len(with_digits):
+            digits = data[tags[with_digits] - 1 - place].astype(np.int64) - ord("0")
+            counts[with_digits] += digits * 10 ** place
+            place += 1
+            with_digits = with_digits[num_digits[with_digits] > place]
+
+        newline = values == _NEWLINE
+        line_feeds = np.where(newline, counts, 0)
+        advance = np.where(newline, 0, counts)
+        ys = np.cumsum(line_feeds)
+        ys -= line_feeds
+        ys += self.y
+        # x is counted from the last line end before each run. The running
+        # total only grows, so its value at the last line end is a running max.
+        xs = np.cumsum(advance)
+        xs -= advance
+        xs -= np.maximum.accumulate(np.where(newline, xs, 0))
+        first_newline = np.argmax(newline) if newline.any() else len(tags)
+        xs[:first_newline] += self.x
+
+        self.y = int(ys[-1] + line_feeds[-1])
+        self.x = int(xs[-1] + advance[-1])
+        live = values > 0
+        return ys[live], xs[live], counts[live], values[live]
+
+
+def read_rle(source, out=None, x=None, y=None):
+    """
+    Read an RLE file (a path or a binary file object) and return a PatternFile.
+
+    The pattern is painted into out, with its top left corner at (x, y) or
+    centered when no position is given; cells that fall outside are dropped
+    and existing live cells are kept. Without out a board just large enough
+    for the pattern is created.
+    """
+    f, owned = _open(source, "rb")
+    try:
+        comments = []
+        header = None
+        while header is None:
+            line = f.readline()
+            if not line:
+                break
+            stripped = line.strip()
+            if stripped.startswith(b"#"):
+                comments.append(stripped[2:].strip().decode("utf-8", "replace"))
+            elif stripped:
+                header = _RLE_HEADER.match(stripped)
+                if header is None:
+                    raise ValueError("The RLE header line (x = ..., y = ...) is missing")
+        if header is None:
+            raise ValueError("The RLE header line (x = ..., y = ...) is missing")
+        width, height = int(header[1]), int(header[2])
+        # Golly adds the topology of its bounded grids to the rule, as in
+        # B3/S23:T80,80; the board's edges are chosen separately here
+        rule = header[3].decode().split(":")[0] or None if header[3] else None
+        if out is None:
+            out = np.zeros((width, height), dtype=_board_dtype(rule))
+        x, y = _origin(out, width, height, x, y)
+
+        decoder = _RunDecoder()
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            done = not chunk
+            end = chunk.find(b"!")
+            if end >= 0:
+                chunk, done = chunk[:end], True
+            runs = decoder.decode(chunk)
+            if runs is not None:
+                ys, xs, lengths, values = runs
+                _paint_runs(out, ys + y, xs + x, lengths, values)
+            if done:
+                break
+        return PatternFile(out, rule, comments)
+    finally:
+        if owned:
+            f.close()
+
+
+def _cells_lines(f):
+    """ Yield (is_comment, text) for each line of a plaintext file; comments lose their "!" """
+    for line in f:
+        line = line.rstrip(b"\r\n")
+        if line.startswith(b"!"):
+            yield True, line[1:].strip()
+        else:
+            yield False, line.rstrip()
+
+
+def read_cells(source, out=None, x=None, y=None):
+    """
+    Read a plaintext .cells file (a path or a seekable binary file object)
+    and return a PatternFile. out, x and y work as in read_rle().
+
+    The file is read line by line, twice: once for the size of the pattern
+    and once to paint CELLS_LINES rows at a time into out.
+    """
+    f, owned = _open(source, "rb")
+    try:
+        start = f.tell()
+        comments = []
+        width = height = 0
+        for is_comment, line in _cells_lines(f):
+            if is_comment:
+                comments.append(line.decode("utf-8", "replace"))
+            else:
+                width = max(width, len(line))
+                height += 1
+        if out is None:
+            out = np.zeros((width, height), dtype=bool)
+        x, y = _origin(out, width, height, x, y)
+
+        f.seek(start)
+        rows = []
+        row_y = y
+        for is_comment, line in _cells_lines(f):
+            if not is_comment:
+                rows.append(line)
+            if len(rows) == CELLS_LINES:
+                _paste_lines(out, rows, x, row_y)
+                row_y += len(rows)
+                rows = []
+        _paste_lines(out, rows, x, row_y)
+    finally:
+        if owned:
+            f.close()
+    return PatternFile(out, None, comments)
+
+
+def _paste_lines(out, rows, x, y):
+    """ Add the live cells of plaintext rows to out, the first row's first cell at (x, y) """
+    width = max((len(row) for row in rows), default=0)
+    if not width:
+        return
+    text = np.frombuffer(b"".join(row.ljust(width, b".") for row in rows), dtype=np.uint8)
+    cells = ((text == ord("O")) | (text == ord("*"))).reshape(len(rows), width).T
+    _paste(out, cells, x, y)
+
+
+def _format(source):
+    """ Work out whether source is an RLE or a plaintext file from its name """
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    extension = os.path.splitext(os.fspath(name))[1].lower()
+    if extension == ".rle":
+        return "rle"
+    if extension in (".cells", ".txt"):
+        return "cells"
+    raise ValueError(f"Unknown pattern file type: {name!r} (expected .rle or .cells)")
+
+
+def read_pattern(source, out=None, x=None, y=None):
+    """ Read a .rle or .cells file, chosen by the file name """
+    if _format(source) == "rle":
+        return read_rle(source, out, x, y)
+    return read_cells(source, out, x, y)
+
+
+def _row_runs(row):
+    """ Return the (length, state) runs of a row, without its trailing dead cells """
+    live = np.flatnonzero(row)
+    if not len(live):
+        return []
+    row = row[:live[-1] + 1]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(row)) + 1))
+    lengths = np.diff(np.append(starts, len(row)))
+    return list(zip(lengths.tolist(), row[starts].tolist()))
+
+
+def write_rle(target, cells, rule="B3/S23", comments=()):
+    """ Write cells (indexed [x, y]) to an RLE file, a path or a binary file object """
+    cells = np.asarray(cells)
+    width, height = cells.shape
+    if cells.dtype == bool:
+        chars = "bo"
+        rows = cells.T.view(np.uint8)
+    else:
+        chars = _STATE_CHARS
+        rows = cells.T
+    lines = [f"#C {comment}" for comment in comments]
+    lines.append(f"x = {width}, y = {height}, rule = {rule}")
+
+    tokens = []
+    line_feeds = 0
+    for row in rows:
+        runs = _row_runs(row)
+        if not runs:
+            line_feeds += 1
+            continue
+        if line_feeds:
+            tokens.append(f"{line_feeds}$" if line_feeds > 1 else "$")
+        line_feeds = 1
+        for length, state in runs:
+            tokens.append(f"{length}{chars[state]}" if length > 1 else chars[state])
+    tokens.append("!")
+
+    line = ""
+    for token in tokens:
+        if len(line) + len(token) > RLE_LINE_LENGTH:
+            lines.append(line)
+            line = ""
+        line += token
+    lines.append(line)
+
+    f, owned = _open(target, "wb")
+    try:
+        f.write(("\n".join(lines) + "\n").encode())
+    finally:
+        if owned:
+            f.close()
+
+
+def write_cells(target, cells, name=None):
+    """ Write cells (indexed [x, y]) to a plaintext .cells file, a path or a binary file object """
+    cells = np.asarray(cells, dtype=bool)
+    lines = [f"!Name: {name}".encode()] if name else []
+    text = np.where(cells.T, ord("O"), ord(".")).astype(np.uint8)
+    lines.extend(row.tobytes().rstrip(b".") for row in text)
+    f, owned = _open(target, "wb")
+    try:
+        f.write(b"\n".join(lines) + b"\n")
+    finally:
+        if owned:
+            f.close()
+
+
+def write_pattern(target, cells, rule="B3/S23"):
+    """ Write a .rle or .cells file, chosen by the file name """
+    if _format(target) == "rle":
+        write_rle(target, cells, rule)
+    else:
+        write_cells(target, cells)
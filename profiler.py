@@ -0,0 +1,163 @@
+"""
+Per-frame timing of the main loop.
+
+A FrameProfiler splits every frame into phases (handling events, stepping,
+rendering, ...) with one clock reading per phase, keeps the last frames in
+a ring buffer for rolling percentiles and can write every frame to a CSV
+or JSON trace for analysis elsewhere, e.g. after a session on a phone.
+When profiling is off the main loop talks to a NullProfiler, whose methods
+do nothing. This module does not depend on pygame.
+"""
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+# The phases of a frame, in the order the main loop runs them
+PHASES = ("events", "step", "render", "buttons", "hud", "display", "idle")
+
+# Frames kept for the rolling statistics
+DEFAULT_HISTORY = 240
+
+# Trace rows written to the file at a time
+TRACE_BATCH = 120
+
+
+class NullProfiler:
+    """ Stands in for a FrameProfiler when profiling is off """
+
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def end_frame(self, generations=0, generation=0):
+        pass
+
+    def close(self):
+        pass
+
+
+class FrameProfiler:
+    """
+    Times the phases of each frame.
+
+    Call begin_frame() at the top of the loop, lap(phase) at the end of each
+    phase (the time since the previous lap is charged to it) and end_frame()
+    at the bottom. trace is the path of a .csv or .json file to write every
+    frame to, or None.
+    """
+
+    enabled = True
+
+    def __init__(self, history=DEFAULT_HISTORY, trace=None, clock=time.perf_counter):
+        self._clock = clock
+        self._times = np.zeros((history, len(PHASES)))
+        self._frame_starts = np.zeros(history)
+        self._generations = np.zeros(history)
+        self._current = np.zeros(len(PHASES))
+        self._columns = {phase: index for index, phase in enumerate(PHASES)}
+        self.frames = 0
+        self._last = None
+        self._frame_start = None
+        self._trace = _TraceWriter(trace) if trace else None
+
+    def begin_frame(self):
+        self._frame_start = self._last = self._clock()
+        self._current[:] = 0
+
+    def lap(self, phase):
+        now = self._clock()
+        self._current[self._columns[phase]] += now - self._last
+        self._last = now
+
+    def end_frame(self, generations=0, generation=0):
+        """ Record the frame; generations is how many were run in it and generation the current one """
+        row = self.frames % len(self._times)
+        self._times[row] = self._current
+        self._frame_starts[row] = self._frame_start
+        self._generations[row] = generations
+        self.frames += 1
+        if self._trace is not None:
+            self._trace.write(self.frames, self._frame_start, self._current, generations, generation)
+
+    def _recent(self):
+        return min(self.frames, len(self._times))
+
+    def percentiles(self, phase, q=(50, 95)):
+        """ The given percentiles of the time of a phase over the recent frames, in milliseconds """
+        count = self._recent()
+        if not count:
+            return [0.0] * len(q)
+        return (1000 * np.percentile(self._times[:count, self._columns[phase]], q)).tolist()
+
+    def _span(self):
+        """ Seconds between the first and last recent frame starts, and the frames in between """
+        count = self._recent()
+        if count < 2:
+            return 0.0, 0
+        newest = (self.frames - 1) % len(self._times)
+        oldest = self.frames % len(self._times) if self.frames > len(self._times) else 0
+        return self._frame_starts[newest] - self._frame_starts[oldest], count - 1
+
+    def fps(self):
+        seconds, frames = self._span()
+        return frames / seconds if seconds > 0 else 0.0
+
+    def generations_per_second(self):
+        seconds, frames = self._span()
+        if seconds <= 0:
+            return 0.0
+        # The generations of the newest frame ran after its start
+        newest = (self.frames - 1) % len(self._times)
+        return (self._generations[:self._recent()].sum() - self._generations[newest]) / seconds
+
+    def close(self):
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+
+class _TraceWriter:
+    """ Writes frame timings to a CSV or JSON file in batches """
+
+    def __init__(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in (".csv", ".json"):
+            raise ValueError(f"Unknown trace file type: {path!r} (expected .csv or .json)")
+        self._json = extension == ".json"
+        self._file = open(path, "w", newline="")
+        self._rows = []
+        self._first = True
+        self._fields = ["frame", "start"] + [f"{phase}_ms" for phase in PHASES] + ["generations", "generation"]
+        if self._json:
+            self._file.write("[\n")
+        else:
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self._fields)
+
+    def write(self, frame, start, times, generations, generation):
+        self._rows.append([frame, round(start, 6)] + [round(1000 * t, 4) for t in times]
+                          + [int(generations), int(generation)])
+        if len(self._rows) >= TRACE_BATCH:
+            self._flush()
+
+    def _flush(self):
+        if self._json:
+            for row in self._rows:
+                self._file.write(("" if self._first else ",\n") + json.dumps(dict(zip(self._fields, row))))
+                self._first = False
+        else:
+            self._csv.writerows(self._rows)
+        self._rows.clear()
+
+    def close(self):
+        self._flush()
+        if self._json:
+            self._file.write("\n]\n")
+        self._file.close()
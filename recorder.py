@@ -0,0 +1,333 @@
+"""
+Record a simulation to an animated GIF, numbered PNG files or a video,
+without a window.
+
+Each recorded generation is copied out of the engine into one of a few
+reusable buffers and handed to a background thread, which scales it up
+with NumPy and encodes it while the next generations are computed. The
+buffers are the only frames kept, so memory stays the same however long
+the recording. PNG files are written with zlib alone; GIF output needs
+Pillow for its LZW encoder, and video output a local ffmpeg, which is fed
+raw RGB frames through a pipe (or use --output - to write the raw frames
+to stdout). This module does not depend on pygame.
+
+Usage:
+python recorder.py --pattern gosper-gun --generations 300 --scale 4 --output gun.gif
+python recorder.py --pattern random --size 256 --boundary torus --every 2 --output frames/soup.png
+python recorder.py --pattern random --size 540 --generations 3000 --scale 2 --output soup.mp4
+"""
+import argparse
+import os
+import queue
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from lifecore import BOUNDARIES, ENGINES, FIXED, INFINITE, LIFE_RULE, Simulation
+from patterns import PATTERNS
+from rules import parse_rule
+
+# Colors of dead and live cells, as in the game
+DEAD_COLOR = (0, 0, 0)
+ALIVE_COLOR = (255, 255, 255)
+
+# Frames waiting to be rendered; the simulation waits when they are all taken
+QUEUE_FRAMES = 8
+
+# Video formats handed to ffmpeg
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov", ".webm", ".avi")
+
+
+def palette(states=2):
+    """
+    Return the color of every cell state. The dying states of Generations
+    rules fade from ALIVE_COLOR towards DEAD_COLOR, in the shades the game
+    draws densities with.
+    """
+    if states == 2:
+        return [DEAD_COLOR, ALIVE_COLOR]
+    # State 1 is alive; state s fades to (states - s) / (states - 1)
+    levels = np.concatenate(([0.0], (states - np.arange(1, states)) / (states - 1)))[:, None]
+    shades = np.rint(np.add(DEAD_COLOR, levels * np.subtract(ALIVE_COLOR, DEAD_COLOR)))
+    return [tuple(int(c) for c in shade) for shade in shades]
+
+
+def scale_up(cells, scale, out=None):
+    """
+    Turn a board (indexed [x, y]) of bool cells or uint8 states into an
+    image (indexed [row, column]) of palette indices, with every cell a
+    scale x scale square
+    """
+    width, height = cells.shape
+    if out is None:
+        out = np.empty((height * scale, width * scale), dtype=np.uint8)
+    # Broadcasting writes every cell into its square in one pass
+    blocks = out.reshape(height, scale, width, scale)
+    blocks[...] = cells.T.view(np.uint8)[:, None, :, None]
+    return out
+
+
+class PngWriter:
+    """
+    Writes each frame to its own palette PNG. The frame number is added to
+    the file name: frames/soup.png becomes frames/soup-000000.png, ...
+    """
+
+    def __init__(self, path, width, height, palette, level=6):
+        self._base, self._extension = os.path.splitext(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.width, self.height = width, height
+        self.level = level
+        self.frames = 0
+        self._header = (struct.pack(">8s", b"\x89PNG\r\n\x1a\n")
+                        + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+                        + _chunk(b"PLTE", np.asarray(palette, dtype=np.uint8).tobytes()))
+        # Every row starts with its filter type, 0
+        self._rows = np.zeros((height, width + 1), dtype=np.uint8)
+
+    def write(self, image):
+        self._rows[:, 1:] = image
+        data = zlib.compress(self._rows.tobytes(), self.level)
+        with open(f"{self._base}-{self.frames:06d}{self._extension}", "wb") as f:
+            f.write(self._header + _chunk(b"IDAT", data) + _chunk(b"IEND", b""))
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+class GifWriter:
+    """
+    Writes frames to an animated GIF that loops forever, one frame at a
+    time. Each frame is compressed by Pillow's LZW encoder.
+    """
+
+    def __init__(self, path, width, height, palette, fps=30):
+        try:
+            from PIL import GifImagePlugin, Image
+        except ImportError:
+            raise ImportError("GIF output needs Pillow: pip install pillow") from None
+        self._image_module, self._gif = Image, GifImagePlugin
+        self.width, self.height = width, height
+        # Delays are whole hundredths of a second
+        self.delay = max(1, round(100 / fps))
+        self.frames = 0
+        # The global color table has a power of two entries
+        colors = np.zeros((256, 3), dtype=np.uint8)
+        colors[:len(palette)] = palette
+        bits = max(1, (len(palette) - 1).bit_length())
+        self._file = open(path, "wb")
+        self._file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0x80 | (bits - 1), 0, 0)
+                         + colors[:1 << bits].tobytes()
+                         + b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", 0) + b"\x00")
+
+    def write(self, image):
+        # The pixels are indices into the global color table
+        frame = self._image_module.frombuffer("P", (self.width, self.height), image, "raw", "P", 0, 1)
+        self._file.write(b"\x21\xf9\x04\x00" + struct.pack("<H", self.delay) + b"\x00\x00")
+        for data in self._gif.getdata(frame):
+            self._file.write(data)
+        self.frames += 1
+
+    def close(self):
+        self._file.write(b"\x3b")
+        self._file.close()
+
+
+class RawWriter:
+    """
+    Writes frames as raw RGB bytes to a stream, or through a pipe to ffmpeg
+    when a video file is asked for
+    """
+
+    def __init__(self, path, width, height, palette, fps=30, ffmpeg="ffmpeg"):
+        self.width, self.height = width, height
+        self._palette = np.asarray(palette, dtype=np.uint8)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self.frames = 0
+        self._process = None
+        if path == "-":
+            self._stream = sys.stdout.buffer
+        else:
+            # yuv420p, which every player understands, needs even sizes
+            command = [ffmpeg, "-loglevel", "error", "-y",
+                       "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+                       "-i", "-", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", path]
+            try:
+                self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            except FileNotFoundError:
+                raise RuntimeError(f"Video output needs ffmpeg, which was not found as {ffmpeg!r}") from None
+            self._stream = self._process.stdin
+
+    def write(self, image):
+        np.take(self._palette, image, axis=0, out=self._rgb)
+        self._stream.write(self._rgb.data)
+        self.frames += 1
+
+    def close(self):
+        self._stream.flush()
+        if self._process is not None:
+            self._stream.close()
+            if self._process.wait():
+                raise RuntimeError(f"ffmpeg failed with exit code {self._process.returncode}")
+
+
+def create_writer(path, width, height, palette, fps=30, ffmpeg="ffmpeg"):
+    """ Pick the writer for an output path: .gif, .png, a video file, or - for raw RGB on stdout """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".gif":
+        return GifWriter(path, width, height, palette, fps)
+    if extension == ".png":
+        return PngWriter(path, width, height, palette)
+    if path == "-" or extension in VIDEO_EXTENSIONS:
+        return RawWriter(path, width, height, palette, fps, ffmpeg)
+    raise ValueError(f"Unknown output type: {path!r} (expected .gif, .png, a video file or -)")
+
+
+class Recorder:
+    """
+    Renders and encodes frames on a background thread.
+
+    add() copies the cells of a window of an engine into a free buffer and
+    queues it (dtype is that of the engine's cells, uint8 for the states of
+    Generations rules); the thread scales it up, hands it to the writer and frees the
+    buffer again. With every buffer in the queue, add() waits for the
+    thread. close() finishes the queued frames and closes the writer;
+    errors of the thread are raised by the next add() or by close().
+    """
+
+    def __init__(self, writer, window, scale=1, queue_frames=QUEUE_FRAMES, dtype=bool):
+        self.writer = writer
+        self.window = tuple(window)
+        self.scale = scale
+        self._free = queue.Queue()
+        for _ in range(queue_frames):
+            self._free.put(np.zeros(self.window[2:], dtype=dtype))
+        self._queued = queue.Queue()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        width, height = self.window[2:]
+        image = np.empty((height * self.scale, width * self.scale), dtype=np.uint8)
+        while True:
+            cells = self._queued.get()
+            if cells is None:
+                return
+            if self._error is None:
+                try:
+                    self.writer.write(scale_up(cells, self.scale, image))
+                except Exception as error:
+                    self._error = error
+            self._free.put(cells)
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def add(self, engine):
+        """ Queue the window of the engine's cells as the next frame """
+        self._check()
+        cells = self._free.get()
+        engine.window(*self.window, out=cells)
+        self._queued.put(cells)
+
+    def close(self):
+        self._queued.put(None)
+        self._thread.join()
+        try:
+            self._check()
+        finally:
+            # Stop ffmpeg and close the file even when a frame failed
+            self.writer.close()
+
+
+def record(simulation, writer, generations, every=1, window=None, scale=1):
+    """
+    Record the current generation and then every every-th one until
+    generations have run. window is the (x, y, width, height) rectangle of
+    the universe to record and defaults to the whole board. Returns the
+    number of frames.
+    """
+    engine = simulation.engine
+    if window is None:
+        window = (0, 0, *engine.shape)
+    rule = parse_rule(getattr(engine, "rule", LIFE_RULE))
+    recorder = Recorder(writer, window, scale, dtype=rule.dtype)
+    frames = 0
+    try:
+        recorder.add(engine)
+        frames += 1
+        for _ in range(generations // every):
+            simulation.step(every)
+            recorder.add(engine)
+            frames += 1
+    finally:
+        recorder.close()
+    return frames
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", required=True,
+                        help="file to write: .gif, .png (one numbered file per frame), a video "
+                             "file such as .mp4 (needs ffmpeg), or - for raw RGB frames on stdout")
+    parser.add_argument("--pattern", default="r-pentomino", choices=sorted(PATTERNS) + ["random"],
+                        help="starting pattern, placed in the middle of the board")
+    parser.add_argument("--file", default=None,
+                        help="read the starting pattern from an .rle or .cells file instead")
+    parser.add_argument("--generations", type=int, default=500, help="number of generations to run")
+    parser.add_argument("--every", type=int, default=1, help="record every this many generations")
+    parser.add_argument("--size", type=int, default=80, help="width and height of the board in cells")
+    parser.add_argument("--density", type=float, default=0.5, help="fraction of live cells in a random soup")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the soup")
+    parser.add_argument("--engine", default="life", choices=sorted(ENGINES), help="board backend")
+    parser.add_argument("--boundary", default=FIXED, choices=BOUNDARIES,
+                        help="what happens at the edge of the board")
+    parser.add_argument("--rule", default=None,
+                        help="rule string or name; defaults to the rule of the --file pattern, or B3/S23")
+    parser.add_argument("--scale", type=int, default=4, help="pixels per cell side")
+    parser.add_argument("--fps", type=int, default=30, help="frames per second of the GIF or video")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="ffmpeg executable for video output")
+    args = parser.parse_args(argv)
+    if args.engine == "hashlife":
+        args.boundary = INFINITE
+    return args
+
+
+def main(argv=None):
+    from simulate import build_board, read_board
+
+    args = parse_args(argv)
+    # Raw frames go to stdout, so messages go to stderr
+    log = sys.stderr if args.output == "-" else sys.stdout
+    if args.file:
+        board, file_rule = read_board(args)
+    else:
+        board, file_rule = build_board(args), None
+    args.rule = args.rule or file_rule or LIFE_RULE
+    simulation = Simulation(board, args.engine, args.boundary, args.rule)
+    width, height = board.shape
+    writer = create_writer(args.output, width * args.scale, height * args.scale,
+                           palette(parse_rule(args.rule).states), args.fps, args.ffmpeg)
+    start = time.perf_counter()
+    frames = record(simulation, writer, args.generations, args.every, (0, 0, width, height), args.scale)
+    seconds = time.perf_counter() - start
+    print(f"{frames} frames of {width * args.scale}x{height * args.scale} pixels written to {args.output} "
+          f"in {seconds:.2f} s ({frames / seconds:.0f} frames/s)", file=log)
+
+
+if __name__ == "__main__":
+    main()
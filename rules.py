@@ -0,0 +1,322 @@
+"""
+Cellular automaton rules beyond Conway's Game of Life.
+
+A rule is parsed once and compiled into a lookup table indexed by the state
+of a cell and the number of live cells in its neighborhood, so a step is a
+neighborhood sum followed by a single table lookup, with no per-cell
+branching. Three families of rules are understood:
+
+- Life-like rules in B/S notation, e.g. "B3/S23" (Life), "B36/S23"
+  (HighLife), or the older S/B form "23/36".
+- Generations rules, e.g. "B2/S/C3" (Brian's Brain) or "/2/3". State 1 is
+  alive; states 2 and up are dying cells that fade by one state each
+  generation and do not count as live neighbors.
+- Larger than Life rules in the notation used by Golly, e.g. Bosco's rule
+  "R5,C0,M1,S34..58,B34..45,NM". The neighborhood is the square of cells
+  within range r, summed with a summed-area table so a step costs the same
+  for any range.
+
+Boards of two-state rules are bool arrays, like everywhere else; boards of
+Generations rules are uint8 arrays of states. This module does not depend
+on pygame.
+"""
+import functools
+
+import numpy as np
+
+from lifecore import BOUNDARIES, FIXED, TORUS, _freeze_edges, _neighbor_totals, _work_buffers
+
+# Well-known rules that can be given by name
+NAMED_RULES = {
+    "life": "B3/S23",
+    "highlife": "B36/S23",
+    "seeds": "B2/S",
+    "day-and-night": "B3678/S34678",
+    "brians-brain": "B2/S/C3",
+    "star-wars": "B2/S345/C4",
+    "bosco": "R5,C0,M1,S34..58,B34..45,NM",
+}
+
+
+class Rule:
+    """
+    A compiled rule.
+
+    birth and survival are the numbers of live neighbors (the cell itself
+    not included) for which a dead cell is born and a live cell survives.
+    states is 2 for Life-like rules and more for Generations rules, and
+    radius is the range of the square neighborhood.
+    """
+
+    def __init__(self, birth, survival, states=2, radius=1):
+        if states < 2 or states > 256:
+            raise ValueError("A rule needs between 2 and 256 states")
+        if radius < 1:
+            raise ValueError("The neighborhood range must be at least 1")
+        self.neighbors = (2 * radius + 1) ** 2 - 1
+        for count in (*birth, *survival):
+            if not 0 <= count <= self.neighbors:
+                raise ValueError(f"A range {radius} cell cannot have {count} neighbors")
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+        self.states = states
+        self.radius = radius
+        self.dtype = np.dtype(bool) if states == 2 else np.dtype(np.uint8)
+        self.table = self._compile()
+
+    def _compile(self):
+        """
+        Build the flat lookup table. Entry state * (neighbors + 2) + total is
+        the next state of a cell in the given state whose neighborhood,
+        itself included, holds total live cells.
+        """
+        totals = np.arange(self.neighbors + 2)
+        table = np.zeros((self.states, len(totals)), dtype=self.dtype)
+        table[0] = np.isin(totals, list(self.birth))
+        # A live cell counts itself in the total
+        survives = np.isin(totals - 1, list(self.survival))
+        table[1] = np.where(survives, 1, 2 % self.states)
+        for state in range(2, self.states):
+            table[state] = (state + 1) % self.states
+        return table.ravel()
+
+    @property
+    def is_life(self):
+        """ True for Conway's B3/S23 """
+        return self._key() == (frozenset({3}), frozenset({2, 3}), 2, 1)
+
+    def _key(self):
+        return (self.birth, self.survival, self.states, self.radius)
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __str__(self):
+        if self.radius == 1:
+            text = f"B{_digits(self.birth)}/S{_digits(self.survival)}"
+            return text if self.states == 2 else f"{text}/C{self.states}"
+        states = 0 if self.states == 2 else self.states
+        return (f"R{self.radius},C{states},M0,S{_ranges(self.survival)},"
+                f"B{_ranges(self.birth)},NM")
+
+    def __repr__(self):
+        return f"Rule({str(self)!r})"
+
+    def work_buffers(self, shape):
+        """ Allocate the scratch arrays used by step() on a board of the given shape """
+        rows, cols = shape
+        live = np.empty(shape, dtype=np.uint8) if self.states > 2 else None
+        if self.radius == 1:
+            totals = _work_buffers(shape)
+        else:
+            size = 2 * self.radius + 1
+            dtype = np.int32 if (rows + size) * (cols + size) < 2 ** 31 else np.int64
+            totals = (np.zeros((rows + size, cols + size), dtype=dtype),
+                      np.empty(shape, dtype=dtype))
+        index = np.empty(shape, dtype=np.intp)
+        return live, totals, index
+
+    def step(self, board, out=None, boundary=FIXED, work=None):
+        """
+        Write the next generation of board into out and return it.
+
+        out may be board itself. work is the result of work_buffers() and is
+        allocated when not given. The boundaries behave as in
+        lifecore.game_of_life(): with the fixed boundary the outer ring of
+        cells is frozen and everything past it is dead.
+        """
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary mode: {boundary!r}")
+        if out is None:
+            out = np.empty(board.shape, dtype=self.dtype)
+        rows, cols = board.shape
+        if rows < 3 or cols < 3:
+            if boundary != FIXED:
+                raise ValueError("The board needs at least 3 rows and 3 columns")
+            if out is not board:
+                out[...] = board
+            return out
+        size = 2 * self.radius + 1
+        if boundary == TORUS and (rows < size or cols < size):
+            raise ValueError(f"A range {self.radius} torus needs at least {size} rows and columns")
+
+        if work is None:
+            work = self.work_buffers(board.shape)
+        live, totals_work, index = work
+        cells = board.view(np.uint8)
+        if live is None:
+            live = cells
+        else:
+            np.equal(board, 1, out=live.view(bool))
+
+        fixed = boundary == FIXED
+        if self.radius == 1:
+            totals = _neighbor_totals(live, totals_work, boundary)
+        else:
+            totals = _box_totals(live, self.radius, boundary, *totals_work)
+            if fixed:
+                totals = totals[1:-1, 1:-1]
+        if fixed:
+            center = cells[1:-1, 1:-1]
+            target = out[1:-1, 1:-1]
+            index = index[:rows - 2, :cols - 2]
+        else:
+            center = cells
+            target = out
+
+        np.multiply(center, np.intp(self.neighbors + 2), out=index)
+        np.add(index, totals, out=index)
+        np.take(self.table, index, out=target, mode="clip")
+
+        if fixed and out is not board:
+            _freeze_edges(board, out)
+        return out
+
+
+def _box_totals(live, radius, boundary, table, totals):
+    """
+    Sum the live cells in the square of the given radius around every cell
+    using a summed-area table.
+
+    table must have 2 * radius + 1 more rows and columns than live, with a
+    first row and column of zeros; totals receives the sums.
+    """
+    rows, cols = live.shape
+    size = 2 * radius + 1
+    padded = table[1:, 1:]
+    padded[radius:radius + rows, radius:radius + cols] = live
+    if boundary == TORUS:
+        padded[radius:radius + rows, :radius] = live[:, cols - radius:]
+        padded[radius:radius + rows, radius + cols:] = live[:, :radius]
+        padded[:radius] = padded[rows:rows + radius]
+        padded[radius + rows:] = padded[radius:2 * radius]
+    else:
+        padded[radius:radius + rows, :radius] = 0
+        padded[radius:radius + rows, radius + cols:] = 0
+        padded[:radius] = 0
+        padded[radius + rows:] = 0
+    np.cumsum(padded, axis=0, out=padded)
+    np.cumsum(padded, axis=1, out=padded)
+
+    np.subtract(table[size:, size:], table[:-size, size:], out=totals)
+    np.subtract(totals, table[size:, :-size], out=totals)
+    np.add(totals, table[:-size, :-size], out=totals)
+    return totals
+
+
+def _digits(counts):
+    return "".join(str(count) for count in sorted(counts))
+
+
+def _ranges(counts):
+    """ Write a set of counts as Golly ranges, e.g. "2..3,5" """
+    parts = []
+    for count in sorted(counts):
+        if parts and parts[-1][1] == count - 1:
+            parts[-1][1] = count
+        else:
+            parts.append([count, count])
+    return ",".join(f"{lo}..{hi}" if hi > lo else str(lo) for lo, hi in parts)
+
+
+def _parse_digits(text):
+    if not text.isdigit() and text:
+        raise ValueError(f"expected neighbor counts, got {text!r}")
+    return {int(char) for char in text}
+
+
+def _parse_bs(text):
+    parts = text.split("/")
+    if not 2 <= len(parts) <= 3:
+        raise ValueError("expected B.../S... or S/B notation")
+    if all(part == "" or part[0].isdigit() for part in parts):
+        # The older S/B form, with an optional number of states
+        fields = dict(zip("SBC", parts))
+    else:
+        fields = {}
+        for part in parts:
+            key = part[:1]
+            if key not in ("B", "S", "C", "G") or key in fields:
+                raise ValueError(f"unexpected {part!r}")
+            fields["C" if key == "G" else key] = part[1:]
+        if "B" not in fields or "S" not in fields:
+            raise ValueError("both B and S are needed")
+    states = fields.get("C") or "2"
+    if not states.isdigit():
+        raise ValueError(f"expected a number of states, got {states!r}")
+    birth = _parse_digits(fields["B"])
+    survival = _parse_digits(fields["S"])
+    if max((*birth, *survival), default=0) > 8:
+        raise ValueError("a cell has at most 8 neighbors")
+    return Rule(birth, survival, int(states))
+
+
+def _parse_ranges(values):
+    counts = set()
+    for value in values:
+        if not value:
+            continue
+        lo, _, hi = value.partition("..")
+        if not lo.isdigit() or not (hi or lo).isdigit():
+            raise ValueError(f"expected a range like 2..3, got {value!r}")
+        counts.update(range(int(lo), int(hi or lo) + 1))
+    return counts
+
+
+def _parse_larger_than_life(text):
+    fields = {}
+    key = None
+    for token in text.split(","):
+        if token[:1].isalpha():
+            key = token[0]
+            if key in fields:
+                raise ValueError(f"{key} is given twice")
+            fields[key] = [token[1:]]
+        elif key in ("B", "S"):
+            # Further ranges of the previous B or S
+            fields[key].append(token)
+        else:
+            raise ValueError(f"unexpected {token!r}")
+    for key in ("R", "B", "S"):
+        if key not in fields:
+            raise ValueError(f"{key} is missing")
+    if fields.get("N", ["M"]) != ["M"]:
+        raise ValueError("only the Moore neighborhood (NM) is supported")
+    numbers = {}
+    for key, default in (("R", None), ("C", "0"), ("M", "0")):
+        value = fields.get(key, [default])[0]
+        if not value or not value.isdigit():
+            raise ValueError(f"expected a number after {key}")
+        numbers[key] = int(value)
+    birth = _parse_ranges(fields["B"])
+    survival = _parse_ranges(fields["S"])
+    if numbers["M"]:
+        # The counts include the cell itself; a dead cell adds nothing
+        survival = {count - 1 for count in survival if count > 0}
+    return Rule(birth, survival, max(2, numbers["C"]), numbers["R"])
+
+
+def parse_rule(spec):
+    """
+    Return the Rule for a rule string or one of the NAMED_RULES.
+    A Rule is returned unchanged. Raises ValueError for invalid rules.
+    """
+    if isinstance(spec, Rule):
+        return spec
+    return _parse_string(spec)
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_string(spec):
+    """ parse_rule() for strings; rules are not changed once built, so each is built once """
+    text = NAMED_RULES.get(spec.strip().lower(), spec)
+    text = text.upper().replace(" ", "")
+    try:
+        if text.startswith("R") and "," in text:
+            return _parse_larger_than_life(text)
+        return _parse_bs(text)
+    except ValueError as error:
+        raise ValueError(f"Invalid rule {spec!r}: {error}") from None
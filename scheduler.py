@@ -0,0 +1,76 @@
+"""
+Generations-per-frame scheduling.
+
+The display runs at its own frame rate; the scheduler works out how many
+generations each frame has to run to hold a target number of generations
+per second, without letting stepping eat the whole frame.
+This module does not depend on pygame.
+"""
+import time
+
+# Simulation speeds offered in the UI, in generations per second.
+# None means as many generations as fit in the step budget of each frame.
+SPEEDS = {"Slow": 10, "1x": 60, "Max": None}
+
+# Seconds of each frame that may be spent stepping (half a 60 fps frame)
+DEFAULT_STEP_BUDGET = 1 / 120
+
+
+class StepScheduler:
+    """
+    Decides how many generations to run each frame.
+
+    Time owed to the simulation accumulates between frames and is paid out
+    as whole generations. A frame never runs more generations than fit in
+    step_budget, judging by the measured cost of recent steps; when the
+    simulation falls behind, the generations it cannot afford are dropped
+    instead of piling up, so the frame rate and input stay responsive.
+    """
+
+    def __init__(self, generations_per_second=60, step_budget=DEFAULT_STEP_BUDGET,
+                 clock=time.perf_counter):
+        self.generations_per_second = generations_per_second
+        self.step_budget = step_budget
+        self.dropped = 0
+        self._clock = clock
+        self._last = None
+        self._owed = 0.0
+        self._step_cost = None
+
+    def reset(self):
+        """ Forget the time owed, e.g. after the simulation was paused """
+        self._last = None
+        self._owed = 0.0
+
+    def _limit(self):
+        """ The most generations that fit in the step budget, or None before any step was timed """
+        if not self._step_cost:
+            return None
+        return max(1, int(self.step_budget / self._step_cost))
+
+    def due(self):
+        """ Return the number of generations to run in this frame """
+        now = self._clock()
+        elapsed = 0.0 if self._last is None else now - self._last
+        self._last = now
+        limit = self._limit()
+        if self.generations_per_second is None:
+            return limit or 1
+
+        self._owed += elapsed * self.generations_per_second
+        generations = int(self._owed)
+        self._owed -= generations
+        if limit is not None and generations > limit:
+            self.dropped += generations - limit
+            generations = limit
+        return generations
+
+    def record(self, generations, seconds):
+        """ Report how long the last batch of generations took to run """
+        if generations <= 0:
+            return
+        cost = seconds / generations
+        if self._step_cost is None:
+            self._step_cost = cost
+        else:
+            self._step_cost += 0.2 * (cost - self._step_cost)
@@ -0,0 +1,160 @@
+"""
+Run Game of Life simulations without a display.
+
+Runs a number of generations on a pattern or a random soup and prints the
+population and throughput. pygame is not needed.
+
+Usage:
+python simulate.py --pattern r-pentomino --generations 1000
+python simulate.py --pattern random --size 2048 --engine bitboard --boundary torus
+python simulate.py --pattern random --size 512 --rule bosco --boundary torus
+python simulate.py --file gosperglidergun.rle --engine hashlife --generations 100000
+python simulate.py --pattern random --size 4096 --checkpoint-dir runs/soup --generations 100000
+python simulate.py --checkpoint-dir runs/soup --resume --generations 100000
+python simulate.py --pattern random --size 64 --boundary torus --stop-on-cycle --generations 100000
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from checkpoint import Checkpointer, latest_checkpoint, resume
+from cycles import DEFAULT_MAX_PERIOD, run_until_cycle
+from lifecore import BOUNDARIES, ENGINES, FIXED, INFINITE, LIFE_RULE, Simulation
+from patternio import read_pattern
+from patterns import PATTERNS, pattern, place, random_soup
+
+
+def build_board(args):
+    """ Create the starting board described by the command line arguments """
+    shape = (args.size, args.size)
+    if args.pattern == "random":
+        return random_soup(shape, args.density, args.seed)
+    return place(np.zeros(shape, dtype=bool), pattern(args.pattern))
+
+
+def read_board(args):
+    """
+    Read the --file pattern onto a board of --size cells, grown if the
+    pattern does not fit. Returns the board and the rule of the file.
+    """
+    loaded = read_pattern(args.file)
+    cells = loaded.cells
+    shape = (max(args.size, cells.shape[0]), max(args.size, cells.shape[1]))
+    return place(np.zeros(shape, dtype=cells.dtype), cells), loaded.rule
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pattern", default="r-pentomino",
+                        choices=sorted(PATTERNS) + ["random"],
+                        help="starting pattern, placed in the middle of the board")
+    parser.add_argument("--file", default=None,
+                        help="read the starting pattern from an .rle or .cells file instead")
+    parser.add_argument("--generations", type=int, default=1000,
+                        help="number of generations to run")
+    parser.add_argument("--size", type=int, default=80,
+                        help="width and height of the board in cells")
+    parser.add_argument("--density", type=float, default=0.5,
+                        help="fraction of live cells in a random soup")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed for the soup")
+    parser.add_argument("--engine", default="life", choices=sorted(ENGINES),
+                        help="board backend")
+    parser.add_argument("--boundary", default=FIXED, choices=BOUNDARIES,
+                        help="what happens at the edge of the board")
+    parser.add_argument("--rule", default=None,
+                        help="rule string (e.g. B36/S23, B2/S/C3, R5,C0,M1,S34..58,B34..45,NM) "
+                             "or a name from rules.NAMED_RULES; defaults to the rule "
+                             "of the --file pattern, or B3/S23")
+    parser.add_argument("--report-every", type=int, default=0,
+                        help="print the population every this many generations")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="write checkpoints of the run to this directory")
+    parser.add_argument("--checkpoint-every", type=int, default=1000,
+                        help="generations between checkpoints")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the latest checkpoint in --checkpoint-dir")
+    parser.add_argument("--stop-on-cycle", action="store_true",
+                        help="stop once the board becomes a still life or an oscillator "
+                             "(one generation at a time; --report-every is ignored)")
+    parser.add_argument("--max-period", type=int, default=DEFAULT_MAX_PERIOD,
+                        help="longest oscillator period looked for by --stop-on-cycle")
+    args = parser.parse_args(argv)
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume needs --checkpoint-dir")
+    if args.engine == "hashlife":
+        args.boundary = INFINITE
+    if args.file:
+        args.pattern = args.file
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    if args.resume:
+        path = latest_checkpoint(args.checkpoint_dir)
+        if path is None:
+            raise SystemExit(f"No checkpoint found in {args.checkpoint_dir}")
+        simulation = resume(path, args.engine)
+        args.pattern = path
+        args.size = simulation.engine.shape[0]
+        args.boundary = simulation.engine.boundary
+        args.rule = getattr(simulation.engine, "rule", LIFE_RULE)
+    else:
+        if args.file:
+            board, file_rule = read_board(args)
+        else:
+            board, file_rule = build_board(args), None
+        args.rule = args.rule or file_rule or LIFE_RULE
+        simulation = Simulation(board, args.engine, args.boundary, args.rule)
+    setup = time.perf_counter() - start
+    print(f"{args.engine} engine, rule {args.rule}, {args.boundary} boundary, {args.size}x{args.size} board, "
+          f"pattern {args.pattern}, population {simulation.population()}")
+
+    checkpointer = Checkpointer(args.checkpoint_dir) if args.checkpoint_dir else None
+    first_generation = simulation.generation
+
+    def due(sim, every):
+        return every > 0 and (sim.generation - first_generation) % every == 0
+
+    def callback(sim):
+        if due(sim, args.report_every):
+            print(f"generation {sim.generation}: population {sim.population()}")
+        if checkpointer and due(sim, args.checkpoint_every):
+            checkpointer.save(sim)
+
+    intervals = [args.report_every] if args.report_every > 0 else []
+    if checkpointer and args.checkpoint_every > 0:
+        intervals.append(args.checkpoint_every)
+    cycle = None
+    if args.stop_on_cycle:
+        stats, cycle = run_until_cycle(simulation, args.generations, args.max_period)
+    elif intervals:
+        stats = simulation.run(args.generations, callback, math.gcd(*intervals))
+    else:
+        stats = simulation.run(args.generations)
+    if checkpointer:
+        checkpointer.save(simulation, wait=True)
+        if checkpointer.error is not None:
+            error = checkpointer.error
+            print(f"could not write a checkpoint to {args.checkpoint_dir}: {error or type(error).__name__}")
+        else:
+            print(f"checkpoint at generation {simulation.generation} written to {args.checkpoint_dir}"
+                  + (f" ({checkpointer.skipped} skipped while busy)" if checkpointer.skipped else ""))
+
+    rate = stats.generations / stats.seconds if stats.seconds else float("inf")
+    print(f"{stats.generations} generations in {stats.seconds:.3f} s "
+          f"({rate:,.0f} generations/s, {rate * args.size * args.size:,.0f} cells/s), "
+          f"setup {setup:.3f} s, final population {stats.population}")
+    if cycle is not None:
+        kind = "still life" if cycle.period == 1 else f"period {cycle.period} oscillator"
+        print(f"settled into a {kind} at generation {cycle.start}")
+    elif args.stop_on_cycle:
+        print(f"no cycle of period {args.max_period} or less found")
+
+
+if __name__ == "__main__":
+    main()
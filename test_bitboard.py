@@ -0,0 +1,82 @@
+"""
+Tests for the bit-packed board against the NumPy engine.
+"""
+import numpy as np
+import pytest
+
+from bitboard import WORD_BITS, BitBoard, pack, unpack
+from lifecore import FIXED, TORUS, LifeEngine
+
+
+def soup(shape, seed=0, density=0.4):
+    return np.random.default_rng(seed).random(shape) < density
+
+
+@pytest.mark.parametrize("cols", [1, 63, 64, 65, 130])
+def test_pack_round_trip(cols):
+    board = soup((7, cols), seed=cols)
+    words = pack(board)
+    assert words.dtype == np.uint64
+    assert words.shape == (7, -(-cols // WORD_BITS))
+    assert np.array_equal(unpack(words, cols), board)
+
+
+@pytest.mark.parametrize("cols", [1, 63, 64, 65, 130])
+def test_pack_bit_layout(cols):
+    board = soup((3, cols), seed=cols + 1)
+    words = pack(board)
+    for i in range(3):
+        for j in range(cols):
+            assert bool(words[i, j // WORD_BITS] >> np.uint64(j % WORD_BITS) & np.uint64(1)) == board[i, j]
+    # Bits past the last column are zero
+    last_bits = cols % WORD_BITS
+    if last_bits:
+        assert not (words[:, -1] >> np.uint64(last_bits)).any()
+
+
+def test_to_array_and_from_array():
+    board = soup((20, 130), seed=5)
+    bitboard = BitBoard.from_array(board)
+    assert bitboard.shape == board.shape
+    assert np.array_equal(bitboard.to_array(), board)
+    assert bitboard.population() == np.count_nonzero(board)
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+@pytest.mark.parametrize("shape", [(16, 16), (9, 63), (12, 64), (33, 65), (5, 130)])
+def test_step_matches_life_engine(boundary, shape):
+    board = soup(shape, seed=shape[1])
+    bitboard = BitBoard(board, boundary)
+    reference = LifeEngine(board, boundary)
+    for generation in range(1, 61):
+        bitboard.step()
+        reference.step()
+        assert np.array_equal(bitboard.to_array(), reference.to_array()), f"generation {generation}"
+    assert bitboard.generation == reference.generation
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+def test_multi_step_and_window(boundary):
+    board = soup((40, 100), seed=9)
+    bitboard = BitBoard(board, boundary)
+    reference = LifeEngine(board, boundary)
+    bitboard.step(25)
+    reference.step(25)
+    assert np.array_equal(bitboard.window(-3, 10, 20, 95), reference.window(-3, 10, 20, 95))
+
+
+def test_board_is_unpacked_once_per_generation():
+    board = soup((10, 70), seed=3)
+    bitboard = BitBoard(board, TORUS)
+    reference = LifeEngine(board, TORUS)
+    first = bitboard.board
+    assert bitboard.board is first
+    assert not first.flags.writeable
+    bitboard.step()
+    reference.step()
+    assert bitboard.board is not first
+    assert np.array_equal(bitboard.board, reference.board)
+    bitboard.set(4, 65, not bitboard.get(4, 65))
+    assert bitboard.board[4, 65] == bitboard.get(4, 65)
+    bitboard.clear()
+    assert not bitboard.board.any()
@@ -0,0 +1,88 @@
+"""
+Tests for the lookup table engine against the NumPy engine.
+"""
+import numpy as np
+import pytest
+
+import blocklut
+from blocklut import BlockLUT, build_table, load_table, step_blocks
+from lifecore import FIXED, INFINITE, TORUS, LifeEngine, game_of_life
+
+RULES = ["B3/S23", "B36/S23", "B2/S", "B3678/S34678", "B1357/S02468"]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """ A fresh table cache, in memory and on disk """
+    monkeypatch.setattr(blocklut, "_tables", {})
+    return str(tmp_path)
+
+
+def soup(shape, seed=0, density=0.4):
+    return np.random.default_rng(seed).random(shape) < density
+
+
+def test_table_matches_game_of_life():
+    table = build_table("B36/S23")
+    indices = np.random.default_rng(0).integers(0, 1 << 16, 500)
+    for index in indices:
+        square = ((int(index) >> np.arange(16)) & 1).astype(bool).reshape(4, 4)
+        expected = game_of_life(square, boundary=INFINITE, rule="B36/S23")[1:3, 1:3]
+        assert np.array_equal(table[index], expected), f"index {index}"
+
+
+@pytest.mark.parametrize("rule", RULES)
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+@pytest.mark.parametrize("shape", [(16, 16), (9, 14), (20, 7), (11, 13), (3, 3)])
+def test_step_matches_life_engine(cache_dir, rule, boundary, shape):
+    board = soup(shape, seed=shape[0] + shape[1])
+    engine = BlockLUT(board, boundary, rule, cache_dir)
+    reference = LifeEngine(board, boundary, rule)
+    for generation in range(1, 31):
+        engine.step()
+        reference.step()
+        assert np.array_equal(engine.to_array(), reference.to_array()), f"generation {generation}"
+    assert engine.rule == reference.rule
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS, INFINITE])
+def test_step_blocks_matches_game_of_life(cache_dir, boundary):
+    load_table("B36/S23", cache_dir)
+    board = soup((15, 22), seed=4)
+    expected = game_of_life(board, boundary=boundary, rule="B36/S23")
+    assert np.array_equal(step_blocks(board, boundary=boundary, rule="B36/S23"), expected)
+    step_blocks(board, board, boundary, "B36/S23")
+    assert np.array_equal(board, expected)
+
+
+def test_table_is_cached_on_disk(cache_dir, monkeypatch):
+    first = load_table("B36/S23", cache_dir)
+    monkeypatch.setattr(blocklut, "_tables", {})
+    monkeypatch.setattr(blocklut, "build_table", None)
+    assert np.array_equal(load_table("B36/S23", cache_dir), first)
+
+
+def test_corrupt_cache_is_rebuilt(cache_dir):
+    path = blocklut._cache_path(blocklut._rule_of("B36/S23"), cache_dir)
+    with open(path, "wb") as f:
+        f.write(b"not a table")
+    table = load_table("B36/S23", cache_dir)
+    assert table.shape == (1 << 16,)
+
+
+def test_window_and_edits(cache_dir):
+    board = soup((30, 40), seed=8)
+    engine = BlockLUT(board, TORUS, cache_dir=cache_dir)
+    reference = LifeEngine(board, TORUS)
+    engine.set(5, 5, True)
+    reference.set(5, 5, True)
+    engine.step(7)
+    reference.step(7)
+    assert np.array_equal(engine.window(-3, 20, 15, 30), reference.window(-3, 20, 15, 30))
+    assert engine.population() == reference.population()
+
+
+@pytest.mark.parametrize("rule", ["B2/S/C3", "R2,C0,M0,S3..7,B4..6,NM"])
+def test_unsupported_rules(cache_dir, rule):
+    with pytest.raises(ValueError):
+        BlockLUT(soup((8, 8)), rule=rule, cache_dir=cache_dir)
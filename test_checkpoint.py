@@ -0,0 +1,131 @@
+"""
+Tests for writing, reading and resuming from checkpoint files.
+"""
+import numpy as np
+import pytest
+
+import checkpoint
+from checkpoint import (CheckpointFile, Checkpointer, latest_checkpoint, read_checkpoint, resume,
+                        write_checkpoint)
+from lifecore import INFINITE, TORUS, Simulation
+from patterns import pattern, place
+
+
+def soup(shape, seed=0, density=0.4):
+    return np.random.default_rng(seed).random(shape) < density
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (8, 8), (13, 21), (40, 64), (7, 1001)])
+def test_round_trip_bool(tmp_path, shape):
+    board = soup(shape, seed=shape[1])
+    path = tmp_path / "board.ckpt"
+    write_checkpoint(path, board, generation=123, boundary=TORUS, rule="B36/S23")
+    loaded = read_checkpoint(path)
+    assert loaded.generation == 123
+    assert loaded.origin == (0, 0)
+    assert loaded.boundary == TORUS
+    assert loaded.rule == "B36/S23"
+    assert loaded.cells.dtype == bool
+    assert np.array_equal(loaded.cells, board)
+
+
+def test_round_trip_generations(tmp_path):
+    board = np.random.default_rng(1).integers(0, 4, (30, 19)).astype(np.uint8)
+    path = tmp_path / "board.ckpt"
+    write_checkpoint(path, board, rule="B2/S345/C4")
+    loaded = read_checkpoint(path)
+    assert loaded.cells.dtype == np.uint8
+    assert loaded.rule == "B2/S345/C4"
+    assert np.array_equal(loaded.cells, board)
+
+
+def test_origin_is_kept(tmp_path):
+    path = tmp_path / "board.ckpt"
+    write_checkpoint(path, soup((5, 6)), origin=(-1000, 2 ** 40), boundary=INFINITE)
+    loaded = CheckpointFile(path)
+    assert loaded.origin == (-1000, 2 ** 40)
+    assert loaded.boundary == INFINITE
+    loaded.close()
+
+
+@pytest.mark.parametrize("band_rows", [1, 3, 8, 1024])
+@pytest.mark.parametrize("dtype", [bool, np.uint8])
+def test_bands(tmp_path, monkeypatch, band_rows, dtype):
+    monkeypatch.setattr(checkpoint, "BAND_ROWS", band_rows)
+    board = np.random.default_rng(band_rows).integers(0, 3, (25, 37)).astype(dtype)
+    path = tmp_path / "board.ckpt"
+    write_checkpoint(path, board)
+    loaded = CheckpointFile(path)
+    out = np.ones(board.shape, dtype=dtype)
+    assert loaded.load(out) is out
+    assert np.array_equal(out, board)
+    loaded.close()
+
+
+@pytest.mark.parametrize("dtype", [bool, np.uint8])
+@pytest.mark.parametrize("x, y, width, height", [
+    (0, 0, 25, 37), (3, 5, 10, 9), (0, 8, 25, 8), (7, 13, 1, 1), (-4, -3, 10, 12),
+    (20, 30, 10, 10), (30, 0, 5, 5), (0, 40, 5, 5),
+])
+def test_window(tmp_path, dtype, x, y, width, height):
+    board = np.random.default_rng(2).integers(0, 3, (25, 37)).astype(dtype)
+    path = tmp_path / "board.ckpt"
+    write_checkpoint(path, board)
+    loaded = CheckpointFile(path)
+    expected = np.zeros((width, height), dtype=dtype)
+    x0, x1 = max(x, 0), min(x + width, 25)
+    y0, y1 = max(y, 0), min(y + height, 37)
+    if x0 < x1 and y0 < y1:
+        expected[x0 - x:x1 - x, y0 - y:y1 - y] = board[x0:x1, y0:y1]
+    window = loaded.window(x, y, width, height)
+    assert window.dtype == np.dtype(dtype)
+    assert np.array_equal(window, expected)
+    loaded.close()
+
+
+def test_not_a_checkpoint(tmp_path):
+    path = tmp_path / "board.ckpt"
+    path.write_bytes(b"x" * 300)
+    with pytest.raises(ValueError):
+        CheckpointFile(path)
+    write_checkpoint(path, soup((10, 10)))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        CheckpointFile(path)
+
+
+def test_rule_too_long(tmp_path):
+    with pytest.raises(ValueError):
+        write_checkpoint(tmp_path / "board.ckpt", soup((4, 4)), rule="B3/S23" + "," * 200)
+
+
+def test_checkpointer_and_resume(tmp_path):
+    board = soup((32, 32), seed=3)
+    simulation = Simulation(board, "life", TORUS, "B36/S23")
+    checkpointer = Checkpointer(tmp_path, keep=2)
+    for _ in range(3):
+        simulation.step(10)
+        assert checkpointer.save(simulation, wait=True)
+    assert checkpointer.error is None
+    assert len(list(tmp_path.iterdir())) == 2
+    path = latest_checkpoint(tmp_path)
+    assert path.endswith("checkpoint-000000000000030.ckpt")
+    resumed = resume(path)
+    assert resumed.engine.generation == 30
+    assert resumed.engine.rule == "B36/S23"
+    simulation.step(5)
+    resumed.step(5)
+    assert np.array_equal(resumed.engine.to_array(), simulation.engine.to_array())
+
+
+def test_resume_infinite_origin(tmp_path):
+    board = place(np.zeros((10, 10), dtype=bool), pattern("glider"), 2, 2)
+    simulation = Simulation(board, "hashlife", INFINITE)
+    simulation.step(100)
+    snapshot = simulation.snapshot()
+    assert snapshot.origin != (0, 0)
+    Checkpointer(tmp_path).save(simulation, wait=True)
+    resumed = resume(latest_checkpoint(tmp_path), "hashlife")
+    assert resumed.engine.generation == 100
+    assert resumed.snapshot().origin == snapshot.origin
+    assert np.array_equal(resumed.snapshot().cells, snapshot.cells)
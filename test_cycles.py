@@ -0,0 +1,67 @@
+"""
+Tests for cycle detection and replay.
+"""
+import numpy as np
+
+import cycles
+from cycles import CycleDetector, CycleReplay, engine_state
+from lifecore import TORUS, LifeEngine
+from patterns import pattern, place
+from tiled import TiledEngine
+
+
+def blinker_engine():
+    return LifeEngine(place(np.zeros((10, 10), dtype=bool), pattern("blinker")))
+
+
+def test_detector_finds_blinker():
+    engine = blinker_engine()
+    detector = CycleDetector()
+    cycle = None
+    while cycle is None:
+        board, origin = engine_state(engine)
+        cycle = detector.update(board, engine.generation, origin)
+        engine.step()
+    assert cycle.period == 2
+
+
+def test_replay_keeps_generation():
+    engine = blinker_engine()
+    engine.step(2)
+    replay = CycleReplay(engine, 2, (0, 0, 10, 10))
+    # Recording the frames does not move the generation on
+    assert engine.generation == 2
+    replay.advance(5)
+    replay.sync()
+    reference = blinker_engine()
+    reference.step(7)
+    assert engine.generation == 7
+    assert np.array_equal(engine.to_array(), reference.to_array())
+
+
+def test_replay_frames_follow_engine():
+    engine = blinker_engine()
+    reference = blinker_engine()
+    replay = CycleReplay(engine, 2, (0, 0, 10, 10))
+    for _ in range(5):
+        assert np.array_equal(replay.board, reference.window(0, 0, 10, 10))
+        replay.advance()
+        reference.step()
+
+
+def test_changed_regions_give_the_same_hashes(monkeypatch):
+    # Every region is cheap, so the tiles are always diffed one by one
+    monkeypatch.setattr(cycles, "REGION_COST", 0)
+    board = place(np.zeros((64, 64), dtype=bool), pattern("r-pentomino"), 30, 30)
+    engine = TiledEngine(board, TORUS, tile_size=8)
+    with_regions, without = CycleDetector(), CycleDetector()
+    for generation in range(200):
+        # A skipped generation is diffed in full
+        if generation != 50:
+            with_regions.update(engine.board, engine.generation, regions=engine.changed_regions())
+        without.update(engine.board, engine.generation)
+        if generation != 50:
+            assert with_regions.hash == without.hash, f"generation {generation}"
+        engine.step()
+    with_regions.update(engine.board, engine.generation, regions=engine.changed_regions())
+    assert np.array_equal(with_regions._previous, engine.board)
@@ -0,0 +1,72 @@
+"""
+Tests for stepping a batch of boards and finding where each one settles.
+"""
+import numpy as np
+import pytest
+
+import ensemble
+from cycles import CycleDetector
+from ensemble import Ensemble, random_boards
+from lifecore import FIXED, TORUS, game_of_life
+
+
+def settle(board, boundary, rule, generations, max_period):
+    """ Step one board with game_of_life() and a CycleDetector; returns (lifespan, period, population) """
+    detector = CycleDetector(max_period)
+    for generation in range(generations + 1):
+        cycle = detector.update(board, generation)
+        if cycle is not None:
+            return cycle.start, cycle.period, np.count_nonzero(board)
+        if generation < generations:
+            board = game_of_life(board, boundary=boundary, rule=rule)
+    return generations, 0, np.count_nonzero(board)
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+@pytest.mark.parametrize("rule", [None, "B36/S23", "B2/S/C3"])
+def test_summary_matches_cycle_detector(boundary, rule):
+    boards = random_boards(40, (12, 10), density=0.35, seed=5)
+    if rule == "B2/S/C3":
+        boards = boards.astype(np.uint8)
+    batch = Ensemble(boards, boundary, rule, max_period=16)
+    summary = batch.run(300)
+    assert list(summary["index"]) == list(range(40))
+    for board, result in zip(boards, summary):
+        lifespan, period, population = settle(board, boundary, rule, 300, 16)
+        assert (result["lifespan"], result["period"]) == (lifespan, period), f"board {result['index']}"
+        assert result["population"] == population
+        assert result["initial_population"] == np.count_nonzero(board)
+        assert result["peak_population"] >= max(result["population"], result["initial_population"])
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+def test_boards_match_game_of_life(monkeypatch, boundary):
+    # Nothing is compacted out, so the batch can be compared board by board
+    monkeypatch.setattr(ensemble, "COMPACT_FRACTION", 2.0)
+    boards = random_boards(6, (9, 13), seed=2)
+    batch = Ensemble(boards, boundary)
+    for _ in range(20):
+        batch.step()
+        boards = np.array([game_of_life(board, boundary=boundary) for board in boards])
+        assert np.array_equal(batch.boards, boards)
+
+
+def test_compaction_keeps_indices(monkeypatch):
+    monkeypatch.setattr(ensemble, "COMPACT_FRACTION", 0.0)
+    boards = random_boards(20, (16, 16), seed=3)
+    boards[::3] = False
+    batch = Ensemble(boards)
+    assert batch.running == 20
+    # The empty boards are found still after one generation and dropped
+    batch.step()
+    assert batch.running == len(batch.boards) == 13
+    summary = batch.summary()
+    assert (summary["period"][::3] == 1).all()
+    assert (summary["lifespan"][::3] == 0).all()
+
+
+def test_unsupported_rules():
+    with pytest.raises(ValueError):
+        Ensemble(random_boards(2, (8, 8)), rule="R2,C0,M0,S3..7,B4..6,NM")
+    with pytest.raises(ValueError):
+        Ensemble(random_boards(2, (2, 8)))
@@ -0,0 +1,103 @@
+"""
+Tests for the HashLife engine against the NumPy engine.
+"""
+import numpy as np
+import pytest
+
+import hashlife as hashlife_module
+from hashlife import HashLife
+from lifecore import INFINITE, LifeEngine
+from patterns import pattern, place
+
+
+def soup(shape, seed=0, density=0.4):
+    return np.random.default_rng(seed).random(shape) < density
+
+
+def live_cells(engine):
+    """ The universe coordinates of the live cells of an engine """
+    if isinstance(engine, HashLife):
+        box = engine.bounding_box()
+        if box is None:
+            return set()
+        x, y = box[:2]
+        cells = engine.window(*box)
+    else:
+        (x, y), cells = engine.origin, engine.to_array()
+    xs, ys = np.nonzero(cells)
+    return set(zip((xs + x).tolist(), (ys + y).tolist()))
+
+
+@pytest.mark.parametrize("counts", [[1, 1, 1, 1], [2, 3, 7], [16, 64], [100]])
+def test_step_matches_life_engine(counts):
+    board = soup((30, 21), seed=len(counts))
+    hashlife = HashLife(board)
+    reference = LifeEngine(board, INFINITE)
+    for count in counts:
+        hashlife.step(count)
+        reference.step(count)
+        assert hashlife.generation == reference.generation
+        assert hashlife.population() == reference.population()
+        assert live_cells(hashlife) == live_cells(reference)
+
+
+def test_bounding_box():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        board = rng.random(tuple(rng.integers(1, 40, 2))) < 0.05
+        engine = HashLife(board)
+        engine.step(int(rng.integers(0, 20)))
+        cells = live_cells(engine)
+        if not cells:
+            assert engine.bounding_box() is None
+            continue
+        xs, ys = zip(*cells)
+        assert engine.bounding_box() == (min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+
+
+def test_to_array_is_the_bounding_box():
+    engine = HashLife(place(np.zeros((40, 40), dtype=bool), pattern("gosper-gun")))
+    engine.step(4096)
+    box = engine.bounding_box()
+    cells = engine.to_array()
+    assert cells.shape == box[2:]
+    assert np.count_nonzero(cells) == engine.population()
+    assert cells[0].any() and cells[-1].any() and cells[:, 0].any() and cells[:, -1].any()
+
+
+def test_large_jump_stays_within_max_nodes():
+    board = soup((32, 32), seed=2)
+    engine = HashLife(board, max_nodes=5_000)
+    engine.step(256)
+    assert len(engine._nodes) <= 2 * engine.max_nodes
+    reference = LifeEngine(board, INFINITE)
+    reference.step(256)
+    assert live_cells(engine) == live_cells(reference)
+
+
+def assert_canonical(engine):
+    """ Every node of the universe is the one in the node table, so equal nodes are shared """
+    pending = [engine.root]
+    while pending:
+        node = pending.pop()
+        if node.level == 0:
+            continue
+        key = (node.nw, node.ne, node.sw, node.se)
+        assert engine._nodes.get(key) is node
+        pending.extend(key)
+
+
+@pytest.mark.parametrize("counts", [[1, 5, 30], [64, 100]])
+def test_collect_between_every_sub_step(monkeypatch, counts):
+    # Collecting between the sub-steps of small nodes must not drop the
+    # operands or the results of the sub-steps still in use
+    monkeypatch.setattr(hashlife_module, "_COLLECT_LEVEL", 3)
+    board = place(np.zeros((40, 40), dtype=bool), pattern("gosper-gun"))
+    board[30:, 30:] = soup((10, 10), seed=3)
+    engine = HashLife(board, max_nodes=500)
+    reference = LifeEngine(board, INFINITE)
+    for count in counts:
+        engine.step(count)
+        reference.step(count)
+        assert live_cells(engine) == live_cells(reference)
+        assert_canonical(engine)
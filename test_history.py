@@ -0,0 +1,152 @@
+"""
+Tests for undo, redo and scrubbing through the history of a board.
+"""
+import numpy as np
+import pytest
+
+from history import EDIT, History
+from lifecore import TORUS, game_of_life
+
+
+def run(board, generations, history):
+    """ Step board, recording every generation; returns every board, the first included """
+    boards = [board.copy()]
+    for generation in range(1, generations + 1):
+        board = game_of_life(board, boundary=TORUS)
+        history.record(board, generation)
+        boards.append(board)
+    return boards
+
+
+@pytest.fixture
+def soup():
+    return np.random.default_rng(1).random((64, 48)) < 0.4
+
+
+@pytest.mark.parametrize("keyframe_interval", [1, 7, 16, 256])
+def test_scrubbing(soup, keyframe_interval):
+    history = History(keyframe_interval=keyframe_interval)
+    history.reset(soup)
+    boards = run(soup, 300, history)
+    for back in (1, 5, 100, 150, 30):
+        history.rewind(back)
+        assert np.array_equal(history.board, boards[history.generation])
+    assert history.forward(10 ** 6) > 0
+    assert history.generation == 300
+    assert np.array_equal(history.board, boards[300])
+    assert history.rewind(10 ** 6) == 300
+    assert history.generation == 0 and not history.can_undo
+
+
+def test_undo_redo(soup):
+    history = History(keyframe_interval=16)
+    history.reset(soup)
+    boards = run(soup, 50, history)
+    edited = boards[50].copy()
+    edited[3, 3] ^= True
+    history.record(edited, 50, EDIT)
+    # An edit is undone by itself, a run of generations as a whole
+    assert history.undo() and np.array_equal(history.board, boards[50])
+    assert history.undo() and history.generation == 0 and np.array_equal(history.board, boards[0])
+    assert not history.undo()
+    assert history.redo() and history.generation == 50
+    assert history.redo() and np.array_equal(history.board, edited)
+    assert not history.redo()
+
+
+def test_record_after_undo_drops_redo(soup):
+    history = History()
+    history.reset(soup)
+    boards = run(soup, 10, history)
+    history.rewind(4)
+    assert history.can_redo
+    edited = boards[6].copy()
+    edited[0, 0] ^= True
+    history.record(edited, 6, EDIT)
+    assert not history.can_redo
+    assert history.undo() and history.generation == 6 and np.array_equal(history.board, boards[6])
+
+
+def test_empty_edit_is_not_recorded(soup):
+    history = History()
+    history.reset(soup)
+    history.record(soup.copy(), 0, EDIT)
+    assert not history.can_undo
+
+
+def test_eviction_stays_within_budget(soup):
+    history = History(budget=50_000)
+    history.reset(soup)
+    boards = run(soup, 300, history)
+    assert history.nbytes <= 50_000
+    rewound = history.rewind(10 ** 6)
+    assert 0 < rewound < 300
+    assert np.array_equal(history.board, boards[history.generation])
+    history.forward(10 ** 6)
+    assert np.array_equal(history.board, boards[300])
+
+
+def test_still_steps_move_keyframe_generation():
+    board = np.zeros((8, 8), dtype=bool)
+    history = History(keyframe_interval=5)
+    history.reset(board)
+    generation = 0
+    for x in range(4):
+        board = board.copy()
+        board[x, 0] = True
+        generation += 1
+        history.record(board, generation)
+    # A still board: these steps are merged into one record, whose end is
+    # a keyframe
+    for _ in range(10):
+        generation += 1
+        history.record(board, generation)
+    history.rewind(4)
+    history.forward(4)
+    assert history.generation == 14
+    assert np.array_equal(history.board, board)
+
+
+def test_keyframe_restore_matches_replay(soup):
+    # Seeking with keyframes gives the same boards as replaying every change
+    with_keyframes = History(keyframe_interval=8)
+    without = History(keyframe_interval=10 ** 9)
+    with_keyframes.reset(soup)
+    without.reset(soup)
+    board = soup
+    for generation in range(1, 100):
+        board = game_of_life(board, boundary=TORUS)
+        with_keyframes.record(board, generation)
+        without.record(board, generation)
+    for target in (97, 3, 60, 61, 8, 99):
+        for history in (with_keyframes, without):
+            history.rewind(10 ** 6)
+            history.forward(target)
+        assert with_keyframes.generation == without.generation == target
+        assert np.array_equal(with_keyframes.board, without.board)
+
+
+def test_new_shape_starts_over(soup):
+    history = History()
+    history.reset(soup)
+    run(soup, 5, history)
+    history.record(np.zeros((10, 10), dtype=bool), 6)
+    assert not history.can_undo and history.generation == 6
+
+
+def test_generations_states():
+    rng = np.random.default_rng(2)
+    first = rng.integers(0, 4, (20, 20), dtype=np.uint8)
+    second = first.copy()
+    second[:10] = 0
+    third = rng.integers(0, 4, (20, 20), dtype=np.uint8)
+    history = History()
+    history.reset(first)
+    history.record(second, 1)
+    history.record(third, 2)
+    history.rewind(2)
+    assert np.array_equal(history.board, first)
+    history.forward(1)
+    assert np.array_equal(history.board, second)
+    history.forward(1)
+    assert np.array_equal(history.board, third)
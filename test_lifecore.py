@@ -0,0 +1,90 @@
+"""
+Tests for the NumPy step engine against the original per-cell loop.
+"""
+import numpy as np
+import pytest
+
+from lifecore import FIXED, TORUS, LifeEngine, game_of_life
+
+
+def reference_step(board, boundary=FIXED):
+    """ The original per-cell implementation, plus wrap-around for the torus """
+    rows, cols = board.shape
+    new_board = np.copy(board)
+    if boundary == FIXED:
+        cells = [(i, j) for i in range(1, rows - 1) for j in range(1, cols - 1)]
+    else:
+        cells = [(i, j) for i in range(rows) for j in range(cols)]
+    for i, j in cells:
+        # Count the number of live neighbors
+        neighbors = 0
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                if di or dj:
+                    neighbors += board[(i + di) % rows, (j + dj) % cols]
+        # Apply the rules of the Game of Life
+        if board[i, j]:
+            if neighbors < 2 or neighbors > 3:
+                new_board[i, j] = False
+        elif neighbors == 3:
+            new_board[i, j] = True
+    return new_board
+
+
+def soup(shape, seed=0, density=0.4):
+    return np.random.default_rng(seed).random(shape) < density
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+@pytest.mark.parametrize("shape", [(16, 16), (17, 9), (5, 31), (3, 3)])
+def test_game_of_life_matches_reference(boundary, shape):
+    board = soup(shape, seed=sum(shape))
+    expected = board
+    for _ in range(10):
+        expected = reference_step(expected, boundary)
+        board = game_of_life(board, boundary=boundary)
+        assert board.dtype == bool
+        assert np.array_equal(board, expected)
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+def test_game_of_life_in_place(boundary):
+    board = soup((20, 13), seed=1)
+    expected = reference_step(board, boundary)
+    result = game_of_life(board, out=board, boundary=boundary)
+    assert result is board
+    assert np.array_equal(board, expected)
+
+
+def test_game_of_life_out():
+    board = soup((12, 12), seed=2)
+    before = board.copy()
+    out = np.zeros_like(board)
+    result = game_of_life(board, out=out)
+    assert result is out
+    assert np.array_equal(out, reference_step(before))
+    assert np.array_equal(board, before)
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+@pytest.mark.parametrize("shape", [(31, 17), (8, 45), (25, 25)])
+def test_engine_many_generations(boundary, shape):
+    board = soup(shape, seed=shape[0])
+    engine = LifeEngine(board, boundary)
+    expected = board
+    for generation in range(1, 101):
+        expected = reference_step(expected, boundary)
+        engine.step()
+        assert engine.generation == generation
+        assert np.array_equal(engine.to_array(), expected), f"generation {generation}"
+
+
+def test_engine_step_count():
+    board = soup((40, 23), seed=3)
+    engine = LifeEngine(board, TORUS)
+    engine.step(50)
+    expected = board
+    for _ in range(50):
+        expected = reference_step(expected, TORUS)
+    assert engine.generation == 50
+    assert np.array_equal(engine.to_array(), expected)
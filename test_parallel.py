@@ -0,0 +1,67 @@
+"""
+Tests for the multiprocess engine against the NumPy engine.
+"""
+import numpy as np
+import pytest
+
+from lifecore import FIXED, INFINITE, TORUS, LifeEngine
+from parallel import ParallelEngine
+
+
+def soup(shape, seed=0, density=0.4):
+    return np.random.default_rng(seed).random(shape) < density
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_step_matches_life_engine(boundary, workers):
+    board = soup((37, 29), seed=workers)
+    reference = LifeEngine(board, boundary)
+    with ParallelEngine(board, boundary, workers=workers) as engine:
+        for generation in range(1, 31):
+            engine.step()
+            reference.step()
+            assert np.array_equal(engine.to_array(), reference.to_array()), f"generation {generation}"
+        assert engine.generation == reference.generation
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+def test_multi_step_and_edits(boundary):
+    board = soup((40, 50), seed=7)
+    reference = LifeEngine(board, boundary)
+    with ParallelEngine(board, boundary, workers=4) as engine:
+        # Odd jumps leave the result in the other buffer
+        for generations in (1, 4, 7, 0, 2):
+            engine.step(generations)
+            reference.step(generations)
+            assert np.array_equal(engine.to_array(), reference.to_array())
+        engine.set(0, 0, True)
+        reference.set(0, 0, True)
+        engine.step(3)
+        reference.step(3)
+        assert np.array_equal(engine.window(-1, 10, 20, 45), reference.window(-1, 10, 20, 45))
+        assert engine.population() == reference.population()
+
+
+def test_more_workers_than_rows():
+    board = soup((4, 20), seed=1)
+    reference = LifeEngine(board, TORUS)
+    with ParallelEngine(board, TORUS, workers=8) as engine:
+        assert engine.workers == 4
+        engine.step(10)
+        reference.step(10)
+        assert np.array_equal(engine.to_array(), reference.to_array())
+
+
+def test_close_stops_workers():
+    engine = ParallelEngine(soup((10, 10)), workers=2)
+    processes = list(engine._processes)
+    engine.close()
+    assert not any(process.is_alive() for process in processes)
+
+
+def test_unsupported_boards():
+    with pytest.raises(ValueError):
+        ParallelEngine(np.zeros((2, 10), dtype=bool))
+    with pytest.raises(ValueError):
+        ParallelEngine(np.zeros((10, 10), dtype=bool), INFINITE)
@@ -0,0 +1,102 @@
+"""
+Tests for reading and writing RLE and plaintext pattern files.
+"""
+import io
+
+import numpy as np
+import pytest
+
+import patternio
+from patternio import read_cells, read_rle, write_cells, write_rle
+
+
+def rle(text):
+    return io.BytesIO(text.encode())
+
+
+def live(cells):
+    return list(zip(*(axis.tolist() for axis in np.nonzero(cells))))
+
+
+@pytest.mark.parametrize("count", [2, 9, 10, 99, 255, 256, 300, 999, 1000, 12345])
+def test_multi_digit_runs(count):
+    cells = read_rle(rle(f"x = {count + 1}, y = 2\n{count}bo$o!")).cells
+    assert cells.shape == (count + 1, 2)
+    assert live(cells) == [(0, 1), (count, 0)]
+
+
+@pytest.mark.parametrize("count", [256, 1000, 1400])
+def test_multi_digit_line_feeds(count):
+    cells = read_rle(rle(f"x = 3, y = {count + 1}\n2bo{count}$2bo!")).cells
+    assert live(cells) == [(2, 0), (2, count)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7])
+def test_runs_split_across_chunks(monkeypatch, chunk_size):
+    monkeypatch.setattr(patternio, "CHUNK_SIZE", chunk_size)
+    text = "x = 1200, y = 1003\n999bo$1000$2o197bA!"
+    cells = read_rle(rle(text)).cells
+    assert live(cells) == [(0, 1001), (1, 1001), (199, 1001), (999, 0)]
+
+
+def test_whitespace_inside_runs():
+    cells = read_rle(rle("x = 20, y = 1\n1\n5b\no!")).cells
+    assert live(cells) == [(15, 0)]
+
+
+@pytest.mark.parametrize("shape", [(5, 1500), (1500, 3), (64, 64)])
+def test_rle_round_trip(shape):
+    board = np.random.default_rng(shape[0]).random(shape) < 0.2
+    board[2, 0] = board[2, -1] = True
+    board[:, 1:-1] &= np.arange(shape[1] - 2) % 7 == 0
+    buffer = io.BytesIO()
+    write_rle(buffer, board)
+    buffer.seek(0)
+    assert np.array_equal(read_rle(buffer).cells, board)
+
+
+def test_rle_round_trip_generations():
+    board = np.random.default_rng(1).integers(0, 3, (40, 30)).astype(np.uint8)
+    buffer = io.BytesIO()
+    write_rle(buffer, board, "B2/S/C3")
+    buffer.seek(0)
+    pattern = read_rle(buffer)
+    assert pattern.rule == "B2/S/C3"
+    assert pattern.cells.dtype == np.uint8
+    assert np.array_equal(pattern.cells, board)
+
+
+def test_golly_topology_is_dropped():
+    pattern = read_rle(rle("x = 3, y = 1, rule = B3/S23:T80,80\nobo!"))
+    assert pattern.rule == "B3/S23"
+    assert live(pattern.cells) == [(0, 0), (2, 0)]
+
+
+def test_read_into_board_clips():
+    out = np.zeros((4, 4), dtype=bool)
+    read_rle(rle("x = 6, y = 2\n5o$o4bo!"), out, x=-1, y=2)
+    assert live(out) == [(0, 2), (1, 2), (2, 2), (3, 2)]
+
+
+def test_cells_round_trip():
+    board = np.random.default_rng(2).random((23, 17)) < 0.3
+    buffer = io.BytesIO()
+    write_cells(buffer, board, name="soup")
+    buffer.seek(0)
+    pattern = read_cells(buffer)
+    assert pattern.comments == ["Name: soup"]
+    assert np.array_equal(pattern.cells[:board.shape[0], :board.shape[1]], board)
+    assert not pattern.cells[board.shape[0]:].any() and not pattern.cells[:, board.shape[1]:].any()
+
+
+@pytest.mark.parametrize("lines", [1, 2, 5, 1024])
+def test_cells_read_in_batches(monkeypatch, lines):
+    monkeypatch.setattr(patternio, "CELLS_LINES", lines)
+    text = b"!Name: test\r\n.O\r\n\r\n!middle\r\n*..O\r\nOOO\r\n"
+    pattern = read_cells(io.BytesIO(text))
+    assert pattern.comments == ["Name: test", "middle"]
+    assert pattern.cells.shape == (4, 4)
+    assert live(pattern.cells) == [(0, 2), (0, 3), (1, 0), (1, 3), (2, 3), (3, 2)]
+    out = np.zeros((3, 6), dtype=bool)
+    read_cells(io.BytesIO(text), out, x=-1, y=1)
+    assert live(out) == [(0, 1), (0, 4), (1, 4), (2, 3)]
@@ -0,0 +1,74 @@
+"""
+Tests for recording a simulation to image frames.
+"""
+import numpy as np
+import pytest
+
+from lifecore import TORUS, LifeEngine, Simulation
+from recorder import ALIVE_COLOR, DEAD_COLOR, PngWriter, palette, record, scale_up
+
+
+class FrameList:
+    """ A writer that keeps copies of the frames """
+
+    def __init__(self):
+        self.frames = []
+        self.closed = False
+
+    def write(self, image):
+        self.frames.append(image.copy())
+
+    def close(self):
+        self.closed = True
+
+
+def test_scale_up():
+    cells = np.array([[True, False, False], [False, False, True]])
+    image = scale_up(cells, 2)
+    assert image.shape == (6, 4)
+    assert np.array_equal(image[::2, ::2], cells.T)
+    assert np.array_equal(image[1::2, 1::2], cells.T)
+
+
+def test_palette():
+    assert palette() == [DEAD_COLOR, ALIVE_COLOR]
+    colors = palette(4)
+    assert colors[:2] == [DEAD_COLOR, ALIVE_COLOR]
+    # Dying states fade towards dead
+    assert colors[1] > colors[2] > colors[3] > colors[0]
+
+
+def test_record_two_states():
+    board = np.random.default_rng(0).random((12, 9)) < 0.4
+    writer = FrameList()
+    frames = record(Simulation(board, "life", TORUS), writer, 10, every=2)
+    assert frames == len(writer.frames) == 6 and writer.closed
+    reference = LifeEngine(board, TORUS)
+    for image in writer.frames:
+        assert np.array_equal(image, reference.to_array().T.astype(np.uint8))
+        reference.step(2)
+
+
+def test_record_generations_states():
+    board = np.random.default_rng(1).integers(0, 3, (10, 8)).astype(np.uint8)
+    simulation = Simulation(board, "life", TORUS, "B2/S/C3")
+    writer = FrameList()
+    record(simulation, writer, 4, scale=3)
+    reference = LifeEngine(board, TORUS, "B2/S/C3")
+    for image in writer.frames:
+        # Each pixel is the state of its cell, an index into palette(3)
+        assert np.array_equal(image[::3, ::3], reference.to_array().T)
+        reference.step()
+    assert {1, 2} <= set(np.unique(writer.frames[-1]))
+
+
+def test_png_frames(tmp_path):
+    image_module = pytest.importorskip("PIL.Image")
+    board = np.random.default_rng(2).integers(0, 4, (6, 5)).astype(np.uint8)
+    writer = PngWriter(str(tmp_path / "frame.png"), 12, 10, palette(4))
+    record(Simulation(board, "life", TORUS, "B2/S345/C4"), writer, 1, scale=2)
+    with image_module.open(tmp_path / "frame-000000.png") as png:
+        pixels = np.asarray(png.convert("RGB"))
+    expected = np.asarray(palette(4), dtype=np.uint8)[scale_up(board, 2)]
+    assert np.array_equal(pixels, expected)
+    assert (tmp_path / "frame-000001.png").exists()
@@ -0,0 +1,106 @@
+"""
+Tests for rule parsing and for stepping rules against a brute-force count.
+"""
+import numpy as np
+import pytest
+
+from lifecore import FIXED, TORUS, game_of_life
+from rules import Rule, parse_rule
+
+
+def brute_force(board, rule, boundary):
+    """ Step board one generation, counting every neighborhood cell by cell """
+    rows, cols = board.shape
+    live = board == 1
+    out = board.copy()
+    radius = rule.radius
+    for x in range(rows):
+        for y in range(cols):
+            if boundary == FIXED and (x in (0, rows - 1) or y in (0, cols - 1)):
+                continue
+            count = 0
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    if dx == dy == 0:
+                        continue
+                    i, j = x + dx, y + dy
+                    if boundary == TORUS:
+                        count += live[i % rows, j % cols]
+                    elif 0 <= i < rows and 0 <= j < cols:
+                        count += live[i, j]
+            state = int(board[x, y])
+            if state == 0:
+                new = 1 if count in rule.birth else 0
+            elif state == 1:
+                new = 1 if count in rule.survival else 2 % rule.states
+            else:
+                new = (state + 1) % rule.states
+            out[x, y] = new
+    return out
+
+
+def random_board(rule, shape, seed):
+    rng = np.random.default_rng(seed)
+    if rule.states == 2:
+        return rng.random(shape) < 0.4
+    return rng.integers(0, rule.states, shape).astype(np.uint8)
+
+
+@pytest.mark.parametrize("spec", [
+    "B3/S23", "B36/S23", "B2/S", "B3678/S34678", "B0/S8", "B2/S/C3", "B2/S345/C4", "B35/S236/C5",
+    "R2,C0,M0,S3..7,B4..6,NM", "R3,C0,M1,S2..12,B5..9,14,NM", "R2,C4,M0,S2..6,B3..5,NM",
+])
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+def test_step_matches_brute_force(spec, boundary):
+    rule = parse_rule(spec)
+    board = random_board(rule, (13, 11), seed=len(spec))
+    for generation in range(1, 6):
+        expected = brute_force(board, rule, boundary)
+        board = rule.step(board, boundary=boundary)
+        assert board.dtype == rule.dtype
+        assert np.array_equal(board, expected), f"{spec}, generation {generation}"
+
+
+def test_step_in_place_with_work_buffers():
+    rule = parse_rule("R2,C0,M0,S3..7,B4..6,NM")
+    board = random_board(rule, (20, 16), seed=4)
+    expected = brute_force(board, rule, TORUS)
+    rule.step(board, board, TORUS, rule.work_buffers(board.shape))
+    assert np.array_equal(board, expected)
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+def test_life_matches_game_of_life(boundary):
+    rule = parse_rule("B3/S23")
+    assert rule.is_life
+    board = random_board(rule, (30, 25), seed=1)
+    assert np.array_equal(rule.step(board, boundary=boundary), game_of_life(board, boundary=boundary))
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("life", "B3/S23"),
+    ("HighLife", "B36/S23"),
+    ("23/36", "B36/S23"),
+    ("/2/3", "B2/S/C3"),
+    ("b2/s/g3", "B2/S/C3"),
+    ("S23/B3", "B3/S23"),
+    ("bosco", "R5,C0,M0,S33..57,B34..45,NM"),
+    ("R5,C0,M0,S33..57,B34..45,NM", "R5,C0,M0,S33..57,B34..45,NM"),
+])
+def test_parse(spec, expected):
+    rule = parse_rule(spec)
+    assert str(rule) == expected
+    assert parse_rule(str(rule)) == rule
+
+
+@pytest.mark.parametrize("spec", ["B9/S23", "B3/S23/C1", "B3", "R0,C0,M0,S1,B1,NM", "R1,C0,S1,B1,NN",
+                                  "R1,C0,M0,S1,B9,NM", "nonsense"])
+def test_invalid_rules(spec):
+    with pytest.raises(ValueError):
+        parse_rule(spec)
+
+
+def test_rule_is_returned_unchanged():
+    rule = Rule({3}, {2, 3})
+    assert parse_rule(rule) is rule
+    assert parse_rule("B3/S23") is parse_rule("B3/S23")
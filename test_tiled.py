@@ -0,0 +1,94 @@
+"""
+Tests for the tiled engine against the NumPy engine.
+"""
+import numpy as np
+import pytest
+
+import tiled
+from lifecore import FIXED, INFINITE, TORUS, LifeEngine
+from patterns import pattern, place
+from tiled import TiledEngine
+
+
+def soup(shape, seed=0, density=0.4):
+    return np.random.default_rng(seed).random(shape) < density
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+@pytest.mark.parametrize("shape", [(16, 16), (32, 48), (64, 32)])
+def test_step_matches_life_engine(boundary, shape):
+    board = soup(shape, seed=shape[1])
+    engine = TiledEngine(board, boundary)
+    reference = LifeEngine(board, boundary)
+    for generation in range(1, 101):
+        engine.step()
+        reference.step()
+        assert np.array_equal(engine.to_array(), reference.to_array()), f"generation {generation}"
+    assert engine.generation == reference.generation
+
+
+@pytest.mark.parametrize("shape", [(17, 17), (30, 45), (5, 70)])
+def test_fixed_board_not_a_multiple_of_tile_size(shape):
+    board = soup(shape, seed=shape[0])
+    engine = TiledEngine(board, FIXED)
+    reference = LifeEngine(board, FIXED)
+    engine.step(60)
+    reference.step(60)
+    assert np.array_equal(engine.to_array(), reference.to_array())
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+def test_sparse_steps_match(monkeypatch, boundary):
+    # A glider crossing tile edges is stepped tile by tile, never densely
+    monkeypatch.setattr(tiled, "DENSE_FRACTION", 1.0)
+    board = place(np.zeros((64, 64), dtype=bool), pattern("glider"), 10, 10)
+    engine = TiledEngine(board, boundary, tile_size=8)
+    reference = LifeEngine(board, boundary)
+    for generation in range(1, 241):
+        engine.step()
+        reference.step()
+        assert np.array_equal(engine.to_array(), reference.to_array()), f"generation {generation}"
+    assert engine.changed.sum() <= 4
+
+
+@pytest.mark.parametrize("boundary", [FIXED, TORUS])
+def test_edits_wake_tiles(monkeypatch, boundary):
+    monkeypatch.setattr(tiled, "DENSE_FRACTION", 1.0)
+    board = np.zeros((32, 32), dtype=bool)
+    engine = TiledEngine(board, boundary, tile_size=8)
+    reference = LifeEngine(board, boundary)
+    engine.step(3)
+    reference.step(3)
+    assert not engine.changed.any()
+    # A blinker on a tile corner, drawn while everything is still
+    for y in (7, 8, 9):
+        engine.set(8, y, True)
+        reference.set(8, y, True)
+    for _ in range(5):
+        engine.step()
+        reference.step()
+        assert np.array_equal(engine.to_array(), reference.to_array())
+
+
+def test_dirty_regions():
+    engine = TiledEngine(np.zeros((40, 40), dtype=bool), FIXED, tile_size=16)
+    # Every tile is dirty at first, the last row and column of tiles clipped
+    regions = engine.dirty_regions()
+    assert len(regions) == 9 and (32, 32, 8, 8) in regions
+    assert engine.dirty_regions() == []
+    engine.set(20, 3, True)
+    assert engine.dirty_regions() == [(16, 0, 16, 16)]
+
+
+def test_window_and_population():
+    board = soup((48, 32), seed=3)
+    engine = TiledEngine(board, TORUS)
+    assert engine.population() == np.count_nonzero(board)
+    assert np.array_equal(engine.window(-2, 5, 20, 30), LifeEngine(board).window(-2, 5, 20, 30))
+
+
+def test_unsupported_boards():
+    with pytest.raises(ValueError):
+        TiledEngine(np.zeros((20, 32), dtype=bool), TORUS)
+    with pytest.raises(ValueError):
+        TiledEngine(np.zeros((32, 32), dtype=bool), INFINITE)
@@ -0,0 +1,139 @@
+"""
+The camera that looks at part of the universe.
+
+A Camera turns screen pixels into universe cells and back. Zoom levels of
+one pixel per cell and up draw every cell as a square; below that each
+pixel stands for a block of cells and shows their density, so the number
+of pixels drawn depends on the size of the view and never on the size of
+the universe. This module does not depend on pygame.
+"""
+import math
+
+import numpy as np
+
+# Pixels per cell. Levels below 1 are sub-pixel: one pixel per 2x2, 4x4, ...
+# block of cells.
+ZOOM_LEVELS = (1 / 4, 1 / 2, 1, 2, 3, 4, 5, 7, 10, 14, 20, 28)
+
+
+def density_map(cells, block, out=None):
+    """
+    Return the density of every block x block square of cells as uint8
+    levels, 0 for empty and 255 for full. cells must be a whole number of
+    blocks wide and high.
+    """
+    width, height = cells.shape
+    counts = cells.view(np.uint8).reshape(width // block, block, height // block, block)
+    counts = counts.sum(axis=(1, 3), dtype=np.uint16)
+    if out is None:
+        out = np.empty(counts.shape, dtype=np.uint8)
+    np.floor_divide(counts * 255, block * block, out=out, casting="unsafe")
+    return out
+
+
+class Camera:
+    """
+    A view of width x height pixels onto the universe.
+
+    x and y are the universe coordinates (in cells, not necessarily whole)
+    of the top left corner of the view. zoom is one of ZOOM_LEVELS, no
+    smaller than min_zoom.
+    """
+
+    def __init__(self, width, height, zoom=7, x=0.0, y=0.0, min_zoom=None):
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.min_level = 0
+        if min_zoom is not None:
+            self.min_level = min(i for i, level in enumerate(ZOOM_LEVELS) if level >= min_zoom)
+        self.level = self._nearest_level(zoom)
+
+    @property
+    def zoom(self):
+        return ZOOM_LEVELS[self.level]
+
+    @property
+    def pixel(self):
+        """ Pixels per cell side when zoomed in, otherwise 1 """
+        return max(1, int(self.zoom))
+
+    @property
+    def block(self):
+        """ Cells per pixel side when zoomed out, otherwise 1 """
+        return max(1, round(1 / self.zoom))
+
+    def _nearest_level(self, zoom):
+        levels = range(self.min_level, len(ZOOM_LEVELS))
+        return min(levels, key=lambda level: abs(math.log(ZOOM_LEVELS[level] / zoom)))
+
+    def window(self):
+        """
+        Return the rectangle of cells that covers the view, as (x, y, width,
+        height). Its size only changes with the zoom; its corner is a whole
+        number of blocks.
+        """
+        block = self.block
+        x = math.floor(self.x / block) * block
+        y = math.floor(self.y / block) * block
+        columns = -(-self.width // self.pixel) + 1
+        rows = -(-self.height // self.pixel) + 1
+        return x, y, columns * block, rows * block
+
+    def offset(self):
+        """
+        Return where the corner of window() is drawn, in pixels from the top
+        left of the view (zero or negative when the view is between cells)
+        """
+        if self.block > 1:
+            return 0, 0
+        return (-int((self.x - math.floor(self.x)) * self.pixel),
+                -int((self.y - math.floor(self.y)) * self.pixel))
+
+    def state(self):
+        """ What decides the pixels of the view; when it changes the view is redrawn """
+        return self.window(), self.offset(), self.level
+
+    def screen_to_cell(self, px, py):
+        """ Return the universe cell under the point (px, py) of the view """
+        window_x, window_y = self.window()[:2]
+        offset_x, offset_y = self.offset()
+        pixel, block = self.pixel, self.block
+        return (window_x + (int(px) - offset_x) // pixel * block,
+                window_y + (int(py) - offset_y) // pixel * block)
+
+    def center_on(self, x, y):
+        """ Move the view so that the universe point (x, y) is in the middle """
+        self.x = x - self.width / 2 / self.zoom
+        self.y = y - self.height / 2 / self.zoom
+
+    def pan(self, dx, dy):
+        """ Move the view by the given number of pixels, as when dragging it """
+        self.x -= dx / self.zoom
+        self.y -= dy / self.zoom
+
+    def zoom_at(self, steps, px, py):
+        """ Zoom in (positive steps) or out by whole levels, keeping the point (px, py) of the view still """
+        level = min(max(self.level + steps, self.min_level), len(ZOOM_LEVELS) - 1)
+        self._set_level(level, px, py)
+
+    def set_zoom(self, zoom, px, py):
+        """ Zoom to the level nearest to zoom, keeping the point (px, py) of the view still """
+        self._set_level(self._nearest_level(zoom), px, py)
+
+    def _set_level(self, level, px, py):
+        x = self.x + px / self.zoom
+        y = self.y + py / self.zoom
+        self.level = level
+        self.x = x - px / self.zoom
+        self.y = y - py / self.zoom
+
+    def render(self, cells, out=None):
+        """
+        Turn the cells of window() into what is drawn: the cells themselves
+        when zoomed in, or their density_map() when zoomed out
+        """
+        if self.block == 1:
+            return cells
+        return density_map(cells, self.block, out)